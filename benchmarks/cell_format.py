@@ -0,0 +1,63 @@
+"""Бенчмарк форматирования ячеек: по ячейке против столбца целиком.
+
+Сервер генерирует строки в форме GET_SELLS; текст всех ячеек (как для
+индекса поиска) строится Column.format по каждой ячейке и format_values
+по столбцу — для строк запроса (списки значений) и для массивов
+fetch_columns.
+
+Запуск: python -m benchmarks.cell_format [--rows 1000000]
+"""
+import argparse
+import time
+
+from database.db import Database
+from database.instrumentation import metrics
+from benchmarks.row_memory import GENERATE_SELLS
+from benchmarks.table_view import COLUMNS
+from ui.data_table import ColumnStore
+from ui.formatting import format_values
+
+
+def per_cell(store):
+    return [
+        [column.format(store.value(row, index)) for row in range(len(store))]
+        for index, column in enumerate(COLUMNS)
+    ]
+
+
+def per_column(store):
+    return [format_values(column, store.column(index)) for index, column in enumerate(COLUMNS)]
+
+
+def measure(format_all, store):
+    started = time.perf_counter()
+    format_all(store)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--investors", type=int, default=300)
+    parser.add_argument("--tickers", type=int, default=2000)
+    args = parser.parse_args()
+    params = {"rows": args.rows, "investors": args.investors, "tickers": args.tickers}
+
+    metrics.enabled = False
+    db = Database()
+    rows = db.execute_query(GENERATE_SELLS, params, fetch_all=True)
+    stores = {
+        "строки": ColumnStore.from_rows(rows, len(COLUMNS)),
+        "fetch_columns": ColumnStore.from_arrays(db.fetch_columns(GENERATE_SELLS, params).values()),
+    }
+    del rows
+
+    print(f"{'Данные':<16}{'по ячейке, с':>14}{'по столбцу, с':>15}")
+    for title, store in stores.items():
+        cell = measure(per_cell, store)
+        column = measure(per_column, store)
+        print(f"{title:<16}{cell:>14.2f}{column:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Бенчмарк чтения данных для графиков: строки против fetch_columns.
+
+Сервер генерирует строки в форме GET_SELLS; для каждого способа
+измеряются время до готовых массивов NumPy (как их строят графики:
+float из Decimal, даты, подписи) и память результата (tracemalloc).
+
+Запуск: python -m benchmarks.columnar_fetch [--rows 1000000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+from database.db import Database
+from database.instrumentation import metrics
+from benchmarks.row_memory import GENERATE_SELLS
+
+
+def from_rows(db, params):
+    rows = db.execute_query(GENERATE_SELLS, params, fetch_all=True)
+    return {
+        "sale_date": np.array([row[3] for row in rows], dtype="datetime64[D]"),
+        "price": np.array([float(row[5]) for row in rows]),
+        "investor_name": [row[1] for row in rows],
+    }
+
+
+def from_columns(db, params):
+    columns = db.fetch_columns(GENERATE_SELLS, params)
+    return {name: columns[name] for name in ("sale_date", "price", "investor_name")}
+
+
+def measure(fetch, db, params):
+    """(секунд, МБ в памяти после чтения, пик МБ)"""
+    # Время — без tracemalloc: трассировка замедляет создание объектов
+    gc.collect()
+    started = time.perf_counter()
+    result = fetch(db, params)
+    elapsed = time.perf_counter() - started
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = fetch(db, params)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current / 1024 / 1024, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--investors", type=int, default=300)
+    parser.add_argument("--tickers", type=int, default=2000)
+    args = parser.parse_args()
+    params = {"rows": args.rows, "investors": args.investors, "tickers": args.tickers}
+
+    # Планы медленных запросов снимались бы параллельно с замером
+    metrics.enabled = False
+    db = Database()
+    print(f"{'Способ':<22}{'время, с':>10}{'память, МБ':>12}{'пик, МБ':>10}")
+    for title, fetch in (("строки psycopg2", from_rows), ("fetch_columns", from_columns)):
+        elapsed, current, peak = measure(fetch, db, params)
+        print(f"{title:<22}{elapsed:>10.2f}{current:>12.1f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Бенчмарк памяти строк результата: кортежи psycopg2 против Record.
+
+Сервер генерирует строки в форме GET_SELLS (id, инвестор, тикер, дата,
+количество, цена) с повторяющимися именами инвесторов и тикерами;
+результат читается обычным курсором и RecordCursor. Память строк
+считается tracemalloc (объекты Python, без буфера libpq).
+
+Запуск: python -m benchmarks.row_memory [--rows 1000000] [--investors 300] [--tickers 2000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from database.db import Database
+from database.records import RecordCursor
+
+
+GENERATE_SELLS = """
+    SELECT g as sell_id,
+           'ООО Инвестор ' || (g %% %(investors)s) as investor_name,
+           'TCK' || (g * 7 %% %(tickers)s) as stock_ticket,
+           DATE '2020-01-01' + (g %% 1500) as sale_date,
+           1 + g %% 500 as num,
+           round((10 + g %% 9000 / 100.0)::numeric, 2) as price
+    FROM generate_series(1, %(rows)s) g
+"""
+
+
+def measure(conn, cursor_factory, params):
+    """(байт на строку, секунд на fetchall)"""
+    with conn.cursor(cursor_factory=cursor_factory) as cursor:
+        cursor.execute(GENERATE_SELLS, params)
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    count = len(rows)
+    del rows
+    conn.rollback()
+    return size / count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--investors", type=int, default=300)
+    parser.add_argument("--tickers", type=int, default=2000)
+    args = parser.parse_args()
+    params = {"rows": args.rows, "investors": args.investors, "tickers": args.tickers}
+
+    with Database().get_connection() as conn:
+        print(f"{'Строки':<22}{'байт/строка':>12}{'всего, МБ':>12}{'fetchall, с':>13}")
+        results = []
+        for title, cursor_factory in (("кортежи psycopg2", None), ("Record", RecordCursor)):
+            per_row, elapsed = measure(conn, cursor_factory, params)
+            results.append(per_row)
+            total = per_row * args.rows / 1024 / 1024
+            print(f"{title:<22}{per_row:>12.0f}{total:>12.1f}{elapsed:>13.2f}")
+        print(f"Экономия: {(1 - results[1] / results[0]) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Бенчмарк открытия списка: QTableWidget против DataTable.
+
+Строки в форме GET_SELLS читаются с сервера один раз; замеряется время
+от готовых строк до показанной таблицы (заполнение, подбор ширины
+столбцов, первая отрисовка). QTableWidget создает элемент на каждую
+ячейку, поэтому для него берется не больше --widget-rows строк.
+
+Запуск: python -m benchmarks.table_view [--rows 1000000]
+"""
+import argparse
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+from database.db import Database
+from database.instrumentation import metrics
+from benchmarks.row_memory import GENERATE_SELLS
+from ui.data_table import Column, DataTable
+
+COLUMNS = [
+    Column("ID"),
+    Column("Инвестор"),
+    Column("Тикер"),
+    Column("Дата продажи", "date"),
+    Column("Количество", "int"),
+    Column("Цена", "money"),
+]
+
+
+def open_widget(app, rows):
+    """Прежний способ: QTableWidgetItem на каждую ячейку"""
+    table = QTableWidget()
+    table.setColumnCount(len(COLUMNS))
+    table.setHorizontalHeaderLabels([column.title for column in COLUMNS])
+    table.setRowCount(len(rows))
+    for row, values in enumerate(rows):
+        for col, value in enumerate(values):
+            table.setItem(row, col, QTableWidgetItem(COLUMNS[col].format(value)))
+    table.resizeColumnsToContents()
+    table.show()
+    app.processEvents()
+    return table
+
+
+def open_data_table(app, rows):
+    table = DataTable(COLUMNS)
+    table.set_rows(rows)
+    table.show()
+    app.processEvents()
+    return table
+
+
+def measure(open_table, app, rows):
+    started = time.perf_counter()
+    table = open_table(app, rows)
+    elapsed = time.perf_counter() - started
+    table.close()
+    table.deleteLater()
+    app.processEvents()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--widget-rows", type=int, default=100_000)
+    parser.add_argument("--investors", type=int, default=300)
+    parser.add_argument("--tickers", type=int, default=2000)
+    args = parser.parse_args()
+    params = {"rows": args.rows, "investors": args.investors, "tickers": args.tickers}
+
+    app = QApplication(sys.argv)
+    metrics.enabled = False
+    rows = Database().execute_query(GENERATE_SELLS, params, fetch_all=True)
+
+    print(f"{'Таблица':<16}{'строк':>10}{'время, с':>10}")
+    widget_rows = rows[:args.widget_rows]
+    elapsed = measure(open_widget, app, widget_rows)
+    print(f"{'QTableWidget':<16}{len(widget_rows):>10}{elapsed:>10.2f}")
+    elapsed = measure(open_data_table, app, rows)
+    print(f"{'DataTable':<16}{len(rows):>10}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Бенчмарк поиска подстроки (фильтры «содержит») на больших таблицах.
+
+Создает схему bench с копиями Client и legal_entities (вместе со всеми
+индексами, в том числе триграммными из миграции 0003), заполняет их
+синтетическими строками и выполняет фильтры из Queries так же, как
+вкладки приложения. Печатает медиану и p95 времени запроса и узел плана.
+
+Запуск: python -m benchmarks.trigram_search [--rows 5000000] [--repeat 20] [--keep]
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+import psycopg2
+
+from database.db import Database
+from database.queries import Queries
+from database.query_builder import contains
+
+
+CREATE_SCHEMA = """
+    DROP SCHEMA IF EXISTS bench CASCADE;
+    CREATE SCHEMA bench;
+    CREATE TABLE bench.Client (LIKE public.Client INCLUDING ALL);
+    CREATE TABLE bench.legal_entities (LIKE public.legal_entities INCLUDING ALL);
+"""
+# Фамилии и наименования уникальны: шестнадцатеричный суффикс из md5
+FILL_CLIENTS = """
+    INSERT INTO bench.Client (id, first_name, last_name, phone)
+    SELECT g,
+           (ARRAY['Иван', 'Олег', 'Анна', 'Мария', 'Виктор'])[1 + g %% 5],
+           (ARRAY['Иванов', 'Петрова', 'Сидоров', 'Кузнецова'])[1 + g %% 4]
+               || '-' || substr(md5(g::text), 1, 10),
+           format('+7 (%%s) %%s-%%s-%%s',
+                  lpad((g / 10000000 %% 1000)::text, 3, '0'),
+                  lpad((g / 10000 %% 1000)::text, 3, '0'),
+                  lpad((g / 100 %% 100)::text, 2, '0'),
+                  lpad((g %% 100)::text, 2, '0'))
+    FROM generate_series(1, %s) g
+"""
+FILL_ENTITIES = """
+    INSERT INTO bench.legal_entities (entity_id, entity_name, inn, status)
+    SELECT g, 'ООО Компания ' || substr(md5(g::text), 1, 12),
+           lpad(g::text, 10, '0'), g %% 5 <> 0
+    FROM generate_series(1, %s) g
+"""
+
+# Образцы для поиска — фрагменты строки с id = 4242
+_SAMPLE = hashlib.md5(b"4242").hexdigest()
+
+# (название, запрос, значения фильтров)
+CASES = [
+    ("Клиенты: фамилия", Queries.GET_ALL_CLIENTS,
+     {"last_name": contains(_SAMPLE[2:8])}),
+    ("Клиенты: фамилия + имя", Queries.GET_ALL_CLIENTS,
+     {"first_name": contains("мари"), "last_name": contains(_SAMPLE[:6])}),
+    ("Клиенты: телефон", Queries.GET_ALL_CLIENTS,
+     {"phone": contains("0004242")}),
+    ("Юрлица: наименование", Queries.GET_ALL_ENTITIES,
+     {"name": contains(_SAMPLE[3:9].upper())}),
+    ("Юрлица: ИНН", Queries.GET_ALL_ENTITIES,
+     {"inn": contains("0000424")}),
+]
+
+
+def prepare(conn, rows):
+    with conn.cursor() as cursor:
+        print(f"Заполнение bench: {rows} клиентов и {rows} юрлиц...")
+        started = time.perf_counter()
+        cursor.execute(CREATE_SCHEMA)
+        cursor.execute(FILL_CLIENTS, (rows,))
+        cursor.execute(FILL_ENTITIES, (rows,))
+        conn.commit()
+        cursor.execute("ANALYZE bench.Client")
+        cursor.execute("ANALYZE bench.legal_entities")
+        conn.commit()
+        print(f"  готово за {time.perf_counter() - started:.0f} с")
+
+
+def run(conn, repeat):
+    with conn.cursor() as cursor:
+        # Запросы Queries без схемы в именах таблиц попадают в bench
+        cursor.execute("SET search_path TO bench, public")
+        print(f"{'Запрос':<26}{'строк':>8}{'p50, мс':>10}{'p95, мс':>10}  план")
+        for title, query, values in CASES:
+            sql, params = query.build(values)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = _scan_nodes(row[0] for row in cursor.fetchall())
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{title:<26}{len(rows):>8}{statistics.median(timings):>10.2f}{p95:>10.2f}  {plan}")
+        conn.rollback()
+
+
+def _scan_nodes(lines):
+    """Узлы чтения таблиц из текста EXPLAIN"""
+    nodes = []
+    for line in lines:
+        line = line.strip().lstrip("->").strip()
+        if "Scan" in line:
+            nodes.append(line.split("  (")[0])
+    return "; ".join(nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="не удалять схему bench")
+    parser.add_argument("--reuse", action="store_true", help="использовать заполненную схему bench")
+    args = parser.parse_args()
+
+    # Отдельное соединение, не из пула: подготовленные операторы пула
+    # не должны привязаться к таблицам схемы bench
+    conn = psycopg2.connect(**Database().conn_params)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                print("pg_trgm не установлен (миграция 0003 не применена): "
+                      "измеряется последовательное сканирование")
+        conn.rollback()
+        if not args.reuse:
+            prepare(conn, args.rows)
+        run(conn, args.repeat)
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute("DROP SCHEMA IF EXISTS bench CASCADE")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Сводные таблицы отчетов «Аналитики» (миграция 0005).
+
+Сводки поддерживаются триггерами sells/emissions; полный пересчет нужен
+после изменения данных в обход триггеров (например, session_replication_role
+= replica при восстановлении) или для проверки расхождений.
+
+Пока миграция не применена, отчеты строятся агрегатами по исходным
+таблицам (summaries_available).
+
+Запуск: python -m database.analytics [status|rebuild]
+"""
+import sys
+import time
+
+from .db import Database
+from .queries import Queries
+
+
+REBUILD = "SELECT analytics_rebuild()"
+
+# (название, запрос времени последнего изменения)
+SUMMARIES = [
+    ("analytics_emission_status", Queries.GET_EMISSION_STATUS_UPDATED_AT),
+    ("analytics_stock_sells", Queries.GET_STOCK_SELLS_UPDATED_AT),
+    ("analytics_investor_sells", Queries.GET_INVESTOR_SELLS_UPDATED_AT),
+]
+
+_available = False
+
+
+def summaries_available(db=None):
+    """Созданы ли сводные таблицы; после первого положительного ответа
+    база больше не опрашивается"""
+    global _available
+    if not _available:
+        db = db or Database()
+        _available = bool(db.execute_query(Queries.GET_ANALYTICS_SUMMARIES_EXIST, fetch_one=True)[0])
+    return _available
+
+
+def rebuild(db=None):
+    """Пересчитывает все сводки в одной транзакции; возвращает время в секундах"""
+    db = db or Database()
+    started = time.perf_counter()
+    db.execute_query(REBUILD, commit=True)
+    return time.perf_counter() - started
+
+
+def status(db=None):
+    """[(сводка, время последнего изменения или None)]"""
+    db = db or Database()
+    return [
+        (name, db.execute_query(query, fetch_one=True)[0])
+        for name, query in SUMMARIES
+    ]
+
+
+def main(argv):
+    command = argv[0] if argv else "status"
+    if command == "rebuild":
+        print(f"Rebuilt in {rebuild():.2f} s")
+    elif command == "status":
+        for name, updated_at in status():
+            state = updated_at.strftime("%Y-%m-%d %H:%M:%S") if updated_at else "пусто"
+            print(f"{name}: {state}")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+import csv
+
+from .db import Database
+
+
+DATE_RE = r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?$"
+# Суммы и ставки — NUMERIC(15,2)/NUMERIC(5,2): не больше двух знаков после точки
+NUMBER_RE = r"^-?\d+(\.\d{1,2})?$"
+INTEGER_RE = r"^\d{1,9}$"
+PHONE_RE = r"^\+7 \(\d{3}\) \d{3}-\d{2}-\d{2}$"
+
+
+# pg_input_is_valid появилась в PostgreSQL 16; на ранних версиях — та же
+# проверка пробным приведением в блоке EXCEPTION
+CREATE_INPUT_IS_VALID = """
+    CREATE OR REPLACE FUNCTION pg_temp.input_is_valid(value TEXT, type_name TEXT)
+    RETURNS BOOLEAN LANGUAGE plpgsql STRICT AS $$
+    BEGIN
+        EXECUTE format('SELECT %L::%s', value, type_name);
+        RETURN TRUE;
+    EXCEPTION WHEN data_exception THEN
+        RETURN FALSE;
+    END
+    $$
+"""
+
+
+def _valid(column, pattern, sql_type):
+    """Условие: значение соответствует формату и приводится к типу столбца
+    (формат пропускает 2024-02-30, месяц 13 и суммы больше NUMERIC(15,2));
+    для пустого значения — NULL"""
+    return f"(s.{column} ~ '{pattern}' AND {{is_valid}}(s.{column}, '{sql_type}'))"
+
+
+def _required(*columns):
+    """Условие: хотя бы одно из обязательных полей пустое"""
+    return " OR ".join(f"NULLIF(TRIM(s.{col}), '') IS NULL" for col in columns)
+
+
+# Описание импортируемых сущностей:
+#   columns  — столбцы CSV-файла (все загружаются в staging как text)
+#   extra    — служебные столбцы staging для разрешения внешних ключей
+#   resolve  — запросы, заполняющие служебные столбцы
+#   checks   — (причина отказа, условие) проверяются по порядку
+#   merge    — перенос прошедших проверку строк в рабочую таблицу
+IMPORT_SPECS = {
+    "client": {
+        "title": "Клиенты",
+        "columns": ["first_name", "last_name", "phone"],
+        "extra": [],
+        "resolve": [],
+        "checks": [
+            ("Не заполнены обязательные поля", _required("first_name", "last_name", "phone")),
+            ("Неверный формат телефона", f"s.phone !~ '{PHONE_RE}'"),
+            (
+                "Клиент с таким телефоном уже существует",
+                "EXISTS (SELECT 1 FROM Client c WHERE c.phone = s.phone)",
+            ),
+            (
+                "Телефон повторяется в файле",
+                "EXISTS (SELECT 1 FROM {staging} d WHERE d.phone = s.phone AND d.line_no < s.line_no)",
+            ),
+        ],
+        "merge": """
+            INSERT INTO Client (first_name, last_name, phone)
+            SELECT TRIM(first_name), TRIM(last_name), phone
+            FROM {staging}
+            WHERE reject_reason IS NULL
+            ORDER BY line_no
+        """,
+    },
+    "document": {
+        "title": "Документы",
+        "columns": [
+            "passport_number", "birth_date", "gender", "client_phone",
+            "agreement_date", "security_word", "agreement_status",
+        ],
+        "extra": ["client_id INT"],
+        "resolve": [
+            "UPDATE {staging} s SET client_id = c.id FROM Client c WHERE c.phone = s.client_phone",
+        ],
+        "checks": [
+            (
+                "Не заполнены обязательные поля",
+                _required("passport_number", "birth_date", "gender", "client_phone", "security_word"),
+            ),
+            ("Клиент с таким телефоном не найден", "s.client_id IS NULL"),
+            ("Неверная дата рождения", "NOT " + _valid("birth_date", DATE_RE, "timestamp")),
+            ("Неверная дата договора", "NOT " + _valid("agreement_date", DATE_RE, "timestamp")),
+            ("Неверный пол (Male/Female)", "s.gender NOT IN ('Male', 'Female')"),
+            (
+                "Неверный статус договора (active/inactive)",
+                "s.agreement_status NOT IN ('active', 'inactive')",
+            ),
+        ],
+        "merge": """
+            INSERT INTO Document (
+                passport_number, birth_date, gender, client_id,
+                agreement_date, security_word, agreement_status
+            )
+            SELECT passport_number, birth_date::timestamp, gender, client_id,
+                   COALESCE(agreement_date::timestamp, CURRENT_TIMESTAMP),
+                   security_word, COALESCE(agreement_status, 'active')
+            FROM {staging}
+            WHERE reject_reason IS NULL
+            ORDER BY line_no
+        """,
+    },
+    "deposit": {
+        "title": "Вклады",
+        "columns": [
+            "amount", "open_date", "close_date", "interest_rate",
+            "status", "term_days", "type", "client_phone",
+        ],
+        "extra": ["client_id INT"],
+        "resolve": [
+            "UPDATE {staging} s SET client_id = c.id FROM Client c WHERE c.phone = s.client_phone",
+        ],
+        "checks": [
+            ("Не заполнены обязательные поля", _required("interest_rate", "client_phone")),
+            ("Клиент с таким телефоном не найден", "s.client_id IS NULL"),
+            ("Неверная сумма", "NOT " + _valid("amount", NUMBER_RE, "numeric(15,2)")),
+            (
+                "Неверная процентная ставка",
+                f"CASE WHEN {_valid('interest_rate', NUMBER_RE, 'numeric(5,2)')} "
+                "THEN s.interest_rate::numeric < 0 ELSE TRUE END",
+            ),
+            ("Неверная дата открытия", "NOT " + _valid("open_date", DATE_RE, "timestamp")),
+            ("Неверная дата закрытия", "NOT " + _valid("close_date", DATE_RE, "timestamp")),
+            ("Неверный срок (дней)", f"s.term_days !~ '{INTEGER_RE}'"),
+            (
+                "Дата закрытия раньше даты открытия",
+                f"CASE WHEN {_valid('close_date', DATE_RE, 'timestamp')} "
+                f"AND COALESCE({_valid('open_date', DATE_RE, 'timestamp')}, TRUE) "
+                "THEN s.close_date::timestamp < COALESCE(s.open_date::timestamp, CURRENT_TIMESTAMP) "
+                "ELSE FALSE END",
+            ),
+            ("Неверный статус вклада", "s.status NOT IN ('open', 'closed', 'closed early')"),
+            (
+                "Неверный тип вклада",
+                "s.type NOT IN ('Savings', 'Student', 'Student+', 'Premier', 'Future Care', 'Social', 'Social+')",
+            ),
+        ],
+        "merge": """
+            INSERT INTO Deposit (
+                amount, close_date, open_date, interest_rate,
+                status, term, type, client_id
+            )
+            SELECT COALESCE(amount::numeric, 0), close_date::timestamp,
+                   COALESCE(open_date::timestamp, CURRENT_TIMESTAMP),
+                   interest_rate::numeric, COALESCE(status, 'open'),
+                   COALESCE((term_days || ' days')::interval, '1 year'),
+                   COALESCE(type, 'Savings'), client_id
+            FROM {staging}
+            WHERE reject_reason IS NULL
+            ORDER BY line_no
+        """,
+    },
+    "transaction": {
+        "title": "Транзакции",
+        "columns": ["deposit_id", "amount", "date", "type"],
+        "extra": [],
+        "resolve": [],
+        "checks": [
+            ("Не заполнены обязательные поля", _required("deposit_id", "amount", "type")),
+            ("Неверный номер вклада", f"s.deposit_id !~ '{INTEGER_RE}'"),
+            (
+                "Вклад не найден",
+                f"CASE WHEN s.deposit_id ~ '{INTEGER_RE}' "
+                "THEN NOT EXISTS (SELECT 1 FROM Deposit d WHERE d.id = s.deposit_id::int) "
+                "ELSE TRUE END",
+            ),
+            (
+                "Неверная сумма (должна быть больше 0)",
+                f"CASE WHEN {_valid('amount', NUMBER_RE, 'numeric(15,2)')} "
+                "THEN s.amount::numeric <= 0 ELSE TRUE END",
+            ),
+            ("Неверная дата", "NOT " + _valid("date", DATE_RE, "timestamp")),
+            (
+                "Неверный тип операции",
+                "s.type NOT IN ('addition', 'opening', 'closing', 'early closing')",
+            ),
+        ],
+        "merge": """
+            INSERT INTO Transaction (deposit_id, amount, date, type)
+            SELECT deposit_id::int, amount::numeric,
+                   COALESCE(date::timestamp, CURRENT_TIMESTAMP), type
+            FROM {staging}
+            WHERE reject_reason IS NULL
+            ORDER BY line_no
+        """,
+    },
+}
+
+
+class BulkImporter:
+    """Массовая загрузка CSV через COPY FROM STDIN.
+
+    Файл копируется в UNLOGGED staging-таблицу, проверяется набором
+    SQL-запросов над всей таблицей сразу, прошедшие проверку строки
+    переносятся в рабочую таблицу, отклоненные — в CSV-отчет. Значения
+    проверяются приведением к типам рабочей таблицы, поэтому приведения
+    при переносе не могут прервать загрузку всего файла.
+    Все выполняется в одной транзакции.
+    """
+
+    def __init__(self, db=None, delimiter=";"):
+        self.db = db or Database()
+        self.delimiter = delimiter
+
+    def read_header(self, path, spec):
+        """Читает заголовок файла и сверяет его со столбцами сущности"""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f, delimiter=self.delimiter), [])
+        header = [col.strip().lower() for col in header]
+        missing = [col for col in spec["columns"] if col not in header]
+        unknown = [col for col in header if col not in spec["columns"]]
+        if missing or unknown:
+            raise ValueError(
+                "Заголовок файла не соответствует формату импорта.\n"
+                f"Ожидаются столбцы: {', '.join(spec['columns'])}\n"
+                f"Отсутствуют: {', '.join(missing) or '-'}; лишние: {', '.join(unknown) or '-'}"
+            )
+        return header
+
+    def import_file(self, entity, path, rejects_path=None):
+        """Импортирует CSV-файл; возвращает словарь с итогами загрузки"""
+        spec = IMPORT_SPECS[entity]
+        header = self.read_header(path, spec)
+
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                staging = f"import_{entity}_{conn.get_backend_pid()}"
+                column_defs = [f"{col} TEXT" for col in spec["columns"]] + spec["extra"]
+                cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+                cursor.execute(
+                    f"""
+                    CREATE UNLOGGED TABLE {staging} (
+                        line_no BIGSERIAL PRIMARY KEY,
+                        {", ".join(column_defs)},
+                        reject_reason TEXT
+                    )
+                    """
+                )
+
+                # Загрузка файла как есть, все значения — text
+                with open(path, newline="", encoding="utf-8-sig") as f:
+                    cursor.copy_expert(
+                        f"COPY {staging} ({', '.join(header)}) FROM STDIN "
+                        f"WITH (FORMAT csv, HEADER true, DELIMITER '{self.delimiter}')",
+                        f,
+                    )
+                cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+                total = cursor.fetchone()[0]
+
+                is_valid = "pg_input_is_valid"
+                if conn.server_version < 160000:
+                    cursor.execute(CREATE_INPUT_IS_VALID)
+                    is_valid = "pg_temp.input_is_valid"
+
+                # Разрешение внешних ключей и проверки — по всей таблице сразу
+                for statement in spec["resolve"]:
+                    cursor.execute(statement.replace("{staging}", staging))
+                for reason, condition in spec["checks"]:
+                    condition = condition.replace("{staging}", staging).replace("{is_valid}", is_valid)
+                    cursor.execute(
+                        f"UPDATE {staging} s SET reject_reason = %s "
+                        f"WHERE s.reject_reason IS NULL AND ({condition})",
+                        (reason,),
+                    )
+
+                cursor.execute(spec["merge"].replace("{staging}", staging))
+                imported = cursor.rowcount
+                rejected = total - imported
+
+                if rejected and rejects_path:
+                    with open(rejects_path, "w", newline="", encoding="utf-8-sig") as f:
+                        cursor.copy_expert(
+                            f"COPY (SELECT line_no + 1 AS line_no, reject_reason, "
+                            f"{', '.join(spec['columns'])} FROM {staging} "
+                            f"WHERE reject_reason IS NOT NULL ORDER BY line_no) "
+                            f"TO STDOUT WITH (FORMAT csv, HEADER true, DELIMITER '{self.delimiter}')",
+                            f,
+                        )
+
+                cursor.execute(f"DROP TABLE {staging}")
+            conn.commit()
+
+        return {
+            "total": total,
+            "imported": imported,
+            "rejected": rejected,
+            "rejects_path": rejects_path if rejected else None,
+        }
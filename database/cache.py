@@ -0,0 +1,159 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_READ_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.I)
+_WRITE_RE = re.compile(
+    r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|"
+    r"ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?|COPY)\s+(?:ONLY\s+)?([A-Za-z_][\w.]*)",
+    re.I,
+)
+
+
+def _normalize(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    return _COMMENT_RE.sub(" ", sql)
+
+
+def _table_names(names):
+    # public.stocks и stocks — одна и та же таблица
+    return frozenset(name.lower().rsplit(".", 1)[-1] for name in names)
+
+
+@lru_cache(maxsize=1024)
+def tables_read(sql):
+    """Таблицы, из которых читает запрос (по FROM/JOIN)"""
+    return _table_names(_READ_RE.findall(_normalize(sql)))
+
+
+@lru_cache(maxsize=1024)
+def tables_written(sql):
+    """Таблицы, которые изменяет оператор (INSERT/UPDATE/DELETE/TRUNCATE/COPY ...)"""
+    return _table_names(_WRITE_RE.findall(_normalize(sql)))
+
+
+def _estimate_size(value):
+    """Приблизительный размер результата в байтах"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+
+class ResultCache:
+    """LRU-кэш результатов запросов с ограничением по памяти.
+
+    Ключ — (SQL, параметры). Каждая запись помечена таблицами, из которых
+    читает запрос; фиксация транзакции, изменившей таблицу, удаляет все
+    записи с этой таблицей. Версии таблиц не дают сохранить результат,
+    прочитанный до такой фиксации.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_age=600):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (rows, tables, size, created)
+        self._by_table = {}
+        self._versions = {}
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def make_key(sql, params):
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(params)
+        return sql, params
+
+    def snapshot(self, tables):
+        """Версии таблиц на момент начала чтения (для store)"""
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in sorted(tables))
+
+    def get(self, key):
+        """Возвращает закэшированные строки или None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if self.max_age and time.monotonic() - entry[3] > self.max_age:
+                self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return list(entry[0])
+
+    def store(self, key, rows, tables, snapshot):
+        """Сохраняет результат, если таблицы не менялись с момента snapshot"""
+        rows = tuple(rows)
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            current = tuple(self._versions.get(table, 0) for table in sorted(tables))
+            if current != snapshot:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, tables, size, time.monotonic())
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate_tables(self, tables):
+        """Удаляет записи, читающие любую из таблиц"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+            return stats
+
+    def _remove(self, key):
+        rows, tables, size, created = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+
+# Общий для процесса кэш (как и пул соединений)
+result_cache = ResultCache()
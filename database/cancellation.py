@@ -0,0 +1,101 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extensions import QueryCanceledError
+
+
+_local = threading.local()
+
+# Соединение -> заданный на сессию statement_timeout, мс (нет записи — по умолчанию)
+_session_timeouts = weakref.WeakKeyDictionary()
+_timeouts_lock = threading.Lock()
+
+
+class CancelScope:
+    """Запросы одной операции (например, загрузки списка по фильтру),
+    которые можно отменить из другого потока.
+
+    Соединения, взятые из пула внутри cancel_scope(scope), регистрируются
+    в нем на время работы. cancel() отправляет серверу запрос отмены
+    выполняющегося оператора (connection.cancel()), а запросы, начатые
+    после отмены, сразу завершаются QueryCanceledError. Запрос отмены
+    отправляется под той же блокировкой, что и detach(), поэтому
+    соединение, уже возвращенное в пул, не отменяется.
+    statement_timeout — предел времени каждого оператора на сервере, мс.
+    """
+
+    def __init__(self, statement_timeout=None):
+        self.statement_timeout = statement_timeout
+        self.cancelled = False
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            for conn in self._connections:
+                try:
+                    conn.cancel()
+                except psycopg2.Error as e:
+                    print(f"Cancel error: {e}")
+
+    def attach(self, conn):
+        """Регистрирует соединение и задает ему statement_timeout"""
+        with self._lock:
+            if self.cancelled:
+                raise QueryCanceledError("canceling statement due to user request")
+            self._connections.add(conn)
+        set_statement_timeout(conn, self.statement_timeout)
+
+    def detach(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+
+
+@contextmanager
+def cancel_scope(scope):
+    """Запросы текущего потока выполняются в scope (None — без отмены)"""
+    previous = getattr(_local, "scope", None)
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = previous
+
+
+def current_scope():
+    return getattr(_local, "scope", None)
+
+
+def set_statement_timeout(conn, milliseconds):
+    """Задает statement_timeout сессии соединения (None — по умолчанию).
+
+    Соединение должно быть вне транзакции (только что из пула). Значение
+    запоминается: оператор отправляется серверу, только если оно
+    отличается от заданного этому соединению раньше.
+    """
+    milliseconds = int(milliseconds) if milliseconds else None
+    with _timeouts_lock:
+        if _session_timeouts.get(conn) == milliseconds:
+            return
+    # Вне транзакции: настройка сессии не откатывается вместе с транзакцией.
+    # Простой курсор: служебный оператор не попадает в статистику запросов
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor(cursor_factory=extensions.cursor) as cursor:
+            if milliseconds is None:
+                cursor.execute("SET statement_timeout TO DEFAULT")
+            else:
+                cursor.execute("SELECT set_config('statement_timeout', %s, false)",
+                               (f"{milliseconds}ms",))
+    finally:
+        conn.autocommit = autocommit
+    with _timeouts_lock:
+        if milliseconds is None:
+            _session_timeouts.pop(conn, None)
+        else:
+            _session_timeouts[conn] = milliseconds
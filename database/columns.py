@@ -0,0 +1,232 @@
+import io
+
+import numpy as np
+from psycopg2 import extensions
+
+
+# Заголовок binary COPY: сигнатура, флаги, длина расширения заголовка
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_HEADER_SIZE = len(_COPY_SIGNATURE) + 8
+
+# Даты и время в PostgreSQL отсчитываются от 2000-01-01
+_PG_EPOCH_DAYS = np.datetime64("2000-01-01", "D")
+_PG_EPOCH_US = np.datetime64("2000-01-01", "us")
+_INT32_MIN = np.iinfo(np.int32).min
+_INT64_MIN = np.iinfo(np.int64).min
+
+# OID типа столбца -> вид столбца по умолчанию
+_KINDS_BY_OID = {
+    16: "bool",
+    20: "int", 21: "int", 23: "int",
+    700: "float", 701: "float", 1700: "float",
+    1082: "date",
+    1114: "timestamp", 1184: "timestamp",
+}
+
+# Вид -> (выражение для столбца {c} (словарь категорий — {k}), тип SQL, тип numpy
+# в потоке COPY). Все значения фиксированной длины, поэтому строки данных
+# разбираются np.frombuffer без создания объектов Python на каждую строку.
+# NULL: float — NaN, date/timestamp — NaT, category — код -1;
+# в int, cents и bool NULL недопустим.
+_CONVERSIONS = {
+    "bool": ("{c}::bool", "bool", ">?"),
+    "int": ("{c}::int8", "int8", ">i8"),
+    "float": ("COALESCE({c}::float8, 'NaN')", "float8", ">f8"),
+    "cents": ("round({c} * 100)::int8", "int8", ">i8"),
+    "date": ("COALESCE({c}::date, '-infinity')", "date", ">i4"),
+    "timestamp": ("COALESCE({c}::timestamp, '-infinity')", "timestamp", ">i8"),
+    "category": ("COALESCE(((SELECT d FROM {k}) ->> {c}::text)::int4, -1)", "int4", ">i4"),
+}
+
+
+class CategoricalColumn:
+    """Столбец со словарным кодированием: codes — номера значений
+    в categories (int32, -1 — NULL), categories — значения по возрастанию"""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def values(self):
+        """Массив значений (object), None для NULL"""
+        result = np.empty(len(self.codes), dtype=object)
+        present = self.codes >= 0
+        result[present] = self.categories[self.codes[present]]
+        return result
+
+    def __repr__(self):
+        return f"<CategoricalColumn {len(self.codes)} rows, {len(self.categories)} categories>"
+
+
+def fetch_columns(conn, query, params=None, kinds=None):
+    """Результат запроса по столбцам: {имя столбца: массив NumPy}.
+
+    Виды столбцов определяются по типам результата: целые — int64,
+    float/numeric — float64, date — datetime64[D], timestamp —
+    datetime64[us], bool — bool, остальные — CategoricalColumn.
+    kinds переопределяет вид по имени столбца, например {"price": "cents"}
+    (деньги как int64 в копейках) или {"ticket": "category"}.
+
+    Данные читаются одним binary COPY, запрос выполняется один раз.
+    Для категориальных столбцов результат материализуется (WITH ...
+    MATERIALIZED): по нему строятся словари, которые идут в начале
+    потока отдельными строками, а коды значений находятся поиском
+    в словаре (jsonb) в каждой строке — без соединений, поэтому строки
+    данных идут в порядке запроса.
+    """
+    kinds = kinds or {}
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION READ ONLY")
+        encoding = extensions.encodings.get(conn.encoding, "utf-8")
+        source = cursor.mogrify(query, params).decode(encoding).strip().rstrip(";")
+
+        # Имена и типы столбцов: LIMIT 0 завершается, не читая ни одной строки запроса
+        cursor.execute(f"SELECT * FROM ({source}) q LIMIT 0")
+        names = [column.name for column in cursor.description]
+        column_kinds = [
+            kinds.get(name, _KINDS_BY_OID.get(column.type_code, "category"))
+            for name, column in zip(names, cursor.description)
+        ]
+        unknown = set(column_kinds) - set(_CONVERSIONS)
+        if unknown:
+            raise ValueError(f"Неизвестные виды столбцов: {', '.join(sorted(unknown))}")
+        aliases = [f"c{index}" for index in range(len(names))]
+        expressions = [
+            _CONVERSIONS[kind][0].format(c=f"q.{alias}", k=f"k{index}")
+            for index, (alias, kind) in enumerate(zip(aliases, column_kinds))
+        ]
+        categorical = [index for index, kind in enumerate(column_kinds) if kind == "category"]
+        if categorical:
+            select_sql = _categorical_select(source, aliases, column_kinds, categorical, expressions)
+        else:
+            select_sql = f"SELECT {', '.join(expressions)} FROM ({source}) q({', '.join(aliases)})"
+
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({select_sql}) TO STDOUT (FORMAT binary)", buffer)
+    conn.rollback()
+
+    data = buffer.getbuffer()
+    types = [_CONVERSIONS[kind][2] for kind in column_kinds]
+    categories = {index: [] for index in categorical}
+    if categorical:
+        offset = _parse_dictionaries(data, len(names), categories, encoding)
+        raw = _parse_binary_copy(data, types, offset, dictionary_column=True)
+    else:
+        raw = _parse_binary_copy(data, types)
+    result = {}
+    for index, (name, kind) in enumerate(zip(names, column_kinds)):
+        values = raw[f"v{index}"]
+        if kind == "category":
+            column = CategoricalColumn(
+                values.astype(np.int32), np.array(categories[index], dtype=object)
+            )
+        elif kind == "date":
+            days = values.astype(np.int64)
+            column = _PG_EPOCH_DAYS + days.astype("timedelta64[D]")
+            column[days == _INT32_MIN] = np.datetime64("NaT")
+        elif kind == "timestamp":
+            microseconds = values.astype(np.int64)
+            missing = microseconds == _INT64_MIN
+            microseconds[missing] = 0
+            column = _PG_EPOCH_US + microseconds.astype("timedelta64[us]")
+            column[missing] = np.datetime64("NaT")
+        else:
+            column = values.astype(values.dtype.newbyteorder("="))
+        result[name] = column
+    return result
+
+
+def _categorical_select(source, aliases, column_kinds, categorical, expressions):
+    """Запрос COPY для результата с категориальными столбцами.
+
+    Первый столбец — значение словаря: сначала строки словарей (значение
+    и его код в столбце категории, остальные столбцы NULL), затем строки
+    данных (значение словаря NULL). Код — номер значения по возрастанию.
+    """
+    ctes = [f"q({', '.join(aliases)}) AS MATERIALIZED ({source})"]
+    dictionaries = []
+    for index in categorical:
+        alias = aliases[index]
+        ctes.append(
+            f"v{index} AS (SELECT v, (row_number() OVER (ORDER BY v) - 1)::int4 AS n "
+            f"FROM (SELECT DISTINCT {alias}::text AS v FROM q WHERE {alias} IS NOT NULL) d)"
+        )
+        ctes.append(f"k{index} AS (SELECT jsonb_object_agg(v, n) AS d FROM v{index})")
+        columns = [
+            "n" if column == index else f"NULL::{_CONVERSIONS[kind][1]}"
+            for column, kind in enumerate(column_kinds)
+        ]
+        dictionaries.append(f"SELECT v, {', '.join(columns)} FROM v{index}")
+    return (
+        f"WITH {', '.join(ctes)} "
+        + " UNION ALL ".join(dictionaries)
+        + f" UNION ALL SELECT NULL::text, {', '.join(expressions)} FROM q"
+    )
+
+
+def _parse_dictionaries(data, count, categories, encoding):
+    """Строки словарей в начале потока (_categorical_select) -> categories
+    {номер столбца: значения}; возвращает смещение первой строки данных"""
+    offset = _data_offset(data)
+    codes = {index: {} for index in categories}
+    while True:
+        fields = int.from_bytes(data[offset:offset + 2], "big", signed=True)
+        if fields == -1:
+            break
+        length = int.from_bytes(data[offset + 2:offset + 6], "big", signed=True)
+        if length == -1:
+            break
+        position = offset + 6
+        value = bytes(data[position:position + length]).decode(encoding)
+        position += length
+        for index in range(count):
+            length = int.from_bytes(data[position:position + 4], "big", signed=True)
+            position += 4
+            if length != -1:
+                code = int.from_bytes(data[position:position + length], "big", signed=True)
+                codes[index][code] = value
+                position += length
+        offset = position
+    for index, values in codes.items():
+        categories[index] = [values[code] for code in range(len(values))]
+    return offset
+
+
+def _data_offset(data):
+    """Смещение первой строки binary COPY после заголовка"""
+    if bytes(data[:len(_COPY_SIGNATURE)]) != _COPY_SIGNATURE:
+        raise ValueError("Неверный формат binary COPY")
+    extension_length = int(np.frombuffer(data, ">i4", 1, len(_COPY_SIGNATURE) + 4)[0])
+    return _HEADER_SIZE + extension_length
+
+
+def _parse_binary_copy(data, types, offset=None, dictionary_column=False):
+    """Строки binary COPY со значениями фиксированной длины -> структурный массив.
+
+    offset — смещение первой строки, если она идет не сразу после заголовка;
+    dictionary_column — перед столбцами данных идет значение словаря, NULL
+    в каждой строке (_categorical_select).
+    """
+    if offset is None:
+        offset = _data_offset(data)
+
+    # Строка: int16 число полей, затем для каждого поля int32 длина и значение
+    fields = [("count", ">i2")]
+    if dictionary_column:
+        fields.append(("dictionary", ">i4"))
+    for index, type_ in enumerate(types):
+        fields += [(f"l{index}", ">i4"), (f"v{index}", type_)]
+    dtype = np.dtype(fields)
+    body = len(data) - offset - 2  # в конце — int16 -1
+    if body % dtype.itemsize:
+        raise ValueError("NULL в столбце int, cents или bool: приведите его к float")
+    rows = np.frombuffer(data, dtype, body // dtype.itemsize, offset)
+    if dictionary_column and (rows["dictionary"] != -1).any():
+        raise ValueError("Строка словаря среди строк данных binary COPY")
+    for index, type_ in enumerate(types):
+        if (rows[f"l{index}"] != np.dtype(type_).itemsize).any():
+            raise ValueError("NULL в столбце int, cents или bool: приведите его к float")
+    return rows
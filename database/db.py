@@ -1,9 +1,69 @@
+import itertools
+import os
+import re
+import time
+
 import psycopg2
 from psycopg2 import OperationalError
+from psycopg2.extensions import QueryCanceledError, TransactionRollbackError
+from psycopg2.extras import execute_batch, execute_values
 from contextlib import contextmanager
 
+from .cache import result_cache, tables_read
+from .cancellation import current_scope, set_statement_timeout
+from .columns import fetch_columns
+from .instrumentation import metrics
+from .pool import PoolTimeoutError, get_pool
+from .prepared import PreparingConnection, registry as prepared_registry
+from .records import RecordCursor
+from .routing import ReplicaUnavailableError, is_read_only, router
+from .unit_of_work import UnitOfWork
+
+
+_cursor_counter = itertools.count(1)
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _check_identifier(name):
+    """Проверяет имя таблицы/столбца перед подстановкой в текст запроса"""
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Недопустимый идентификатор: {name!r}")
+    return name
+
 
 class Database:
+    # Размер пачки строк, запрашиваемой с сервера за один FETCH
+    default_itersize = 2000
+
+    # Число наборов параметров, отправляемых за один round trip
+    default_page_size = 1000
+
+    # Настройки общего пула соединений (один пул на процесс)
+    pool_settings = {
+        "minconn": 1,
+        "maxconn": 10,
+        "idle_timeout": 300,
+        "keepalive_interval": 60,
+        "checkout_timeout": 30,
+        # Запросы из Queries выполняются через PREPARE/EXECUTE
+        "connection_factory": PreparingConnection,
+    }
+
+    # Реплики только для чтения: параметры, дополняющие conn_params,
+    # например [{"port": "5433"}]. Переменная окружения BANK_DB_REPLICAS
+    # ("host:port,host:port") переопределяет список.
+    replicas = []
+
+    # max_lag — допустимая задержка реплики, с; sticky_seconds — сколько
+    # после фиксации изменений читать с основного сервера
+    replica_settings = {
+        "max_lag": 5.0,
+        "check_interval": 2.0,
+        "retry_interval": 30.0,
+        "sticky_seconds": 5.0,
+    }
+
     def __init__(self):
         self.conn_params = {
             "dbname": "bank",
@@ -12,32 +72,168 @@ class Database:
             "host": "localhost",
             "port": "5432",
         }
+        self.pool = get_pool(self.conn_params, **self.pool_settings)
+        self.router = router
+        self.router.configure(
+            [get_pool({**self.conn_params, **replica}, **self.pool_settings)
+             for replica in self.replica_params()],
+            **self.replica_settings,
+        )
+        # Соединения для EXPLAIN медленных запросов берутся из того же пула
+        metrics.set_connection_source(self.get_connection)
+
+    def replica_params(self):
+        """Параметры подключения к репликам (дополняют conn_params)"""
+        addresses = os.environ.get("BANK_DB_REPLICAS")
+        if addresses is None:
+            return list(self.replicas)
+        params = []
+        for address in filter(None, (part.strip() for part in addresses.split(","))):
+            host, _, port = address.rpartition(":")
+            params.append({"host": host or address, "port": port} if host else {"host": address})
+        return params
 
     def test_connection(self):
         """Проверяет соединение с базой данных"""
+        self.pool.warm_up()
         with self.get_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute("SELECT 1")
                 return True
 
+    def pool_stats(self):
+        """Возвращает статистику пула соединений"""
+        return self.pool.stats()
+
+    def prepared_stats(self):
+        """Возвращает счетчики подготовленных операторов каталога Queries"""
+        return prepared_registry.stats()
+
+    def cache_stats(self):
+        """Возвращает счетчики кэша результатов запросов"""
+        return result_cache.stats()
+
+    def query_stats(self):
+        """Возвращает сводку времени выполнения по операторам"""
+        return metrics.stats()
+
+    def slow_queries(self):
+        """Возвращает последние медленные запросы с планами выполнения"""
+        return metrics.slow_queries()
+
+    def slow_query_threshold(self):
+        """Порог медленного запроса, мс"""
+        return metrics.slow_query_ms
+
+    def set_slow_query_threshold(self, milliseconds):
+        """Задает порог медленного запроса, мс"""
+        metrics.slow_query_ms = milliseconds
+
+    def slow_query_log_path(self):
+        return metrics.log_path
+
+    def reset_query_stats(self):
+        metrics.reset()
+
+    def replica_stats(self):
+        """Возвращает счетчики маршрутизации чтений и состояние реплик"""
+        return self.router.stats()
+
+    def use_primary(self):
+        """Контекстный менеджер: чтения текущего потока идут на основной сервер
+        (например, когда сразу после записи нужно прочитать результат)"""
+        return self.router.pinned()
+
+    def _checkout(self, readonly):
+        """Соединение реплики (для readonly) или основного сервера и его пул"""
+        if readonly:
+            pool = self.router.read_pool()
+            if pool is not None:
+                try:
+                    return pool, pool.getconn()
+                except PoolTimeoutError:
+                    # Пул реплики занят, но она исправна: не исключаем ее
+                    pass
+                except OperationalError as e:
+                    self.router.report_failure(pool, e)
+        return self.pool, self.pool.getconn()
+
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, readonly=False):
+        """Соединение из пула. readonly=True — только для чтения:
+        может быть выдано соединение с репликой. Внутри cancel_scope
+        запросы соединения можно отменить (см. database.cancellation)"""
+        pool = self.pool
         conn = None
+        scope = current_scope()
+        attached = False
         try:
-            conn = psycopg2.connect(**self.conn_params)
+            started = time.perf_counter()
+            pool, conn = self._checkout(readonly)
+            if hasattr(conn, "checkout_wait"):
+                conn.checkout_wait = time.perf_counter() - started
+            if scope is not None:
+                scope.attach(conn)
+                attached = True
+            else:
+                # Соединение могло остаться с пределом времени другой операции
+                set_statement_timeout(conn, None)
             yield conn
-        except OperationalError as e:
-            print(f"Connection error: {e}")
+        except QueryCanceledError:
+            # Отмена или statement_timeout — соединение и реплика исправны
+            raise
+        except (OperationalError, TransactionRollbackError) as e:
+            if pool is not self.pool:
+                # Обрыв связи или отмена запроса из-за конфликта с восстановлением
+                self.router.report_failure(pool, e)
+                raise ReplicaUnavailableError(str(e)) from e
+            if isinstance(e, OperationalError):
+                print(f"Connection error: {e}")
             raise
         finally:
+            if attached:
+                scope.detach(conn)
             if conn:
-                conn.close()
+                pool.putconn(conn)
+
+    @contextmanager
+    def unit_of_work(self):
+        """Транзакция из нескольких операторов на одном соединении.
+
+        Операторы копятся в очереди и уходят на сервер одним запросом;
+        при выходе из блока без исключения транзакция фиксируется, иначе
+        откатывается.
+        """
+        with self.get_connection() as conn:
+            uow = UnitOfWork(conn)
+            try:
+                yield uow
+            except Exception:
+                uow.rollback()
+                raise
+            uow.commit()
 
     def execute_query(
-        self, query, params=None, fetch_one=False, fetch_all=False, commit=False
+        self, query, params=None, fetch_one=False, fetch_all=False, commit=False,
+        cache=False,
     ):
-        """Универсальный метод для выполнения запросов"""
-        with self.get_connection() as conn:
+        """Универсальный метод для выполнения запросов.
+
+        cache=True — результат чтения берется из кэша, пока таблицы, из которых
+        читает запрос, не будут изменены зафиксированной транзакцией.
+        Чтения без фиксации выполняются на реплике, если она настроена.
+        """
+        if cache and not commit and (fetch_one or fetch_all):
+            return self._cached_query(query, params, fetch_one)
+        if not commit and is_read_only(query):
+            try:
+                return self._execute(query, params, fetch_one, fetch_all, commit, True)
+            except ReplicaUnavailableError:
+                pass
+        return self._execute(query, params, fetch_one, fetch_all, commit, False)
+
+    def _execute(self, query, params, fetch_one, fetch_all, commit, readonly):
+        with self.get_connection(readonly) as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, params)
                 if commit:
@@ -51,3 +247,152 @@ class Database:
                     return cursor.fetchall()
                 else:
                     return None
+
+    def _cached_query(self, query, params, fetch_one):
+        key = result_cache.make_key(query, params)
+        rows = result_cache.get(key)
+        if rows is None:
+            tables = tables_read(query)
+            snapshot = result_cache.snapshot(tables)
+            try:
+                rows = self._fetch_all(query, params, is_read_only(query))
+            except ReplicaUnavailableError:
+                rows = self._fetch_all(query, params, False)
+            result_cache.store(key, rows, tables, snapshot)
+        if fetch_one:
+            return rows[0] if rows else None
+        return rows
+
+    def estimate_count(self, query, params=None):
+        """Оценка числа строк результата по статистике планировщика.
+
+        Запрос не выполняется (EXPLAIN без ANALYZE), поэтому оценка
+        получается за время планирования на таблице любого размера.
+        """
+        plan = self.execute_query(
+            "EXPLAIN (FORMAT JSON) " + query, params, fetch_one=True
+        )[0]
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def fetch_records(self, query, params=None):
+        """Все строки результата как Record (см. database.records): компактные
+        строки с доступом по индексу и по имени столбца, повторяющиеся
+        значения текстовых столбцов DICTIONARY_COLUMNS хранятся один раз"""
+        if is_read_only(query):
+            try:
+                return self._fetch_all(query, params, True, RecordCursor)
+            except ReplicaUnavailableError:
+                pass
+        return self._fetch_all(query, params, False, RecordCursor)
+
+    def fetch_columns(self, query, params=None, kinds=None):
+        """Результат по столбцам в массивах NumPy (см. database.columns):
+        данные идут одним binary COPY без объектов Python на каждую строку"""
+        try:
+            with self.get_connection(True) as conn:
+                return fetch_columns(conn, query, params, kinds)
+        except ReplicaUnavailableError:
+            with self.get_connection(False) as conn:
+                return fetch_columns(conn, query, params, kinds)
+
+    def _fetch_all(self, query, params, readonly, cursor_factory=None):
+        with self.get_connection(readonly) as conn:
+            with conn.cursor(cursor_factory=cursor_factory) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+    def stream_query(self, query, params=None):
+        """Генератор: выполняет запрос через серверный (именованный) курсор
+        и отдает строки пачками по default_itersize, не загружая весь
+        результат в память (окна-таблицы: QueryExecutor.submit_batches).
+        """
+        readonly = is_read_only(query)
+        started = False
+        try:
+            for rows in self._stream(query, params, readonly):
+                started = True
+                yield rows
+        except ReplicaUnavailableError:
+            # Уже отданные строки не повторяем: переключаемся, только если их не было
+            if started:
+                raise
+            yield from self._stream(query, params, False)
+
+    def _stream(self, query, params, readonly):
+        itersize = self.default_itersize
+        cursor_name = f"stream_{os.getpid()}_{next(_cursor_counter)}"
+        with self.get_connection(readonly) as conn:
+            cursor = conn.cursor(name=cursor_name)
+            cursor.itersize = itersize
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(itersize)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                if not conn.closed:
+                    try:
+                        cursor.close()
+                    except psycopg2.Error:
+                        pass
+                    # Серверный курсор живет внутри транзакции — завершаем ее
+                    conn.rollback()
+
+    def execute_many(self, query, params_list, page_size=None):
+        """Выполняет запрос для множества наборов параметров.
+
+        Наборы отправляются страницами по page_size операторов за один
+        round trip (execute_batch), фиксация одна на весь вызов.
+        Возвращает число обработанных наборов.
+        """
+        params_list = list(params_list)
+        if not params_list:
+            return 0
+        with self.get_connection() as conn:
+            # В тексте EXECUTE имени таблицы нет — отмечаем изменения по исходному запросу
+            conn.note_writes(query)
+            with conn.cursor() as cursor:
+                # Запросы каталога Queries выполняются пачкой EXECUTE
+                statement = prepared_registry.batch_statement(
+                    cursor, query, len(params_list)
+                )
+                execute_batch(
+                    cursor, statement or query, params_list,
+                    page_size=page_size or self.default_page_size,
+                )
+            conn.commit()
+        return len(params_list)
+
+    def insert_rows(
+        self, table, columns, rows, returning=None, template=None, page_size=None
+    ):
+        """Вставляет строки многострочными INSERT ... VALUES (execute_values).
+
+        template задает шаблон одной строки, например
+        "(%s, %s, (%s || ' days')::interval)". Если указан столбец
+        returning, возвращает список его значений для вставленных строк,
+        иначе — число вставленных строк. Фиксация одна на весь вызов.
+        """
+        rows = list(rows)
+        if not rows:
+            return [] if returning else 0
+        query = "INSERT INTO {} ({}) VALUES %s".format(
+            _check_identifier(table),
+            ", ".join(_check_identifier(col) for col in columns),
+        )
+        if returning:
+            query += f" RETURNING {_check_identifier(returning)}"
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                result = execute_values(
+                    cursor, query, rows,
+                    template=template,
+                    page_size=page_size or self.default_page_size,
+                    fetch=bool(returning),
+                )
+            conn.commit()
+        if returning:
+            return [row[0] for row in result]
+        return len(rows)
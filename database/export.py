@@ -0,0 +1,63 @@
+import csv
+import gzip
+import io
+
+from psycopg2 import extensions
+
+from .db import Database
+from .routing import ReplicaUnavailableError
+
+
+class CsvExporter:
+    """Потоковая выгрузка результата запроса в CSV через COPY ... TO STDOUT.
+
+    Строки идут с сервера прямо в файл (при необходимости через gzip),
+    не накапливаясь в памяти клиента.
+    """
+
+    def __init__(self, db=None, delimiter=";"):
+        self.db = db or Database()
+        self.delimiter = delimiter
+
+    def _header_line(self, headers):
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=self.delimiter, lineterminator="\n").writerow(headers)
+        return buffer.getvalue()
+
+    def export_query(self, query, params, path, headers=None, compress=None):
+        """Выгружает результат запроса в файл; возвращает число строк.
+
+        compress=None — сжимать gzip, если имя файла оканчивается на .gz.
+        """
+        if compress is None:
+            compress = path.lower().endswith(".gz")
+        try:
+            return self._export(query, params, path, headers, compress, True)
+        except ReplicaUnavailableError:
+            # Файл открывается заново — выгрузка с основного сервера перезапишет его
+            return self._export(query, params, path, headers, compress, False)
+
+    def _export(self, query, params, path, headers, compress, readonly):
+        with self.db.get_connection(readonly) as conn:
+            with conn.cursor() as cursor:
+                # COPY не принимает параметры — подставляем их на клиенте
+                encoding = extensions.encodings.get(conn.encoding, "utf-8")
+                select_sql = cursor.mogrify(query, params).decode(encoding)
+                select_sql = select_sql.strip().rstrip(";")
+
+                opener = gzip.open if compress else open
+                with opener(path, "wb") as f:
+                    # BOM, как и в остальных выгрузках, — для корректного открытия
+                    # в Excel; в сжатый файл не пишется: после распаковки он мешал
+                    # бы обработке другими программами
+                    if not compress:
+                        f.write("\ufeff".encode("utf-8"))
+                    if headers:
+                        f.write(self._header_line(headers).encode("utf-8"))
+                    cursor.copy_expert(
+                        f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, "
+                        f"DELIMITER '{self.delimiter}', HEADER {'false' if headers else 'true'}, "
+                        f"ENCODING 'UTF8')",
+                        f,
+                    )
+                return cursor.rowcount
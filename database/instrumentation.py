@@ -0,0 +1,280 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import psycopg2
+
+from .queries import Queries
+from .routing import is_read_only
+from .query_builder import shape_name
+
+
+# Верхние границы интервалов гистограммы времени выполнения, мс
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+SLOW_QUERY_LOG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "slow_queries.log"
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Имена констант каталога Queries по тексту запроса
+_QUERY_NAMES = {
+    value: name
+    for name, value in vars(Queries).items()
+    if name.isupper() and isinstance(value, str)
+}
+
+_local = threading.local()
+
+
+@contextmanager
+def query_tag(view):
+    """Помечает запросы текущего потока именем представления"""
+    previous = getattr(_local, "view", None)
+    _local.view = view
+    try:
+        yield
+    finally:
+        _local.view = previous
+
+
+def current_query_tag():
+    """Имя представления из query_tag текущего потока (None — не задано)"""
+    return getattr(_local, "view", None)
+
+
+def _calling_view():
+    """Имя представления, выполняющего запрос.
+
+    Берется из query_tag, иначе — класс первого объекта self из пакета ui
+    в стеке вызовов.
+    """
+    view = getattr(_local, "view", None)
+    if view:
+        return view
+    frame = sys._getframe(2)
+    depth = 0
+    while frame is not None and depth < 20:
+        if frame.f_globals.get("__name__", "").startswith("ui."):
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return type(owner).__name__
+        frame = frame.f_back
+        depth += 1
+    return None
+
+
+def statement_name(sql):
+    """Имя константы Queries (формы FilteredQuery) или сокращенный текст запроса"""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    name = _QUERY_NAMES.get(sql) or shape_name(sql)
+    if name:
+        return name
+    text = _WHITESPACE_RE.sub(" ", sql).strip()
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+class _StatementStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.wait_time = 0.0
+        self.histogram = [0] * len(HISTOGRAM_BOUNDS_MS)
+        self.views = {}
+
+    def percentile_ms(self, fraction):
+        """Оценка перцентиля по гистограмме (верхняя граница интервала)"""
+        target = self.count * fraction
+        seen = 0
+        for bound, hits in zip(HISTOGRAM_BOUNDS_MS, self.histogram):
+            seen += hits
+            if hits and seen >= target:
+                return bound if bound != float("inf") else self.max_time * 1000
+        return 0.0
+
+    def as_dict(self, name):
+        return {
+            "statement": name,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_time * 1000,
+            "avg_ms": self.total_time * 1000 / self.count if self.count else 0.0,
+            "p50_ms": self.percentile_ms(0.5),
+            "p95_ms": self.percentile_ms(0.95),
+            "max_ms": self.max_time * 1000,
+            "rows": self.rows,
+            "avg_rows": self.rows / self.count if self.count else 0.0,
+            "wait_ms": self.wait_time * 1000,
+            "histogram": list(zip(HISTOGRAM_BOUNDS_MS, self.histogram)),
+            "views": dict(self.views),
+        }
+
+
+class QueryMetrics:
+    """Счетчики выполнения запросов и журнал медленных запросов.
+
+    Для запросов дольше slow_query_ms в фоне снимается план
+    EXPLAIN (ANALYZE, BUFFERS) — в отдельной транзакции, которая затем
+    откатывается, — и пишется в ротируемый журнал. План одного и того же
+    оператора снимается не чаще раза в explain_interval секунд.
+    """
+
+    def __init__(self, slow_query_ms=500, log_path=SLOW_QUERY_LOG,
+                 explain_interval=300, recent_slow=100):
+        self.slow_query_ms = slow_query_ms
+        self.log_path = log_path
+        self.explain_interval = explain_interval
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._recent_slow = deque(maxlen=recent_slow)
+        self._last_explain = {}
+        self._connection_source = None
+        self._logger = None
+
+    def set_connection_source(self, source):
+        """Контекстный менеджер, выдающий соединение для EXPLAIN"""
+        self._connection_source = source
+
+    def record(self, sql, duration, rows, wait=0.0, error=False, mogrified=None):
+        if not self.enabled or getattr(_local, "explaining", False):
+            return
+        name = statement_name(sql)
+        view = _calling_view() or "-"
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _StatementStats()
+            stats.count += 1
+            stats.errors += int(error)
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            stats.rows += max(rows, 0)
+            stats.wait_time += wait
+            for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if duration * 1000 <= bound:
+                    stats.histogram[index] += 1
+                    break
+            stats.views[view] = stats.views.get(view, 0) + 1
+
+        if not error and duration * 1000 >= self.slow_query_ms and mogrified:
+            self._capture_slow(name, mogrified, duration, rows, view)
+
+    def _capture_slow(self, name, sql_text, duration, rows, view):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explain.get(name)
+            explain = (
+                self._connection_source is not None
+                and (last is None or now - last >= self.explain_interval)
+                and not sql_text.lstrip().upper().startswith(("EXPLAIN", "COPY"))
+            )
+            if explain:
+                self._last_explain[name] = now
+        entry = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "statement": name,
+            "duration_ms": duration * 1000,
+            "rows": rows,
+            "view": view,
+            "sql": sql_text,
+            "plan": None,
+        }
+        with self._lock:
+            self._recent_slow.append(entry)
+        if explain:
+            threading.Thread(
+                target=self._explain, args=(entry,), name="slow-query-explain", daemon=True
+            ).start()
+        else:
+            self._write_log(entry)
+
+    def _explain(self, entry):
+        _local.explaining = True
+        try:
+            with self._connection_source() as conn:
+                try:
+                    entry["plan"] = self._plan(conn, entry["sql"])
+                finally:
+                    conn.rollback()
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN не выполнен: {e}"
+        finally:
+            _local.explaining = False
+        self._write_log(entry)
+
+    def _plan(self, conn, sql):
+        """План оператора. ANALYZE выполняет оператор повторно, поэтому
+        применяется только к чтениям (routing.is_read_only) и в транзакции
+        READ ONLY: если чтение все же пишет (например, вызовом функции),
+        сервер прерывает его и план строится без ANALYZE"""
+        if is_read_only(sql):
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION READ ONLY")
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+                    return "\n".join(row[0] for row in cursor.fetchall())
+            except psycopg2.Error:
+                conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN " + sql)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def _write_log(self, entry):
+        try:
+            logger = self._get_logger()
+        except OSError as e:
+            print(f"Slow query log error: {e}")
+            return
+        message = (
+            f"{entry['statement']} | {entry['duration_ms']:.1f} ms | rows={entry['rows']} "
+            f"| view={entry['view']}\n{entry['sql']}"
+        )
+        if entry["plan"]:
+            message += f"\n{entry['plan']}"
+        logger.warning(message)
+
+    def _get_logger(self):
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            logger = logging.getLogger("database.slow_queries")
+            logger.propagate = False
+            handler = RotatingFileHandler(
+                self.log_path, maxBytes=1024 * 1024, backupCount=5, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s\n"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def stats(self):
+        """Сводка по операторам, от самых затратных по суммарному времени"""
+        with self._lock:
+            rows = [stats.as_dict(name) for name, stats in self._stats.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def slow_queries(self):
+        """Последние медленные запросы (с планом, если он уже снят)"""
+        with self._lock:
+            return list(reversed(self._recent_slow))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent_slow.clear()
+            self._last_explain.clear()
+
+
+# Общие для процесса счетчики
+metrics = QueryMetrics()
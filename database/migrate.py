@@ -0,0 +1,241 @@
+"""Версионные миграции схемы.
+
+Миграции — файлы database/migrations/NNNN_имя.sql, применяются по
+возрастанию номера; примененные версии и контрольные суммы хранятся
+в таблице schema_migrations.
+
+Директивы в начальных строках-комментариях файла:
+  -- migrate:no-transaction — выполняется вне транзакции (CREATE INDEX CONCURRENTLY);
+  -- migrate:optional — ошибка не останавливает следующие миграции: файл
+     пропускается (например, нет расширения на сервере) и повторяется
+     при следующем запуске.
+
+Запуск: python -m database.migrate [status|migrate [версия]]
+"""
+import hashlib
+import os
+import re
+import sys
+import time
+
+import psycopg2
+
+from .db import Database
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_NO_TRANSACTION = "-- migrate:no-transaction"
+_OPTIONAL = "-- migrate:optional"
+_STATEMENT_END_RE = re.compile(r";[ \t]*(?:--[^\n]*)?$", re.M)
+_CREATE_INDEX_RE = re.compile(
+    r"\bCREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.I,
+)
+
+# Ключ pg_advisory_lock: миграции не выполняются с двух рабочих мест одновременно
+_LOCK_KEY = 0x62616E6B  # "bank"
+
+CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        duration_ms NUMERIC(12, 1)
+    )
+"""
+GET_APPLIED = "SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version"
+ADD_APPLIED = """
+    INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+    VALUES (%s, %s, %s, %s)
+"""
+# Индексы из списка, построение которых (CONCURRENTLY) не завершилось
+GET_INVALID_INDEXES = """
+    SELECT c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE NOT i.indisvalid AND n.nspname = current_schema() AND c.relname = ANY(%s)
+"""
+
+
+class MigrationError(Exception):
+    """Миграцию нельзя применить (ошибка SQL, измененный файл, битый индекс)"""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        header = []
+        for line in self.sql.lstrip().splitlines():
+            if not line.startswith("--"):
+                break
+            header.append(line.strip())
+        self.transactional = _NO_TRANSACTION not in header
+        self.optional = _OPTIONAL in header
+
+    def statements(self):
+        """Операторы файла: разделитель — ";" в конце строки"""
+        parts = _STATEMENT_END_RE.split(self.sql)
+        result = []
+        for part in parts:
+            code = "\n".join(
+                line for line in part.splitlines() if not line.strip().startswith("--")
+            ).strip()
+            if code:
+                result.append(code)
+        return result
+
+    def index_names(self):
+        """Имена индексов, которые создает миграция"""
+        return [
+            match.group(1).lower()
+            for statement in self.statements()
+            for match in _CREATE_INDEX_RE.finditer(statement)
+        ]
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d}_{self.name}>"
+
+
+class MigrationRunner:
+    """Применяет недостающие миграции к базе"""
+
+    def __init__(self, db=None, directory=MIGRATIONS_DIR):
+        self.db = db or Database()
+        self.directory = directory
+
+    def available(self):
+        migrations = []
+        for filename in sorted(os.listdir(self.directory)):
+            match = _FILENAME_RE.match(filename)
+            if match:
+                migrations.append(Migration(
+                    int(match.group(1)), match.group(2),
+                    os.path.join(self.directory, filename),
+                ))
+        versions = [m.version for m in migrations]
+        if len(versions) != len(set(versions)):
+            raise MigrationError(f"Повторяющиеся номера миграций в {self.directory}")
+        return migrations
+
+    def _applied(self, cursor):
+        cursor.execute(CREATE_VERSION_TABLE)
+        cursor.execute(GET_APPLIED)
+        return {row[0]: row for row in cursor.fetchall()}
+
+    def status(self):
+        """[(миграция, дата применения или None)]"""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                applied = self._applied(cursor)
+            conn.commit()
+        return [
+            (migration, applied[migration.version][3] if migration.version in applied else None)
+            for migration in self.available()
+        ]
+
+    def migrate(self, target=None):
+        """Применяет миграции до версии target включительно; возвращает примененные"""
+        migrations = self.available()
+        done = []
+        with self.db.get_connection() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_lock(%s)", (_LOCK_KEY,))
+                    try:
+                        applied = self._applied(cursor)
+                        for migration in migrations:
+                            if target is not None and migration.version > target:
+                                break
+                            if migration.version in applied:
+                                if applied[migration.version][2] != migration.checksum:
+                                    raise MigrationError(
+                                        f"{migration!r} изменена после применения"
+                                    )
+                                continue
+                            try:
+                                self._apply(conn, cursor, migration)
+                            except MigrationError as e:
+                                if not migration.optional:
+                                    raise
+                                print(f"Skipping optional migration: {e}")
+                                continue
+                            done.append(migration)
+                    finally:
+                        cursor.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+            finally:
+                conn.autocommit = False
+        return done
+
+    def _apply(self, conn, cursor, migration):
+        print(f"Applying migration {migration.version:04d}_{migration.name}")
+        started = time.perf_counter()
+        try:
+            if migration.transactional:
+                conn.autocommit = False
+                cursor.execute(migration.sql)
+            else:
+                for statement in migration.statements():
+                    cursor.execute(statement)
+                self._check_indexes(cursor, migration)
+                conn.autocommit = False
+            cursor.execute(ADD_APPLIED, (
+                migration.version, migration.name, migration.checksum,
+                round((time.perf_counter() - started) * 1000, 1),
+            ))
+            conn.commit()
+        except psycopg2.Error as e:
+            if not conn.autocommit:
+                conn.rollback()
+            raise MigrationError(f"{migration!r}: {e}") from e
+        finally:
+            conn.autocommit = True
+
+    def _check_indexes(self, cursor, migration):
+        # CREATE INDEX CONCURRENTLY при ошибке оставляет индекс INVALID,
+        # а IF NOT EXISTS при повторном запуске его не перестроит. Чужие
+        # индексы (например, строящиеся сейчас другим сеансом) не проверяются
+        names = migration.index_names()
+        if not names:
+            return
+        cursor.execute(GET_INVALID_INDEXES, (names,))
+        invalid = [row[0] for row in cursor.fetchall()]
+        if invalid:
+            raise MigrationError(
+                f"{migration!r}: невалидные индексы {', '.join(invalid)} — "
+                f"удалите их (DROP INDEX) и повторите миграцию"
+            )
+
+
+def main(argv):
+    runner = MigrationRunner()
+    command = argv[0] if argv else "status"
+    if command == "migrate":
+        target = int(argv[1]) if len(argv) > 1 else None
+        applied = runner.migrate(target)
+        print(f"Applied: {len(applied)}")
+    elif command == "status":
+        for migration, applied_at in runner.status():
+            state = applied_at.strftime("%Y-%m-%d %H:%M:%S") if applied_at else "не применена"
+            print(f"{migration.version:04d}_{migration.name}: {state}")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except MigrationError as e:
+        print(f"Migration error: {e}")
+        sys.exit(1)
@@ -0,0 +1,38 @@
+-- migrate:no-transaction
+-- Индексы банковских таблиц: внешние ключи (JOIN и каскадное удаление)
+-- и сортировки списков из database/queries.py.
+-- CONCURRENTLY не блокирует запись в таблицы на время построения.
+
+-- Deposit: JOIN Client, вклады клиента, список вкладов (ORDER BY open_date DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS deposit_client_id_idx
+    ON Deposit (client_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS deposit_open_date_idx
+    ON Deposit (open_date DESC);
+-- Открытые вклады — малая доля таблицы: частичный индекс с суммой для index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS deposit_open_idx
+    ON Deposit (open_date DESC) INCLUDE (client_id, amount)
+    WHERE status = 'open';
+
+-- Transaction: операции вклада по дате, общий журнал операций
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transaction_deposit_date_idx
+    ON Transaction (deposit_id, date DESC) INCLUDE (amount, type);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transaction_date_idx
+    ON Transaction (date DESC);
+
+-- Report: JOIN Transaction / Employee, список отчетов (ORDER BY creation_date DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS report_transaction_id_idx
+    ON Report (transaction_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS report_employee_id_idx
+    ON Report (employee_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS report_creation_date_idx
+    ON Report (creation_date DESC);
+
+-- Document: документы клиента (ORDER BY agreement_date DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS document_client_date_idx
+    ON Document (client_id, agreement_date DESC);
+
+-- Списки клиентов и сотрудников (ORDER BY last_name, first_name)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_name_idx
+    ON Client (last_name, first_name) INCLUDE (phone);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_name_idx
+    ON Employee (last_name, first_name) INCLUDE (phone);
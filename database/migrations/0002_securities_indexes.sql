@@ -0,0 +1,39 @@
+-- migrate:no-transaction
+-- Индексы таблиц ценных бумаг: внешние ключи и сортировки списков
+-- из database/queries.py. Ключи legal_entities(entity_id), stocks(ticket),
+-- legal_entities(inn) уже проиндексированы ограничениями PRIMARY KEY/UNIQUE.
+
+-- Справочники юрлиц (ORDER BY entity_name) и выпадающие списки действующих
+CREATE INDEX CONCURRENTLY IF NOT EXISTS legal_entities_name_idx
+    ON legal_entities (entity_name) INCLUDE (inn);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS legal_entities_active_name_idx
+    ON legal_entities (entity_name) INCLUDE (entity_id)
+    WHERE status;
+
+-- Роли юрлиц: LEFT JOIN ... ON le.entity_id = x.entity_id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS investors_entity_id_idx
+    ON investors (entity_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS emitters_entity_id_idx
+    ON emitters (entity_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS registrats_entity_id_idx
+    ON registrats (entity_id);
+
+-- emissions: JOIN эмитента / регистратора, список (ORDER BY date_register DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS emissions_emitter_id_idx
+    ON emissions (emitter_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS emissions_registrat_date_idx
+    ON emissions (registrat_id, date_register DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS emissions_date_register_idx
+    ON emissions (date_register DESC) INCLUDE (value, status, emitter_id, registrat_id);
+
+-- stocks: JOIN выпуска
+CREATE INDEX CONCURRENTLY IF NOT EXISTS stocks_emission_id_idx
+    ON stocks (emission_id);
+
+-- sells: сделки инвестора, JOIN акции, список сделок (ORDER BY sale_date DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sells_investor_date_idx
+    ON sells (investor_id, sale_date DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sells_stock_id_idx
+    ON sells (stock_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sells_sale_date_idx
+    ON sells (sale_date DESC) INCLUDE (investor_id, stock_id, num, price);
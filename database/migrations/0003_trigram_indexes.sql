@@ -0,0 +1,33 @@
+-- migrate:no-transaction
+-- migrate:optional
+-- Триграммные индексы для фильтров «содержит» (LIKE '%...%'): btree такой
+-- шаблон с ведущим % не обслуживает. Выражения индексов совпадают
+-- с выражениями в условиях запросов (database/queries.py и окна таблиц).
+-- Расширение pg_trgm входит в contrib (пакет postgresql-contrib); без него
+-- (или без права CREATE) миграция пропускается, а фильтры работают
+-- последовательным просмотром.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Юрлица: наименование и ИНН (справочники, поиск по сделкам)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS legal_entities_name_trgm_idx
+    ON legal_entities USING gin (LOWER(entity_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS legal_entities_inn_trgm_idx
+    ON legal_entities USING gin (inn gin_trgm_ops);
+
+-- Клиенты и сотрудники: имя, фамилия, цифры телефона
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_first_name_trgm_idx
+    ON Client USING gin (LOWER(first_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_last_name_trgm_idx
+    ON Client USING gin (LOWER(last_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_phone_trgm_idx
+    ON Client USING gin (regexp_replace(phone, '\D', '', 'g') gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_first_name_trgm_idx
+    ON Employee USING gin (LOWER(first_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_last_name_trgm_idx
+    ON Employee USING gin (LOWER(last_name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_phone_trgm_idx
+    ON Employee USING gin (regexp_replace(phone, '\D', '', 'g') gin_trgm_ops);
+
+-- Акции: тикер
+CREATE INDEX CONCURRENTLY IF NOT EXISTS stocks_ticket_trgm_idx
+    ON stocks USING gin (LOWER(ticket) gin_trgm_ops);
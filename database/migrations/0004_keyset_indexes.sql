@@ -0,0 +1,25 @@
+-- migrate:no-transaction
+-- Индексы для keyset-пагинации списков: ключ сортировки (дата DESC, id DESC)
+-- целиком, чтобы условие (дата, id) < (%s, %s) и ORDER BY ... LIMIT
+-- читали только строки страницы. Заменяют индексы по одной дате из 0001/0002.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transaction_date_id_idx
+    ON Transaction (date DESC, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS transaction_date_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS deposit_open_date_id_idx
+    ON Deposit (open_date DESC, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS deposit_open_date_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS report_creation_date_id_idx
+    ON Report (creation_date DESC, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS report_creation_date_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sells_sale_date_id_idx
+    ON sells (sale_date DESC, sell_id DESC) INCLUDE (investor_id, stock_id, num, price);
+DROP INDEX CONCURRENTLY IF EXISTS sells_sale_date_idx;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS emissions_date_register_id_idx
+    ON emissions (date_register DESC, emission_id DESC)
+    INCLUDE (value, status, emitter_id, registrat_id);
+DROP INDEX CONCURRENTLY IF EXISTS emissions_date_register_idx;
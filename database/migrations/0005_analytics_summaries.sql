@@ -0,0 +1,179 @@
+-- Сводные таблицы отчетов «Аналитики»: агрегаты sells и emissions по
+-- группам отчета. Триггеры уровня оператора переносят в них изменения
+-- (по таблицам переходов), поэтому отчет читает по строке на группу,
+-- а не все продажи. updated_at — время последнего изменения группы.
+-- Полный пересчет: SELECT analytics_rebuild() (python -m database.analytics rebuild).
+
+CREATE TABLE analytics_investor_sells (
+    investor_id INT PRIMARY KEY,
+    deals_count BIGINT NOT NULL,
+    stocks_bought BIGINT NOT NULL,
+    total_spent NUMERIC NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE analytics_stock_sells (
+    stock_id INT PRIMARY KEY,
+    sells_count BIGINT NOT NULL,
+    -- Продажи с ценой: делитель средней цены (AVG не учитывает NULL)
+    price_count BIGINT NOT NULL,
+    price_sum NUMERIC NOT NULL,
+    total_sold BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE analytics_emission_status (
+    status BOOLEAN PRIMARY KEY,
+    emissions_count BIGINT NOT NULL,
+    total_value NUMERIC NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Добавляет к сводкам продажи changed со знаком sign (1 — новые строки,
+-- -1 — удаленные). Группы обновляются по возрастанию ключа, чтобы
+-- параллельные транзакции не взаимоблокировались. Группы с нулевым
+-- счетчиком не удаляются: max(updated_at) не уходит назад. Строки без
+-- ключа группы в сводки не попадают, суммы одних NULL — 0: ошибка сводки
+-- не должна отменять запись в sells/emissions.
+CREATE FUNCTION analytics_apply_sells(changed sells[], sign INT) RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO analytics_investor_sells AS s (investor_id, deals_count, stocks_bought, total_spent)
+    SELECT investor_id, sign * COUNT(*), sign * COALESCE(SUM(num), 0),
+           sign * COALESCE(SUM(num * price), 0)
+    FROM unnest(changed)
+    WHERE investor_id IS NOT NULL
+    GROUP BY investor_id
+    ORDER BY investor_id
+    ON CONFLICT (investor_id) DO UPDATE SET
+        deals_count = s.deals_count + EXCLUDED.deals_count,
+        stocks_bought = s.stocks_bought + EXCLUDED.stocks_bought,
+        total_spent = s.total_spent + EXCLUDED.total_spent,
+        updated_at = now();
+
+    INSERT INTO analytics_stock_sells AS s (stock_id, sells_count, price_count, price_sum, total_sold)
+    SELECT stock_id, sign * COUNT(*), sign * COUNT(price), sign * COALESCE(SUM(price), 0),
+           sign * COALESCE(SUM(num), 0)
+    FROM unnest(changed)
+    WHERE stock_id IS NOT NULL
+    GROUP BY stock_id
+    ORDER BY stock_id
+    ON CONFLICT (stock_id) DO UPDATE SET
+        sells_count = s.sells_count + EXCLUDED.sells_count,
+        price_count = s.price_count + EXCLUDED.price_count,
+        price_sum = s.price_sum + EXCLUDED.price_sum,
+        total_sold = s.total_sold + EXCLUDED.total_sold,
+        updated_at = now();
+$$;
+
+CREATE FUNCTION analytics_apply_emissions(changed emissions[], sign INT) RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO analytics_emission_status AS s (status, emissions_count, total_value)
+    SELECT status, sign * COUNT(*), sign * COALESCE(SUM(value), 0)
+    FROM unnest(changed)
+    WHERE status IS NOT NULL
+    GROUP BY status
+    ORDER BY status
+    ON CONFLICT (status) DO UPDATE SET
+        emissions_count = s.emissions_count + EXCLUDED.emissions_count,
+        total_value = s.total_value + EXCLUDED.total_value,
+        updated_at = now();
+$$;
+
+-- UPDATE вычитает старые версии строк и добавляет новые
+CREATE FUNCTION analytics_sells_changed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM analytics_apply_sells(ARRAY(SELECT ROW(o.*)::sells FROM old_rows o), -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM analytics_apply_sells(ARRAY(SELECT ROW(n.*)::sells FROM new_rows n), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION analytics_emissions_changed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM analytics_apply_emissions(ARRAY(SELECT ROW(o.*)::emissions FROM old_rows o), -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM analytics_apply_emissions(ARRAY(SELECT ROW(n.*)::emissions FROM new_rows n), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- TRUNCATE не передает удаленные строки: сводки обнуляются целиком
+CREATE FUNCTION analytics_truncated() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'sells' THEN
+        UPDATE analytics_investor_sells
+        SET deals_count = 0, stocks_bought = 0, total_spent = 0, updated_at = now();
+        UPDATE analytics_stock_sells
+        SET sells_count = 0, price_count = 0, price_sum = 0, total_sold = 0, updated_at = now();
+    ELSE
+        UPDATE analytics_emission_status
+        SET emissions_count = 0, total_value = 0, updated_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Таблицы переходов допускаются только у триггеров с одним событием
+CREATE TRIGGER sells_analytics_insert AFTER INSERT ON sells
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_sells_changed();
+CREATE TRIGGER sells_analytics_update AFTER UPDATE ON sells
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_sells_changed();
+CREATE TRIGGER sells_analytics_delete AFTER DELETE ON sells
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_sells_changed();
+CREATE TRIGGER sells_analytics_truncate AFTER TRUNCATE ON sells
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_truncated();
+
+CREATE TRIGGER emissions_analytics_insert AFTER INSERT ON emissions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_emissions_changed();
+CREATE TRIGGER emissions_analytics_update AFTER UPDATE ON emissions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_emissions_changed();
+CREATE TRIGGER emissions_analytics_delete AFTER DELETE ON emissions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_emissions_changed();
+CREATE TRIGGER emissions_analytics_truncate AFTER TRUNCATE ON emissions
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_truncated();
+
+-- Пересчет сводок с нуля. SHARE-блокировка исходных таблиц не пускает
+-- запись (и триггеры) до конца транзакции пересчета, чтение не мешает.
+CREATE FUNCTION analytics_rebuild() RETURNS void
+LANGUAGE sql AS $$
+    LOCK TABLE sells, emissions IN SHARE MODE;
+    DELETE FROM analytics_investor_sells;
+    DELETE FROM analytics_stock_sells;
+    DELETE FROM analytics_emission_status;
+
+    INSERT INTO analytics_investor_sells (investor_id, deals_count, stocks_bought, total_spent)
+    SELECT investor_id, COUNT(*), COALESCE(SUM(num), 0), COALESCE(SUM(num * price), 0)
+    FROM sells
+    WHERE investor_id IS NOT NULL
+    GROUP BY investor_id;
+
+    INSERT INTO analytics_stock_sells (stock_id, sells_count, price_count, price_sum, total_sold)
+    SELECT stock_id, COUNT(*), COUNT(price), COALESCE(SUM(price), 0), COALESCE(SUM(num), 0)
+    FROM sells
+    WHERE stock_id IS NOT NULL
+    GROUP BY stock_id;
+
+    INSERT INTO analytics_emission_status (status, emissions_count, total_value)
+    SELECT status, COUNT(*), COALESCE(SUM(value), 0)
+    FROM emissions
+    WHERE status IS NOT NULL
+    GROUP BY status;
+$$;
+
+SELECT analytics_rebuild();
@@ -0,0 +1,74 @@
+-- Уведомления об изменении строк списков (канал bank_changes): приложение
+-- слушает канал и обновляет у открытых окон только затронутые строки.
+-- Полезная нагрузка — JSON {"table": ..., "op": ..., "ids": [...]};
+-- ids = null — изменений слишком много (или TRUNCATE), список перечитывается.
+-- Уведомления доставляются при фиксации транзакции, повторы в ней объединяются.
+
+-- TG_ARGV[0] — имя столбца первичного ключа
+CREATE FUNCTION notify_row_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    ids BIGINT[];
+    chunk_size CONSTANT INT := 500;  -- ~8 КБ — предел размера уведомления
+    max_ids CONSTANT INT := 5000;
+BEGIN
+    -- Читается не больше max_ids + 1 строк: при массовых изменениях (импорт)
+    -- таблица переходов не разбирается целиком ради ids = null
+    IF TG_OP = 'TRUNCATE' THEN
+        ids := NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        ids := ARRAY(SELECT DISTINCT id FROM (
+            SELECT (to_jsonb(o) ->> TG_ARGV[0])::bigint AS id FROM old_rows o LIMIT max_ids + 1
+        ) changed);
+    ELSE
+        ids := ARRAY(SELECT DISTINCT id FROM (
+            SELECT (to_jsonb(n) ->> TG_ARGV[0])::bigint AS id FROM new_rows n LIMIT max_ids + 1
+        ) changed);
+    END IF;
+
+    IF ids IS NOT NULL AND cardinality(ids) = 0 THEN
+        RETURN NULL;
+    END IF;
+    IF ids IS NULL OR cardinality(ids) > max_ids THEN
+        PERFORM pg_notify('bank_changes', json_build_object(
+            'table', lower(TG_TABLE_NAME), 'op', TG_OP, 'ids', NULL)::text);
+        RETURN NULL;
+    END IF;
+    FOR chunk IN 0 .. (cardinality(ids) - 1) / chunk_size LOOP
+        PERFORM pg_notify('bank_changes', json_build_object(
+            'table', lower(TG_TABLE_NAME), 'op', TG_OP,
+            'ids', ids[chunk * chunk_size + 1 : (chunk + 1) * chunk_size])::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+-- UPDATE первичного ключа не поддерживается списками: достаточно новых значений
+CREATE PROCEDURE create_change_triggers(table_name TEXT, key_column TEXT)
+LANGUAGE plpgsql AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TRIGGER %1$s_notify_insert AFTER INSERT ON %1$s '
+        'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT '
+        'EXECUTE FUNCTION notify_row_changes(%2$L)', table_name, key_column);
+    EXECUTE format(
+        'CREATE TRIGGER %1$s_notify_update AFTER UPDATE ON %1$s '
+        'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT '
+        'EXECUTE FUNCTION notify_row_changes(%2$L)', table_name, key_column);
+    EXECUTE format(
+        'CREATE TRIGGER %1$s_notify_delete AFTER DELETE ON %1$s '
+        'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT '
+        'EXECUTE FUNCTION notify_row_changes(%2$L)', table_name, key_column);
+    EXECUTE format(
+        'CREATE TRIGGER %1$s_notify_truncate AFTER TRUNCATE ON %1$s '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes(%2$L)', table_name, key_column);
+END;
+$$;
+
+CALL create_change_triggers('sells', 'sell_id');
+CALL create_change_triggers('emissions', 'emission_id');
+CALL create_change_triggers('transaction', 'id');
+CALL create_change_triggers('deposit', 'id');
+CALL create_change_triggers('report', 'id');
+
+DROP PROCEDURE create_change_triggers(TEXT, TEXT);
@@ -0,0 +1,90 @@
+import json
+import select
+import threading
+
+import psycopg2
+
+
+# Канал уведомлений триггеров notify_row_changes (миграция 0006)
+CHANNEL = "bank_changes"
+
+
+class ChangeListener:
+    """Поток, слушающий канал CHANNEL на отдельном соединении.
+
+    on_changes(changes) вызывается в потоке слушателя со списком
+    (таблица, ids) всех уведомлений, пришедших за один опрос; ids —
+    множество первичных ключей или None (изменено неизвестно что).
+    После восстановления связи передается (None, None): уведомления
+    за время разрыва потеряны, перечитать нужно все.
+    """
+
+    def __init__(self, conn_params, on_changes, channel=CHANNEL, retry_interval=5.0,
+                 poll_interval=1.0):
+        self.conn_params = conn_params
+        self.on_changes = on_changes
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="change-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(**self.conn_params)
+            except psycopg2.OperationalError as e:
+                print(f"Change listener connection error: {e}")
+                self._stop.wait(self.retry_interval)
+                continue
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                if connected_before:
+                    self.on_changes([(None, None)])
+                connected_before = True
+                self._listen(conn)
+            except psycopg2.Error as e:
+                print(f"Change listener error: {e}")
+                self._stop.wait(self.retry_interval)
+            finally:
+                conn.close()
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                continue
+            conn.poll()
+            changes = []
+            while conn.notifies:
+                changes.append(_parse(conn.notifies.pop(0).payload))
+            if changes:
+                try:
+                    self.on_changes(changes)
+                except Exception as e:
+                    print(f"Change listener callback error: {e}")
+
+
+def _parse(payload):
+    try:
+        message = json.loads(payload)
+        ids = message.get("ids")
+        return message["table"], (None if ids is None else set(ids))
+    except (ValueError, KeyError, TypeError):
+        print(f"Change listener: invalid payload {payload!r}")
+        return None, None
@@ -0,0 +1,251 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extensions import QueryCanceledError
+
+from .cancellation import CancelScope, cancel_scope, current_scope
+from .db import Database
+from .instrumentation import current_query_tag, query_tag
+
+
+# Потоки предварительной загрузки страниц (общие для процесса)
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-prefetch")
+
+
+class Page:
+    """Страница результата: строки и положение в списке"""
+
+    def __init__(self, rows, number, has_previous, has_next):
+        self.rows = rows
+        self.number = number
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    def __repr__(self):
+        return f"<Page {self.number}: {len(self.rows)} rows>"
+
+
+class KeysetPager:
+    """Постраничное чтение FilteredQuery с keyset по ключу сортировки.
+
+    Страница запрашивается условием (ключ) < (ключ последней строки) и
+    LIMIT — без OFFSET, поэтому время перехода не зависит от номера
+    страницы. Следующая страница загружается в фоне, пока пользователь
+    смотрит текущую, — в контексте запроса, показавшего страницу: с его
+    CancelScope (statement_timeout, отмена) и меткой query_tag. Методы
+    можно вызывать из любого потока, но не одновременно из нескольких
+    (навигация сериализуется блокировкой).
+    """
+
+    def __init__(self, query, values=None, page_size=100, db=None, prefetch=True):
+        self.query = query
+        self.values = dict(values or {})
+        self.page_size = page_size
+        self.db = db or Database()
+        self.prefetch = prefetch
+        self.page = None
+        self._lock = threading.Lock()
+        self._prefetched = None  # (ключ, Future со строками, CancelScope загрузки)
+
+    def first(self):
+        """Первая страница"""
+        with self._lock:
+            rows = self._fetch()
+            return self._show(rows, 1, False)
+
+    def next(self):
+        """Следующая страница или None, если текущая последняя"""
+        with self._lock:
+            if self.page is None or not self.page.has_next:
+                return None
+            after = self.query.key(self.page.rows[-1])
+            rows = self._take_prefetched(after)
+            if rows is None:
+                rows = self._fetch(after=after)
+            return self._show(rows, self.page.number + 1, True)
+
+    def previous(self):
+        """Предыдущая страница или None, если текущая первая"""
+        with self._lock:
+            if self.page is None or not self.page.has_previous:
+                return None
+            before = self.query.key(self.page.rows[0])
+            rows = self._fetch(before=before)
+            has_previous = len(rows) > self.page_size
+            rows = list(reversed(rows[:self.page_size]))
+            # Строки могли быть удалены: если до начала списка меньше
+            # страницы, показываем первую страницу целиком
+            if not has_previous and len(rows) < self.page_size:
+                rows = self._fetch()
+                return self._show(rows, 1, False)
+            self.page = Page(rows, max(self.page.number - 1, 1), has_previous, True)
+            self._start_prefetch()
+            return self.page
+
+    def refresh(self, ids=None):
+        """Обновляет текущую страницу после изменения строк с первичными
+        ключами ids (None — изменено неизвестно что: страница
+        перечитывается целиком). Перечитываются только строки ids;
+        возвращает новую Page или None, если страница не изменилась.
+        """
+        with self._lock:
+            if self.page is None:
+                return None
+            old = self.page
+            page = None if ids is None or not old.rows else self._patched(old, set(ids))
+            if page is None:
+                if old.number > 1 and old.rows:
+                    rows = self._fetch(at=self.query.key(old.rows[0]))
+                else:
+                    rows = self._fetch()
+                page = Page(
+                    rows[:self.page_size], old.number, old.has_previous,
+                    len(rows) > self.page_size,
+                )
+            if [tuple(row) for row in page.rows] == [tuple(row) for row in old.rows] \
+                    and page.has_next == old.has_next:
+                return None
+            self.page = page
+            self._start_prefetch()
+            return page
+
+    def estimated_total(self):
+        """Оценка общего числа строк по статистике планировщика"""
+        return self.db.estimate_count(*self.query.build(self.values))
+
+    def _fetch(self, after=None, before=None, at=None):
+        # Лишняя строка показывает, есть ли что-то за границей страницы
+        query, params = self.query.page(
+            self.values, after=after, before=before, limit=self.page_size + 1, at=at
+        )
+        return self.db.fetch_records(query, params)
+
+    def _patched(self, old, ids):
+        """Страница old с перечитанными строками ids: измененные заменяются,
+        удаленные и переставшие проходить фильтры убираются, новые
+        добавляются, если их ключ попадает в границы страницы. None —
+        после удалений страницу нужно дополнить следующими строками"""
+        id_index = self.query.keyset[-1][1]
+        changed = self.db.fetch_records(*self.query.by_ids(self.values, ids))
+        first, last = self.query.key(old.rows[0]), self.query.key(old.rows[-1])
+
+        def on_page(row):
+            key = self.query.key(row)
+            return (old.number == 1 or key <= first) and (not old.has_next or key >= last)
+
+        rows = [row for row in old.rows if row[id_index] not in ids]
+        rows += [row for row in changed if on_page(row)]
+        rows.sort(key=self.query.key, reverse=True)
+        if len(rows) < self.page_size and old.has_next:
+            return None
+        has_next = old.has_next or len(rows) > self.page_size
+        return Page(rows[:self.page_size], old.number, old.has_previous, has_next)
+
+    def _show(self, rows, number, has_previous):
+        self.page = Page(
+            rows[:self.page_size], number, has_previous, len(rows) > self.page_size
+        )
+        self._start_prefetch()
+        return self.page
+
+    def cancel_prefetch(self):
+        """Отменяет незавершенную фоновую загрузку (список открыт заново)"""
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is not None and not prefetched[1].done():
+            prefetched[2].cancel()
+
+    def _start_prefetch(self):
+        self._prefetched = None
+        if self.prefetch and self.page.has_next:
+            after = self.query.key(self.page.rows[-1])
+            scope = current_scope() or CancelScope()
+            future = _prefetch_pool.submit(self._prefetch, scope, current_query_tag(), after)
+            self._prefetched = (after, future, scope)
+
+    def _prefetch(self, scope, tag, after):
+        with query_tag(tag), cancel_scope(scope):
+            return self._fetch(after=after)
+
+    def _take_prefetched(self, after):
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None or prefetched[0] != after:
+            return None
+        try:
+            return prefetched[1].result()
+        except QueryCanceledError:
+            # Отменен запрос, начавший загрузку, — страница запросится заново
+            return None
+        except Exception as e:
+            # Ошибку фоновой загрузки не показываем: страница запросится заново
+            print(f"Page prefetch error: {e}")
+            return None
+
+
+class KeysetBatches:
+    """Чтение FilteredQuery пачками для прокрутки без страниц.
+
+    Пачки читаются по порядку (next) keyset-условием от ключа последней
+    строки предыдущей пачки, как страницы KeysetPager. Запоминается только
+    этот ключ — граница пачки, по одному значению на batch_size строк, —
+    поэтому любую прочитанную пачку можно перечитать (batch) одним
+    запросом по индексу: строки между ее границами. Ни соединение, ни
+    транзакция между запросами не удерживаются. Методы можно вызывать из
+    любого потока, но не одновременно из нескольких.
+    """
+
+    def __init__(self, query, values=None, batch_size=200, db=None):
+        self.query = query
+        self.values = dict(values or {})
+        self.batch_size = batch_size
+        self.db = db or Database()
+        self.bounds = []       # ключ последней строки пачки i (кроме хвостовой)
+        self.count = 0         # число прочитанных пачек
+        self.complete = False  # хвост списка прочитан
+        self._lock = threading.Lock()
+
+    def next(self):
+        """(номер, строки) следующей пачки или None, если список прочитан"""
+        with self._lock:
+            if self.complete:
+                return None
+            number = self.count
+            rows = self._fetch(self._after(number), self.batch_size + 1)
+            self.count += 1
+            self._set_tail(rows)
+            return number, rows[:self.batch_size]
+
+    def batch(self, number):
+        """Строки прочитанной ранее пачки number по ее текущим границам.
+
+        Вставленные после первого чтения строки попадают в пачку, в
+        границы которой входит их ключ, поэтому число строк пачки может
+        измениться. Хвостовая пачка перечитывается с LIMIT: если за ней
+        появились строки, complete снова становится False.
+        """
+        with self._lock:
+            if number >= self.count:
+                raise ValueError(f"Пачка {number} еще не прочитана")
+            if number < len(self.bounds):
+                return self._fetch(self._after(number), None, stop=self.bounds[number])
+            rows = self._fetch(self._after(number), self.batch_size + 1)
+            self._set_tail(rows)
+            return rows[:self.batch_size]
+
+    def estimated_total(self):
+        """Оценка общего числа строк по статистике планировщика"""
+        return self.db.estimate_count(*self.query.build(self.values))
+
+    def _after(self, number):
+        return self.bounds[number - 1] if number else None
+
+    def _set_tail(self, rows):
+        # Лишняя строка показывает, есть ли что-то за хвостовой пачкой
+        if len(rows) > self.batch_size:
+            self.bounds.append(self.query.key(rows[self.batch_size - 1]))
+            self.complete = False
+        else:
+            self.complete = True
+
+    def _fetch(self, after, limit, stop=None):
+        query, params = self.query.page(self.values, after=after, limit=limit, stop=stop)
+        return self.db.fetch_records(query, params)
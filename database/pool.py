@@ -0,0 +1,265 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import OperationalError, InterfaceError
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(OperationalError):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с PostgreSQL.
+
+    Соединения открываются лениво до maxconn, минимум minconn держится
+    открытыми. При выдаче соединение, простоявшее дольше keepalive_interval,
+    проверяется запросом SELECT 1; сломанные соединения пересоздаются.
+    """
+
+    def __init__(
+        self,
+        conn_params,
+        minconn=1,
+        maxconn=10,
+        idle_timeout=300,
+        keepalive_interval=60,
+        checkout_timeout=30,
+        connection_factory=None,
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Некорректные размеры пула: min={minconn}, max={maxconn}")
+        self.conn_params = dict(conn_params)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.checkout_timeout = checkout_timeout
+        self.connection_factory = connection_factory
+
+        self._lock = threading.Condition()
+        self._idle = []  # [(conn, время возврата в пул)]
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "creations": 0,
+            "discards": 0,
+            "health_checks": 0,
+        }
+
+    # --- Служебные методы ---
+
+    def _connect(self):
+        """Открывает новое соединение с TCP keepalive"""
+        params = dict(self.conn_params)
+        params.setdefault("keepalives", 1)
+        params.setdefault("keepalives_idle", self.keepalive_interval)
+        params.setdefault("keepalives_interval", 10)
+        params.setdefault("keepalives_count", 3)
+        if self.connection_factory is not None:
+            params["connection_factory"] = self.connection_factory
+        conn = psycopg2.connect(**params)
+        with self._lock:
+            self._stats["creations"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        """Проверяет соединение перед выдачей"""
+        if conn.closed:
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - idle_since < self.keepalive_interval:
+            return True
+        with self._lock:
+            self._stats["health_checks"] += 1
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (OperationalError, InterfaceError):
+            return False
+
+    def _discard(self, conn):
+        """Закрывает соединение и уменьшает размер пула (под блокировкой)"""
+        self._size -= 1
+        self._stats["discards"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._lock.notify()
+
+    def _prune_idle(self):
+        """Закрывает соединения сверх minconn, простаивающие дольше idle_timeout"""
+        now = time.monotonic()
+        keep = []
+        for conn, idle_since in self._idle:
+            if self._size > self.minconn and now - idle_since > self.idle_timeout:
+                self._discard(conn)
+            else:
+                keep.append((conn, idle_since))
+        self._idle = keep
+
+    # --- Публичный интерфейс ---
+
+    def getconn(self, timeout=None):
+        """Выдает соединение из пула, при необходимости ожидая освобождения"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = None
+
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise InterfaceError("Пул соединений закрыт")
+                self._prune_idle()
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                elif self._size < self.maxconn:
+                    # Резервируем место, соединение открываем вне блокировки
+                    self._size += 1
+                    conn, idle_since = None, None
+                else:
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._stats["wait_time"] += time.monotonic() - wait_started
+                        raise PoolTimeoutError(
+                            f"Нет свободных соединений в пуле (max={self.maxconn})"
+                        )
+                    self._lock.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            elif not self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self._discard(conn)
+                continue
+
+            with self._lock:
+                self._in_use.add(conn)
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["wait_time"] += time.monotonic() - wait_started
+            return conn
+
+    def putconn(self, conn, close=False):
+        """Возвращает соединение в пул, откатывая незавершенную транзакцию"""
+        if not close and not conn.closed:
+            try:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (OperationalError, InterfaceError):
+                close = True
+
+        with self._lock:
+            if conn not in self._in_use:
+                # Соединение уже списано пулом (например, после closeall)
+                if not conn.closed:
+                    conn.close()
+                return
+            self._in_use.discard(conn)
+            if close or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Контекстный менеджер: соединение возвращается в пул при выходе"""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def warm_up(self):
+        """Открывает соединения до minconn"""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+
+    def closeall(self):
+        """Закрывает все соединения пула.
+
+        Выданные соединения закрываются при возврате через putconn.
+        """
+        with self._lock:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._lock.notify_all()
+
+    def stats(self):
+        """Возвращает снимок статистики пула"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                minconn=self.minconn,
+                maxconn=self.maxconn,
+            )
+        return snapshot
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_params, **pool_settings):
+    """Возвращает общий для процесса пул для указанных параметров подключения"""
+    key = tuple(sorted((k, str(v)) for k, v in conn_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(conn_params, **pool_settings)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Закрывает все пулы процесса (вызывается при выходе из приложения)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
@@ -0,0 +1,263 @@
+import re
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from .cache import result_cache, tables_written
+from .instrumentation import metrics
+from .query_builder import shape_name
+from .routing import router
+from .queries import Queries
+
+
+_PLACEHOLDER_RE = re.compile(r"%s(\s+IS\s+NULL)?", re.IGNORECASE)
+
+# Классы SQLSTATE, при которых оператор не подготовить никогда:
+# 42 — синтаксис и разбор, 0A — неподдерживаемая возможность
+_UNPREPARABLE_CLASSES = ("42", "0A")
+
+
+def to_server_placeholders(sql):
+    """Переводит плейсхолдеры %s в $1..$n для PREPARE.
+
+    Параметр в конструкции "%s IS NULL" не имеет выводимого типа,
+    поэтому приводится к text (EXECUTE приведет к нему любое значение).
+    """
+    counter = 0
+
+    def replace(match):
+        nonlocal counter
+        counter += 1
+        if match.group(1):
+            return f"${counter}::text{match.group(1)}"
+        return f"${counter}"
+
+    return _PLACEHOLDER_RE.sub(replace, sql), counter
+
+
+class PreparedStatementRegistry:
+    """Реестр серверных подготовленных операторов для каталога Queries.
+
+    Каждый оператор подготавливается (PREPARE) лениво на каждом соединении
+    при первом использовании и далее выполняется через EXECUTE. Набор
+    подготовленных имен хранится на самом соединении, поэтому новое
+    соединение после переподключения подготавливает операторы заново.
+    Формы запросов FilteredQuery добавляются в реестр при первом выполнении.
+    """
+
+    def __init__(self, statements):
+        self._lock = threading.Lock()
+        self._by_sql = {}
+        self._stats = {}
+        self._unpreparable = set()
+        for name, sql in statements.items():
+            self._add(name, sql)
+
+    def _add(self, name, sql):
+        if "%(" in sql or "%%" in sql:
+            return None
+        server_sql, param_count = to_server_placeholders(sql)
+        stmt_name = f"q_{name.lower()}"
+        args = ", ".join(["%s"] * param_count)
+        execute_sql = f"EXECUTE {stmt_name} ({args})" if param_count else f"EXECUTE {stmt_name}"
+        entry = (stmt_name, f"PREPARE {stmt_name} AS {server_sql}", execute_sql)
+        with self._lock:
+            self._by_sql[sql] = entry
+            self._stats.setdefault(stmt_name, {"prepares": 0, "executions": 0, "hits": 0})
+        return entry
+
+    def _entry(self, sql):
+        entry = self._by_sql.get(sql)
+        if entry is None:
+            name = shape_name(sql)
+            if name is not None:
+                entry = self._add(name, sql)
+        return entry
+
+    @classmethod
+    def from_queries(cls, queries_cls):
+        """Собирает реестр из строковых констант класса запросов"""
+        statements = {
+            name: value
+            for name, value in vars(queries_cls).items()
+            if name.isupper() and isinstance(value, str)
+        }
+        return cls(statements)
+
+    def _count(self, stmt_name, key):
+        with self._lock:
+            self._stats[stmt_name][key] += 1
+
+    def _prepare(self, cursor, stmt_name, prepare_sql):
+        """Выполняет PREPARE; внутри открытой транзакции — под точкой сохранения"""
+        conn = cursor.connection
+        in_transaction = (
+            conn.info.transaction_status == extensions.TRANSACTION_STATUS_INTRANS
+        )
+        base_execute = extensions.cursor.execute
+        if in_transaction:
+            base_execute(cursor, "SAVEPOINT prepare_statement")
+        try:
+            base_execute(cursor, prepare_sql)
+        except psycopg2.Error as e:
+            if not conn.closed:
+                if in_transaction:
+                    base_execute(cursor, "ROLLBACK TO SAVEPOINT prepare_statement")
+                else:
+                    conn.rollback()
+            # Отмена, statement_timeout, блокировки, обрыв связи — ошибка
+            # запроса, а не оператора: выполнять его без PREPARE незачем
+            if isinstance(e, psycopg2.OperationalError):
+                raise
+            # Оператор нельзя подготовить (синтаксис, типы параметров,
+            # неподдерживаемая конструкция) — больше не пробуем
+            if e.pgcode and e.pgcode[:2] in _UNPREPARABLE_CLASSES:
+                with self._lock:
+                    self._unpreparable.add(stmt_name)
+            print(f"Prepare error ({stmt_name}), executing unprepared: {e}")
+            return False
+        if in_transaction:
+            base_execute(cursor, "RELEASE SAVEPOINT prepare_statement")
+        conn.prepared_statements.add(stmt_name)
+        self._count(stmt_name, "prepares")
+        return True
+
+    def execute(self, cursor, sql, params):
+        """Выполняет запрос через подготовленный оператор.
+
+        Возвращает False, если запрос не из каталога или не может быть
+        подготовлен — тогда вызывающий выполняет его обычным способом.
+        """
+        entry = self._entry(sql)
+        if entry is None:
+            return False
+        stmt_name, prepare_sql, execute_sql = entry
+        if stmt_name in self._unpreparable:
+            return False
+        conn = cursor.connection
+        prepared = conn.prepared_statements
+        was_idle = conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+        hit = stmt_name in prepared
+        if not hit and not self._prepare(cursor, stmt_name, prepare_sql):
+            return False
+        try:
+            extensions.cursor.execute(cursor, execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Сервер потерял оператор (DISCARD ALL, пулер соединений) —
+            # подготавливаем заново, если транзакцию можно безопасно откатить
+            prepared.clear()
+            if not was_idle:
+                raise
+            conn.rollback()
+            if not self._prepare(cursor, stmt_name, prepare_sql):
+                return False
+            hit = False
+            extensions.cursor.execute(cursor, execute_sql, params)
+
+        with self._lock:
+            stats = self._stats[stmt_name]
+            stats["executions"] += 1
+            if hit:
+                stats["hits"] += 1
+        return True
+
+    def batch_statement(self, cursor, sql, count):
+        """Подготавливает оператор для пакетного выполнения.
+
+        Возвращает текст EXECUTE для execute_batch или None, если запрос
+        не из каталога или не может быть подготовлен.
+        """
+        entry = self._entry(sql)
+        if entry is None:
+            return None
+        stmt_name, prepare_sql, execute_sql = entry
+        if stmt_name in self._unpreparable:
+            return None
+        conn = cursor.connection
+        hit = stmt_name in conn.prepared_statements
+        if not hit and not self._prepare(cursor, stmt_name, prepare_sql):
+            return None
+        with self._lock:
+            stats = self._stats[stmt_name]
+            stats["executions"] += count
+            stats["hits"] += count if hit else count - 1
+        return execute_sql
+
+    def stats(self):
+        """Счетчики по операторам: подготовки, выполнения, повторные использования"""
+        with self._lock:
+            return {
+                name: dict(counters, preparable=name not in self._unpreparable)
+                for name, counters in self._stats.items()
+            }
+
+
+registry = PreparedStatementRegistry.from_queries(Queries)
+
+
+class PreparingCursor(extensions.cursor):
+    """Курсор, выполняющий запросы каталога Queries через EXECUTE"""
+
+    def execute(self, query, vars=None):
+        self.connection.note_writes(query)
+        wait = self.connection.take_checkout_wait()
+        started = time.perf_counter()
+        failed = True
+        try:
+            # Именованные (серверные) курсоры не поддерживают DECLARE ... FOR EXECUTE
+            if self.name is None and registry.execute(self, query, vars):
+                result = None
+            else:
+                result = super().execute(query, vars)
+            failed = False
+            return result
+        finally:
+            if metrics.enabled:
+                self._record(query, vars, time.perf_counter() - started, wait, failed)
+
+    def _record(self, query, vars, duration, wait, failed):
+        sql_text = None
+        if not failed and duration * 1000 >= metrics.slow_query_ms:
+            encoding = extensions.encodings.get(self.connection.encoding, "utf-8")
+            sql_text = self.mogrify(query, vars).decode(encoding)
+        metrics.record(query, duration, self.rowcount, wait, failed, sql_text)
+
+    def copy_expert(self, sql, file, size=8192):
+        self.connection.note_writes(sql)
+        return super().copy_expert(sql, file, size)
+
+
+class PreparingConnection(extensions.connection):
+    """Соединение, помнящее подготовленные на нем операторы
+    и таблицы, измененные в текущей транзакции"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+        self.written_tables = set()
+        self.checkout_wait = 0.0
+        self.cursor_factory = PreparingCursor
+
+    def take_checkout_wait(self):
+        """Время ожидания выдачи из пула — учитывается первым оператором"""
+        wait, self.checkout_wait = self.checkout_wait, 0.0
+        return wait
+
+    def note_writes(self, sql):
+        self.written_tables.update(tables_written(sql))
+
+    def commit(self):
+        super().commit()
+        # Закэшированные результаты по измененным таблицам больше не актуальны
+        if self.written_tables:
+            result_cache.invalidate_tables(self.written_tables)
+            self.written_tables.clear()
+            # Следующие чтения идут на основной сервер, пока реплики не догонят
+            router.note_write()
+
+    def rollback(self):
+        super().rollback()
+        self.written_tables.clear()
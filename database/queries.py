@@ -1,4 +1,12 @@
+from .query_builder import Exists, FilteredQuery, UnionQuery
+
+
 class Queries:
+    # Фильтры «содержит» (LIKE '%...%', значение — query_builder.contains)
+    # обслуживаются триграммными индексами миграции 0003_trigram_indexes:
+    # выражение в условии должно совпадать с выражением индекса —
+    # LOWER(столбец), inn, regexp_replace(phone, '\D', '', 'g').
+
     # --- Users (for Login) ---
     GET_USER_BY_USERNAME = """
         SELECT user_id, username, password_hash, role
@@ -7,13 +15,18 @@ class Queries:
     """
 
     # --- Legal Entities ---
-    GET_ALL_ENTITIES = """
+    GET_ALL_ENTITIES = FilteredQuery(
+        "GET_ALL_ENTITIES",
+        """
         SELECT entity_id, entity_name, address, inn, phone_number, status
         FROM legal_entities
-        WHERE (LOWER(entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (inn LIKE %s OR %s IS NULL)
-        ORDER BY entity_name
-    """
+        """,
+        {
+            "name": "LOWER(entity_name) LIKE LOWER(%s)",
+            "inn": "inn LIKE %s",
+        },
+        order_by="entity_name",
+    )
     GET_ENTITY_BY_ID = "SELECT entity_id, entity_name, address, inn, phone_number, status FROM legal_entities WHERE entity_id = %s"
     ADD_ENTITY = """
         INSERT INTO legal_entities (entity_name, address, inn, phone_number, status)
@@ -55,14 +68,19 @@ class Queries:
     """
 
     # --- Investors ---
-    GET_INVESTORS = """
+    GET_INVESTORS = FilteredQuery(
+        "GET_INVESTORS",
+        """
         SELECT i.investor_id, l.entity_name, l.inn
         FROM investors i
         JOIN legal_entities l ON i.entity_id = l.entity_id
-        WHERE (LOWER(l.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (l.inn LIKE %s OR %s IS NULL)
-        ORDER BY l.entity_name
-    """
+        """,
+        {
+            "name": "LOWER(l.entity_name) LIKE LOWER(%s)",
+            "inn": "l.inn LIKE %s",
+        },
+        order_by="l.entity_name",
+    )
     GET_INVESTOR_BY_ENTITY = "SELECT investor_id FROM investors WHERE entity_id = %s"
     ADD_INVESTOR = "INSERT INTO investors (entity_id) VALUES (%s) RETURNING investor_id"
     DELETE_INVESTOR = "DELETE FROM investors WHERE investor_id = %s"
@@ -81,14 +99,19 @@ class Queries:
     """
 
     # --- Emitters ---
-    GET_EMITTERS = """
+    GET_EMITTERS = FilteredQuery(
+        "GET_EMITTERS",
+        """
         SELECT e.emitter_id, l.entity_name, l.inn
         FROM emitters e
         JOIN legal_entities l ON e.entity_id = l.entity_id
-        WHERE (LOWER(l.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (l.inn LIKE %s OR %s IS NULL)
-        ORDER BY l.entity_name
-    """
+        """,
+        {
+            "name": "LOWER(l.entity_name) LIKE LOWER(%s)",
+            "inn": "l.inn LIKE %s",
+        },
+        order_by="l.entity_name",
+    )
     GET_EMITTER_BY_ENTITY = "SELECT emitter_id FROM emitters WHERE entity_id = %s"
     ADD_EMITTER = "INSERT INTO emitters (entity_id) VALUES (%s) RETURNING emitter_id"
     DELETE_EMITTER = "DELETE FROM emitters WHERE emitter_id = %s"
@@ -101,15 +124,20 @@ class Queries:
     """
 
     # --- Registrars ---
-    GET_REGISTRARS = """
+    GET_REGISTRARS = FilteredQuery(
+        "GET_REGISTRARS",
+        """
         SELECT r.registrat_id, l.entity_name, l.inn, r.num_licence, r.license_expiry_date
         FROM registrats r
         JOIN legal_entities l ON r.entity_id = l.entity_id
-        WHERE (LOWER(l.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (l.inn LIKE %s OR %s IS NULL)
-          AND (LOWER(r.num_licence) LIKE LOWER(%s) OR %s IS NULL)
-        ORDER BY l.entity_name
-    """
+        """,
+        {
+            "name": "LOWER(l.entity_name) LIKE LOWER(%s)",
+            "inn": "l.inn LIKE %s",
+            "license": "LOWER(r.num_licence) LIKE LOWER(%s)",
+        },
+        order_by="l.entity_name",
+    )
     GET_REGISTRAR_BY_ID = "SELECT r.registrat_id, r.entity_id, r.num_licence, r.license_expiry_date FROM registrats r WHERE r.registrat_id = %s"
     ADD_REGISTRAR = """
         INSERT INTO registrats (entity_id, num_licence, license_expiry_date)
@@ -136,7 +164,9 @@ class Queries:
     """
 
     # --- Emissions ---
-    GET_EMISSIONS = """
+    GET_EMISSIONS = FilteredQuery(
+        "GET_EMISSIONS",
+        """
         SELECT ems.emission_id, emt_le.entity_name as emitter_name, ems.value,
                CASE WHEN ems.status THEN 'Активна' ELSE 'Не активна' END as status_text,
                ems.date_register, reg_le.entity_name as registrar_name
@@ -145,13 +175,16 @@ class Queries:
         JOIN legal_entities emt_le ON emt.entity_id = emt_le.entity_id
         JOIN registrats reg ON ems.registrat_id = reg.registrat_id
         JOIN legal_entities reg_le ON reg.entity_id = reg_le.entity_id
-        WHERE (LOWER(emt_le.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(reg_le.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (ems.status = %s OR %s IS NULL)
-          AND (ems.date_register >= %s OR %s IS NULL)
-          AND (ems.date_register <= %s OR %s IS NULL)
-        ORDER BY ems.date_register DESC
-    """
+        """,
+        {
+            "emitter": "LOWER(emt_le.entity_name) LIKE LOWER(%s)",
+            "registrar": "LOWER(reg_le.entity_name) LIKE LOWER(%s)",
+            "status": "ems.status = %s",
+            "date_start": "ems.date_register >= %s",
+            "date_end": "ems.date_register <= %s",
+        },
+        keyset=(("ems.date_register", 4), ("ems.emission_id", 0)),
+    )
     GET_EMISSION_BY_ID = "SELECT emission_id, value, status, date_register, emitter_id, registrat_id FROM emissions WHERE emission_id = %s"
     ADD_EMISSION = """
         INSERT INTO emissions (value, status, date_register, emitter_id, registrat_id)
@@ -172,17 +205,22 @@ class Queries:
     """
 
     # --- Stocks ---
-    GET_STOCKS = """
+    GET_STOCKS = FilteredQuery(
+        "GET_STOCKS",
+        """
         SELECT s.stock_id, s.ticket, s.nominal_value, em_le.entity_name as emitter_name, e.date_register as emission_date
         FROM stocks s
         JOIN emissions e ON s.emission_id = e.emission_id
         JOIN emitters em ON e.emitter_id = em.emitter_id
         JOIN legal_entities em_le ON em.entity_id = em_le.entity_id
-        WHERE (LOWER(s.ticket) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(em_le.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (e.emission_id = %s OR %s IS NULL)
-        ORDER BY s.ticket
-    """
+        """,
+        {
+            "ticket": "LOWER(s.ticket) LIKE LOWER(%s)",
+            "emitter": "LOWER(em_le.entity_name) LIKE LOWER(%s)",
+            "emission_id": "e.emission_id = %s",
+        },
+        order_by="s.ticket",
+    )
     GET_STOCK_BY_ID = "SELECT stock_id, ticket, nominal_value, emission_id FROM stocks WHERE stock_id = %s"
     ADD_STOCK = """
         INSERT INTO stocks (ticket, nominal_value, emission_id)
@@ -206,19 +244,24 @@ class Queries:
     """
 
     # --- Sells ---
-    GET_SELLS = """
+    GET_SELLS = FilteredQuery(
+        "GET_SELLS",
+        """
         SELECT sl.sell_id, inv_le.entity_name as investor_name, st.ticket as stock_ticket,
                sl.sale_date, sl.num, sl.price
         FROM sells sl
         JOIN investors inv ON sl.investor_id = inv.investor_id
         JOIN legal_entities inv_le ON inv.entity_id = inv_le.entity_id
         JOIN stocks st ON sl.stock_id = st.stock_id
-        WHERE (LOWER(inv_le.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(st.ticket) LIKE LOWER(%s) OR %s IS NULL)
-          AND (sl.sale_date >= %s OR %s IS NULL)
-          AND (sl.sale_date <= %s OR %s IS NULL)
-        ORDER BY sl.sale_date DESC
-    """
+        """,
+        {
+            "investor": "LOWER(inv_le.entity_name) LIKE LOWER(%s)",
+            "stock": "LOWER(st.ticket) LIKE LOWER(%s)",
+            "date_start": "sl.sale_date >= %s",
+            "date_end": "sl.sale_date <= %s",
+        },
+        keyset=(("sl.sale_date", 3), ("sl.sell_id", 0)),
+    )
     GET_SELL_BY_ID = "SELECT sell_id, investor_id, stock_id, sale_date, num, price FROM sells WHERE sell_id = %s"
     ADD_SELL = """
         INSERT INTO sells (investor_id, stock_id, sale_date, num, price)
@@ -231,18 +274,21 @@ class Queries:
     DELETE_SELL = "DELETE FROM sells WHERE sell_id = %s"
 
     # --- Analytics ---
+    # Агрегаты отчетов читаются из сводных таблиц analytics_* (миграция 0005),
+    # которые триггеры sells/emissions поддерживают в актуальном состоянии
     GET_EMISSIONS_BY_STATUS = """
         SELECT CASE WHEN status THEN 'Активна' ELSE 'Не активна' END,
-               COUNT(*) as count, SUM(value) as total_value
-        FROM emissions
-        GROUP BY status
+               emissions_count as count, total_value
+        FROM analytics_emission_status
+        WHERE emissions_count > 0
         ORDER BY status
     """
     GET_STOCKS_AVG_PRICE = """
-        SELECT s.ticket, s.nominal_value, AVG(sl.price) as avg_sell_price, COALESCE(SUM(sl.num), 0) as total_sold
+        SELECT s.ticket, s.nominal_value,
+               ss.price_sum / NULLIF(ss.price_count, 0) as avg_sell_price,
+               COALESCE(ss.total_sold, 0) as total_sold
         FROM stocks s
-        LEFT JOIN sells sl ON s.stock_id = sl.stock_id
-        GROUP BY s.stock_id, s.ticket, s.nominal_value
+        LEFT JOIN analytics_stock_sells ss ON s.stock_id = ss.stock_id
         ORDER BY s.ticket
     """
     GET_TOP_EMISSIONS_BY_VALUE = """
@@ -265,6 +311,37 @@ class Queries:
         ORDER BY reg_le.entity_name, ems.date_register DESC
     """
     GET_INVESTOR_ACTIVITY = """
+        SELECT inv_le.entity_name as investor_name, inv_le.inn,
+               COALESCE(ais.deals_count, 0) as deals_count,
+               COALESCE(ais.stocks_bought, 0) as total_stocks_bought,
+               COALESCE(ais.total_spent, 0) as total_spent
+        FROM investors inv
+        JOIN legal_entities inv_le ON inv.entity_id = inv_le.entity_id
+        LEFT JOIN analytics_investor_sells ais ON inv.investor_id = ais.investor_id
+        ORDER BY total_spent DESC NULLS LAST
+    """
+    # Те же отчеты агрегатами по исходным таблицам — пока сводок нет
+    # (миграция 0005 не применена)
+    GET_ANALYTICS_SUMMARIES_EXIST = """
+        SELECT to_regclass('analytics_emission_status') IS NOT NULL
+           AND to_regclass('analytics_stock_sells') IS NOT NULL
+           AND to_regclass('analytics_investor_sells') IS NOT NULL
+    """
+    GET_EMISSIONS_BY_STATUS_GROUPED = """
+        SELECT CASE WHEN status THEN 'Активна' ELSE 'Не активна' END,
+               COUNT(*) as count, SUM(value) as total_value
+        FROM emissions
+        GROUP BY status
+        ORDER BY status
+    """
+    GET_STOCKS_AVG_PRICE_GROUPED = """
+        SELECT s.ticket, s.nominal_value, AVG(sl.price) as avg_sell_price, COALESCE(SUM(sl.num), 0) as total_sold
+        FROM stocks s
+        LEFT JOIN sells sl ON s.stock_id = sl.stock_id
+        GROUP BY s.stock_id, s.ticket, s.nominal_value
+        ORDER BY s.ticket
+    """
+    GET_INVESTOR_ACTIVITY_GROUPED = """
         SELECT inv_le.entity_name as investor_name, inv_le.inn,
                COUNT(sl.sell_id) as deals_count,
                COALESCE(SUM(sl.num), 0) as total_stocks_bought,
@@ -275,6 +352,10 @@ class Queries:
         GROUP BY inv.investor_id, inv_le.entity_name, inv_le.inn
         ORDER BY total_spent DESC NULLS LAST
     """
+    # Время последнего изменения сводок отчетов
+    GET_EMISSION_STATUS_UPDATED_AT = "SELECT MAX(updated_at) FROM analytics_emission_status"
+    GET_STOCK_SELLS_UPDATED_AT = "SELECT MAX(updated_at) FROM analytics_stock_sells"
+    GET_INVESTOR_SELLS_UPDATED_AT = "SELECT MAX(updated_at) FROM analytics_investor_sells"
     GET_NEW_EMISSIONS_BY_PERIOD = """
         SELECT ems.emission_id, emt_le.entity_name as emitter_name, ems.value,
                CASE WHEN ems.status THEN 'Активна' ELSE 'Не активна' END as status_text,
@@ -287,86 +368,105 @@ class Queries:
     """
 
     # --- Combined Search ---
-    COMBINED_SEARCH = """
-       SELECT DISTINCT
-           'Сделка' AS result_type,
-           sl.sell_id AS id,
-           le_inv.entity_name AS investor_name,
-           le_inv.inn AS investor_inn,
-           s.ticket AS stock_ticker,
-           sl.sale_date::text,
-           le_em.entity_name AS emitter_name,
-           le_reg.entity_name AS registrar_name,
-           ems.date_register::text AS emission_date
-       FROM sells sl
-       LEFT JOIN investors inv ON sl.investor_id = inv.investor_id
-       LEFT JOIN legal_entities le_inv ON inv.entity_id = le_inv.entity_id
-       LEFT JOIN stocks s ON sl.stock_id = s.stock_id
-       LEFT JOIN emissions ems ON s.emission_id = ems.emission_id
-       LEFT JOIN emitters emt ON ems.emitter_id = emt.emitter_id
-       LEFT JOIN legal_entities le_em ON emt.entity_id = le_em.entity_id
-       LEFT JOIN registrats reg ON ems.registrat_id = reg.registrat_id
-       LEFT JOIN legal_entities le_reg ON reg.entity_id = le_reg.entity_id
-       WHERE
-           (LOWER(le_inv.entity_name) LIKE LOWER(%s) OR %s IS NULL) AND
-           (le_inv.inn LIKE %s OR %s IS NULL) AND
-           (LOWER(le_reg.entity_name) LIKE LOWER(%s) OR %s IS NULL) AND
-           (LOWER(le_em.entity_name) LIKE LOWER(%s) OR %s IS NULL) AND
-           (LOWER(s.ticket) LIKE LOWER(%s) OR %s IS NULL) AND
-           (sl.sale_date >= %s OR %s IS NULL) AND
-           (sl.sale_date <= %s OR %s IS NULL)
-
-       UNION ALL
-
-       SELECT DISTINCT
-           'Эмиссия' AS result_type,
-           ems.emission_id AS id,
-           NULL, NULL, NULL, NULL, -- Заглушки для полей сделки
-           le_em.entity_name AS emitter_name,
-           le_reg.entity_name AS registrar_name,
-           ems.date_register::text AS emission_date
-       FROM emissions ems
-       LEFT JOIN emitters emt ON ems.emitter_id = emt.emitter_id
-       LEFT JOIN legal_entities le_em ON emt.entity_id = le_em.entity_id
-       LEFT JOIN registrats reg ON ems.registrat_id = reg.registrat_id
-       LEFT JOIN legal_entities le_reg ON reg.entity_id = le_reg.entity_id
-       WHERE
-           (%s IS NULL) AND -- Placeholder для inv_name
-           (%s IS NULL) AND -- Placeholder для inv_inn
-           (LOWER(le_reg.entity_name) LIKE LOWER(%s) OR %s IS NULL) AND
-           (LOWER(le_em.entity_name) LIKE LOWER(%s) OR %s IS NULL) AND
-           (%s IS NULL) AND -- Placeholder для ticker
-           (ems.date_register >= %s OR %s IS NULL) AND
-           (ems.date_register <= %s OR %s IS NULL) AND
-           NOT EXISTS (
-               SELECT 1
-               FROM sells sl_sub -- Используем другие алиасы внутри подзапроса
-               JOIN stocks s_sub ON sl_sub.stock_id = s_sub.stock_id
-               -- === ДОБАВЛЕННЫЕ JOIN ===
-               JOIN investors inv_sub ON sl_sub.investor_id = inv_sub.investor_id
-               JOIN legal_entities le_inv_sub ON inv_sub.entity_id = le_inv_sub.entity_id
-               -- =======================
-               WHERE s_sub.emission_id = ems.emission_id -- Связь с внешней эмиссией
-               -- Используем алиасы подзапроса (inv_sub, le_inv_sub, s_sub, sl_sub)
-               AND (LOWER(le_inv_sub.entity_name) LIKE LOWER(%s) OR %s IS NULL)
-               AND (le_inv_sub.inn LIKE %s OR %s IS NULL)
-               AND (LOWER(s_sub.ticket) LIKE LOWER(%s) OR %s IS NULL)
-               AND (sl_sub.sale_date >= %s OR %s IS NULL)
-               AND (sl_sub.sale_date <= %s OR %s IS NULL)
-            )
-
-       ORDER BY result_type, emission_date DESC NULLS LAST, sale_date DESC NULLS LAST
-    """
+    # Сделки по всем фильтрам и эмиссии без подходящих сделок. Эмиссии
+    # не ищутся, если заданы фильтры только для сделок (инвестор, ИНН, тикер)
+    COMBINED_SEARCH = UnionQuery(
+        "COMBINED_SEARCH",
+        [
+            FilteredQuery(
+                "COMBINED_SEARCH_SELLS",
+                """
+                    SELECT DISTINCT
+                        'Сделка' AS result_type,
+                        sl.sell_id AS id,
+                        le_inv.entity_name AS investor_name,
+                        le_inv.inn AS investor_inn,
+                        s.ticket AS stock_ticker,
+                        sl.sale_date::text,
+                        le_em.entity_name AS emitter_name,
+                        le_reg.entity_name AS registrar_name,
+                        ems.date_register::text AS emission_date
+                    FROM sells sl
+                    LEFT JOIN investors inv ON sl.investor_id = inv.investor_id
+                    LEFT JOIN legal_entities le_inv ON inv.entity_id = le_inv.entity_id
+                    LEFT JOIN stocks s ON sl.stock_id = s.stock_id
+                    LEFT JOIN emissions ems ON s.emission_id = ems.emission_id
+                    LEFT JOIN emitters emt ON ems.emitter_id = emt.emitter_id
+                    LEFT JOIN legal_entities le_em ON emt.entity_id = le_em.entity_id
+                    LEFT JOIN registrats reg ON ems.registrat_id = reg.registrat_id
+                    LEFT JOIN legal_entities le_reg ON reg.entity_id = le_reg.entity_id
+                """,
+                {
+                    "investor": "LOWER(le_inv.entity_name) LIKE LOWER(%s)",
+                    "inn": "le_inv.inn LIKE %s",
+                    "registrar": "LOWER(le_reg.entity_name) LIKE LOWER(%s)",
+                    "emitter": "LOWER(le_em.entity_name) LIKE LOWER(%s)",
+                    "ticker": "LOWER(s.ticket) LIKE LOWER(%s)",
+                    "date_start": "sl.sale_date >= %s",
+                    "date_end": "sl.sale_date <= %s",
+                },
+            ),
+            FilteredQuery(
+                "COMBINED_SEARCH_EMISSIONS",
+                """
+                    SELECT DISTINCT
+                        'Эмиссия' AS result_type,
+                        ems.emission_id AS id,
+                        NULL, NULL, NULL, NULL, -- Заглушки для полей сделки
+                        le_em.entity_name AS emitter_name,
+                        le_reg.entity_name AS registrar_name,
+                        ems.date_register::text AS emission_date
+                    FROM emissions ems
+                    LEFT JOIN emitters emt ON ems.emitter_id = emt.emitter_id
+                    LEFT JOIN legal_entities le_em ON emt.entity_id = le_em.entity_id
+                    LEFT JOIN registrats reg ON ems.registrat_id = reg.registrat_id
+                    LEFT JOIN legal_entities le_reg ON reg.entity_id = le_reg.entity_id
+                """,
+                {
+                    "registrar": "LOWER(le_reg.entity_name) LIKE LOWER(%s)",
+                    "emitter": "LOWER(le_em.entity_name) LIKE LOWER(%s)",
+                    "date_start": "ems.date_register >= %s",
+                    "date_end": "ems.date_register <= %s",
+                },
+                conditions=[
+                    Exists(
+                        FilteredQuery(
+                            "COMBINED_SEARCH_EMISSION_SELLS",
+                            """
+                                SELECT 1
+                                FROM sells sl_sub
+                                JOIN stocks s_sub ON sl_sub.stock_id = s_sub.stock_id
+                            """,
+                            {
+                                "date_start": "sl_sub.sale_date >= %s",
+                                "date_end": "sl_sub.sale_date <= %s",
+                            },
+                            conditions=["s_sub.emission_id = ems.emission_id"],
+                        ),
+                        negate=True,
+                    ),
+                ],
+                skip_if=("investor", "inn", "ticker"),
+            ),
+        ],
+        order_by="result_type, emission_date DESC NULLS LAST, sale_date DESC NULLS LAST",
+    )
 
     # --- Clients ---
-    GET_ALL_CLIENTS = """
+    GET_ALL_CLIENTS = FilteredQuery(
+        "GET_ALL_CLIENTS",
+        """
         SELECT c.id, c.first_name, c.last_name, c.phone
         FROM Client c
-        WHERE (LOWER(c.first_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(c.last_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (c.phone LIKE %s OR %s IS NULL)
-        ORDER BY c.last_name, c.first_name
-    """
+        """,
+        {
+            "first_name": "LOWER(c.first_name) LIKE LOWER(%s)",
+            "last_name": "LOWER(c.last_name) LIKE LOWER(%s)",
+            # Цифры номера без оформления: "+7 (926) 234-23-23" -> "79262342323"
+            "phone": "regexp_replace(c.phone, '\\D', '', 'g') LIKE %s",
+        },
+        order_by="c.last_name, c.first_name",
+    )
     GET_CLIENT_BY_ID = """
         SELECT c.id, c.first_name, c.last_name, c.phone
         FROM Client c
@@ -434,20 +534,46 @@ class Queries:
     """
 
     # --- Deposits ---
-    GET_ALL_DEPOSITS = """
+    GET_ALL_DEPOSITS = FilteredQuery(
+        "GET_ALL_DEPOSITS",
+        """
         SELECT d.id, c.first_name, c.last_name, d.amount,
                d.open_date, d.close_date, d.interest_rate,
                d.status, d.term, d.type
         FROM Deposit d
         JOIN Client c ON d.client_id = c.id
-        WHERE (LOWER(c.first_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(c.last_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (d.status = %s OR %s IS NULL)
-          AND (d.type = %s OR %s IS NULL)
-          AND (d.open_date >= %s OR %s IS NULL)
-          AND (d.open_date <= %s OR %s IS NULL)
-        ORDER BY d.open_date DESC
-    """
+        """,
+        {
+            "first_name": "LOWER(c.first_name) LIKE LOWER(%s)",
+            "last_name": "LOWER(c.last_name) LIKE LOWER(%s)",
+            "status": "d.status = %s",
+            "type": "d.type = %s",
+            "date_start": "d.open_date >= %s",
+            "date_end": "d.open_date <= %s",
+        },
+        keyset=(("d.open_date", 4), ("d.id", 0)),
+    )
+    # Окно «Вклады»: столбцы в порядке таблицы окна
+    GET_DEPOSITS_TABLE = FilteredQuery(
+        "GET_DEPOSITS_TABLE",
+        """
+        SELECT d.id,
+               CONCAT(c.last_name, ' ', c.first_name) as client_name,
+               d.amount, d.open_date, d.close_date, d.interest_rate,
+               EXTRACT(EPOCH FROM d.term)/86400 as term_days,
+               d.type, d.status
+        FROM Deposit d
+        JOIN Client c ON d.client_id = c.id
+        """,
+        {
+            "deposit_id": "d.id = %s",
+            "client_id": "d.client_id = %s",
+            "client_name": "(LOWER(c.first_name) LIKE LOWER(%s) OR LOWER(c.last_name) LIKE LOWER(%s))",
+            "type": "d.type = %s",
+            "status": "d.status = %s",
+        },
+        keyset=(("d.open_date", 3), ("d.id", 0)),
+    )
     GET_DEPOSIT_BY_ID = """
         SELECT d.id, d.amount, d.close_date, d.open_date,
                d.interest_rate, d.status, d.term, d.type, d.client_id
@@ -485,6 +611,9 @@ class Queries:
         WHERE id = %s
     """
     DELETE_DEPOSIT = "DELETE FROM Deposit WHERE id = %s"
+    # Блокирует вклад: новые транзакции по нему ждут завершения удаления
+    LOCK_DEPOSIT = "SELECT id FROM Deposit WHERE id = %s FOR UPDATE"
+    COUNT_DEPOSIT_TRANSACTIONS = "SELECT COUNT(*) FROM Transaction WHERE deposit_id = %s"
 
     # --- Transactions ---
     GET_DEPOSIT_TRANSACTIONS = """
@@ -493,15 +622,37 @@ class Queries:
         WHERE t.deposit_id = %s
         ORDER BY t.date DESC
     """
-    GET_ALL_TRANSACTIONS = """
+    GET_ALL_TRANSACTIONS = FilteredQuery(
+        "GET_ALL_TRANSACTIONS",
+        """
         SELECT t.id, t.amount, t.date, t.type,
                d.id as deposit_id, d.type as deposit_type,
                c.id as client_id, c.first_name, c.last_name
         FROM Transaction t
         JOIN Deposit d ON t.deposit_id = d.id
         JOIN Client c ON d.client_id = c.id
-        ORDER BY t.date DESC
-    """
+        """,
+        {},
+        keyset=(("t.date", 2), ("t.id", 0)),
+    )
+    # Окно «Транзакции»
+    GET_TRANSACTIONS_TABLE = FilteredQuery(
+        "GET_TRANSACTIONS_TABLE",
+        """
+        SELECT t.id, t.amount, t.date, t.type,
+               d.type || ' (' || c.last_name || ' ' || c.first_name || ')' as deposit_info
+        FROM Transaction t
+        JOIN Deposit d ON t.deposit_id = d.id
+        JOIN Client c ON d.client_id = c.id
+        """,
+        {
+            "deposit_id": "t.deposit_id = %s",
+            "type": "t.type = %s",
+            "amount_from": "t.amount >= %s",
+            "amount_to": "t.amount <= %s",
+        },
+        keyset=(("t.date", 2), ("t.id", 0)),
+    )
     ADD_TRANSACTION = """
         INSERT INTO Transaction (deposit_id, amount, date, type)
         VALUES (%s, %s, %s, %s)
@@ -550,20 +701,47 @@ class Queries:
     """
 
     # --- Reports ---
-    GET_ALL_REPORTS = """
+    GET_ALL_REPORTS = FilteredQuery(
+        "GET_ALL_REPORTS",
+        """
         SELECT r.id, r.content, r.creation_date,
                t.id as transaction_id, t.type as transaction_type,
                e.first_name as emp_first_name, e.last_name as emp_last_name
         FROM Report r
         JOIN Transaction t ON r.transaction_id = t.id
         JOIN Employee e ON r.employee_id = e.id
-        WHERE (LOWER(e.first_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (LOWER(e.last_name) LIKE LOWER(%s) OR %s IS NULL)
-          AND (t.type = %s OR %s IS NULL)
-          AND (r.creation_date >= %s OR %s IS NULL)
-          AND (r.creation_date <= %s OR %s IS NULL)
-        ORDER BY r.creation_date DESC
-    """
+        """,
+        {
+            "first_name": "LOWER(e.first_name) LIKE LOWER(%s)",
+            "last_name": "LOWER(e.last_name) LIKE LOWER(%s)",
+            "transaction_type": "t.type = %s",
+            "date_start": "r.creation_date >= %s",
+            "date_end": "r.creation_date <= %s",
+        },
+        keyset=(("r.creation_date", 2), ("r.id", 0)),
+    )
+    # Окно «Отчеты»
+    GET_REPORTS_TABLE = FilteredQuery(
+        "GET_REPORTS_TABLE",
+        """
+        SELECT r.id, r.creation_date,
+               e.last_name || ' ' || e.first_name as employee_name,
+               c.last_name || ' ' || c.first_name as client_name,
+               t.type as transaction_type, t.amount,
+               r.content
+        FROM Report r
+        JOIN Employee e ON r.employee_id = e.id
+        JOIN Transaction t ON r.transaction_id = t.id
+        JOIN Deposit d ON t.deposit_id = d.id
+        JOIN Client c ON d.client_id = c.id
+        """,
+        {
+            "employee_id": "r.employee_id = %s",
+            "employee_last_name": "LOWER(e.last_name) LIKE LOWER(%s)",
+            "client_last_name": "LOWER(c.last_name) LIKE LOWER(%s)",
+        },
+        keyset=(("r.creation_date", 1), ("r.id", 0)),
+    )
     ADD_REPORT = """
         INSERT INTO Report (content, creation_date, transaction_id, employee_id)
         VALUES (%s, %s, %s, %s) RETURNING id
@@ -600,3 +778,21 @@ class Queries:
         GROUP BY t.type
         ORDER BY count DESC
     """
+
+    # --- Statistics (окно «Статистика», один проход по каждой таблице) ---
+    # Строка с total_row = 1 — итоги по всем вкладам, остальные — по типам
+    GET_DEPOSIT_STATISTICS = """
+        SELECT GROUPING(type) as total_row, type,
+               COUNT(*) as deposits_total,
+               COUNT(*) FILTER (WHERE status = 'open') as deposits_open,
+               COALESCE(SUM(amount), 0) as total_amount,
+               AVG(interest_rate) as avg_rate,
+               COUNT(DISTINCT client_id) as clients_with_deposits
+        FROM Deposit
+        GROUP BY GROUPING SETS ((), (type))
+    """
+    GET_CLIENT_STATISTICS = "SELECT COUNT(*) FROM Client"
+    GET_TRANSACTION_STATISTICS = """
+        SELECT COUNT(*), COALESCE(SUM(ABS(amount)), 0), AVG(ABS(amount))
+        FROM Transaction
+    """
@@ -0,0 +1,244 @@
+import textwrap
+import threading
+
+
+# Текст собранного запроса -> имя его формы (для PREPARE и статистики)
+_shapes = {}
+_shapes_lock = threading.Lock()
+
+
+def contains(text):
+    """Шаблон LIKE «содержит text»: %, _ и \\ во вводе пользователя экранируются.
+
+    Для пустой строки (или None) возвращает None — фильтр не применяется.
+    """
+    if not text:
+        return None
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def shape_name(sql):
+    """Имя формы запроса, собранного FilteredQuery/UnionQuery, или None"""
+    return _shapes.get(sql)
+
+
+def _register_shape(name, sql):
+    if sql not in _shapes:
+        with _shapes_lock:
+            _shapes.setdefault(sql, name)
+
+
+class FilteredQuery:
+    """SELECT, в который попадают только условия заданных фильтров.
+
+    filters — упорядоченный словарь {имя фильтра: условие с %s}; условие
+    добавляется, если значение фильтра не None, и получает это значение
+    для каждого %s. Условия идут в порядке объявления, поэтому каждой
+    комбинации фильтров соответствует один и тот же текст запроса — сервер
+    кэширует его план, а реестр подготовленных операторов знает его по имени
+    формы (имя запроса + маска активных фильтров).
+
+    conditions — условия, входящие в запрос всегда: строки или вложенные
+    Exists. skip_if — фильтры, при заданном значении любого из которых
+    часть UnionQuery не нужна вовсе.
+
+    keyset — ключ сортировки для постраничного чтения (page): пары
+    (выражение, номер столбца результата), например
+    (("t.date", 2), ("t.id", 0)); строки идут по убыванию ключа,
+    последний элемент ключа должен быть уникальным. Если order_by не
+    задан, он строится по keyset.
+    """
+
+    def __init__(self, name, select, filters, order_by=None, conditions=(), skip_if=(),
+                 keyset=()):
+        self.name = name
+        self.select = textwrap.dedent(select).strip()
+        self.filters = dict(filters)
+        self.keyset = tuple(keyset)
+        self.order_by = order_by or self._keyset_order("DESC")
+        self.conditions = tuple(conditions)
+        self.skip_if = frozenset(skip_if)
+
+    @property
+    def filter_names(self):
+        """Имена фильтров запроса и вложенных условий в порядке объявления"""
+        names = list(self.filters)
+        for condition in self.conditions:
+            if not isinstance(condition, str):
+                names += [name for name in condition.filter_names if name not in names]
+        return names
+
+    def compose(self, values, order=True, extra=None):
+        """Текст и параметры без регистрации формы; None — часть пропускается.
+
+        extra — дополнительное условие (sql, params) после условий фильтров.
+        """
+        if any(values.get(name) is not None for name in self.skip_if):
+            return None
+        clauses, params = [], []
+        for condition in self.conditions:
+            if isinstance(condition, str):
+                clauses.append(condition)
+            else:
+                sql, condition_params = condition.compose(values)
+                clauses.append(sql)
+                params += condition_params
+        for name, predicate in self.filters.items():
+            value = values.get(name)
+            if value is None:
+                continue
+            clauses.append(predicate)
+            params += [value] * predicate.count("%s")
+        if extra:
+            clauses.append(extra[0])
+            params += extra[1]
+
+        sql = self.select
+        if clauses:
+            sql += "\nWHERE " + "\n  AND ".join(clauses)
+        if order and self.order_by:
+            sql += f"\nORDER BY {self.order_by}"
+        return sql, params
+
+    def build(self, values=None):
+        """Возвращает (sql, params) для значений фильтров"""
+        values = _checked(self, values)
+        sql, params = self.compose(values)
+        _register_shape(_shape(self, values), sql)
+        return sql, params
+
+    def page(self, values=None, after=None, before=None, limit=100, at=None, stop=None):
+        """(sql, params) страницы из limit строк (keyset-пагинация).
+
+        after — ключ последней строки предыдущей страницы (следующая
+        страница), before — ключ первой строки текущей (предыдущая
+        страница; строки возвращаются в обратном порядке), at — ключ
+        первой строки текущей страницы (страница перечитывается).
+        stop — ключ последней строки диапазона (включительно): вместе
+        с after или без него читается диапазон ключей; limit=None —
+        без ограничения числа строк.
+        Смещение не используется: сервер находит начало страницы по
+        индексу ключа сортировки, сколько бы строк ни было до нее.
+        """
+        if not self.keyset:
+            raise ValueError(f"У запроса {self.name} не задан keyset")
+        values = _checked(self, values)
+        key, operator, direction, suffix = (
+            (after, "<", "DESC", "N") if after is not None else
+            (before, ">", "ASC", "P") if before is not None else
+            (at, "<=", "DESC", "A") if at is not None else
+            (None, None, "DESC", "S")
+        )
+        conditions = []
+        if key is not None:
+            conditions.append(self._key_condition(operator, key))
+        if stop is not None:
+            conditions.append(self._key_condition(">=", stop))
+            suffix += "R"
+        extra = None
+        if conditions:
+            extra = (
+                " AND ".join(sql for sql, _ in conditions),
+                [param for _, params in conditions for param in params],
+            )
+        sql, params = self.compose(values, order=False, extra=extra)
+        sql += f"\nORDER BY {self._keyset_order(direction)}"
+        if limit is not None:
+            sql += "\nLIMIT %s"
+            params.append(limit)
+        else:
+            suffix += "U"
+        _register_shape(f"{_shape(self, values)}_{suffix}", sql)
+        return sql, params
+
+    def by_ids(self, values, ids):
+        """(sql, params) строк с первичными ключами ids, проходящих фильтры.
+
+        Первичный ключ — последний (уникальный) элемент keyset.
+        """
+        if not self.keyset:
+            raise ValueError(f"У запроса {self.name} не задан keyset")
+        values = _checked(self, values)
+        extra = (f"{self.keyset[-1][0]} = ANY(%s)", [list(ids)])
+        sql, params = self.compose(values, extra=extra)
+        _register_shape(f"{_shape(self, values)}_K", sql)
+        return sql, params
+
+    def key(self, row):
+        """Значение keyset для строки результата"""
+        return tuple(row[index] for _, index in self.keyset)
+
+    def _key_condition(self, operator, key):
+        columns = ", ".join(expression for expression, _ in self.keyset)
+        placeholders = ", ".join(["%s"] * len(self.keyset))
+        return f"({columns}) {operator} ({placeholders})", list(key)
+
+    def _keyset_order(self, direction):
+        if not self.keyset:
+            return None
+        return ", ".join(f"{expression} {direction}" for expression, _ in self.keyset)
+
+
+class Exists:
+    """Условие [NOT] EXISTS (подзапрос) с собственными фильтрами"""
+
+    def __init__(self, query, negate=False):
+        self.query = query
+        self.negate = negate
+
+    @property
+    def filter_names(self):
+        return self.query.filter_names
+
+    def compose(self, values):
+        sql, params = self.query.compose(values)
+        sql = sql.replace("\n", "\n    ")
+        return f"{'NOT ' if self.negate else ''}EXISTS (\n    {sql}\n)", params
+
+
+class UnionQuery:
+    """UNION ALL нескольких FilteredQuery с общими значениями фильтров"""
+
+    def __init__(self, name, parts, order_by=None):
+        self.name = name
+        self.parts = tuple(parts)
+        self.order_by = order_by
+
+    @property
+    def filter_names(self):
+        names = []
+        for part in self.parts:
+            names += [name for name in part.filter_names if name not in names]
+        return names
+
+    def build(self, values=None):
+        values = _checked(self, values)
+        texts, params = [], []
+        for part in self.parts:
+            composed = part.compose(values)
+            if composed is not None:
+                texts.append(composed[0])
+                params += composed[1]
+        sql = "\n\nUNION ALL\n\n".join(texts)
+        if self.order_by:
+            sql += f"\n\nORDER BY {self.order_by}"
+        _register_shape(_shape(self, values), sql)
+        return sql, params
+
+
+def _checked(query, values):
+    values = values or {}
+    unknown = set(values) - set(query.filter_names)
+    if unknown:
+        raise ValueError(f"Неизвестные фильтры {query.name}: {', '.join(sorted(unknown))}")
+    return values
+
+
+def _shape(query, values):
+    """Имя формы: имя запроса и битовая маска активных фильтров"""
+    mask = 0
+    for bit, name in enumerate(query.filter_names):
+        if values.get(name) is not None:
+            mask |= 1 << bit
+    return f"{query.name}_F{mask}"
@@ -0,0 +1,157 @@
+import keyword
+import threading
+from operator import attrgetter
+
+from .prepared import PreparingCursor
+
+
+# Текстовые столбцы с небольшим числом различных значений: одинаковые
+# строки результата хранятся одним объектом (словарное кодирование)
+DICTIONARY_COLUMNS = frozenset({
+    "investor_name", "stock_ticket", "type", "status",
+    "client_name", "employee_name", "emitter_name", "registrar_name",
+    "transaction_type", "status_text",
+})
+
+_record_types = {}
+_record_types_lock = threading.Lock()
+
+
+class Record:
+    """Строка результата: значения в __slots__ по именам столбцов.
+
+    Ведет себя как кортеж (индекс, распаковка, len, сравнение), поэтому
+    заменяет строки psycopg2 без изменения кода, который их читает;
+    значения доступны и как атрибуты: row.investor_name.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __iter__(self):
+        return iter(self._values())
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            return getattr(self, self._fields[index])
+        return self._values()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, tuple)):
+            return self._values() == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"Record({values})"
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+
+def record_type(names):
+    """Класс Record для столбцов names (создается один раз на набор имен)"""
+    names = tuple(names)
+    cls = _record_types.get(names)
+    if cls is None:
+        fields = _field_names(names)
+        getter = attrgetter(*fields) if len(fields) > 1 else None
+        namespace = {"__slots__": fields, "_fields": fields, "__init__": _make_init(fields)}
+        if getter is not None:
+            # attrgetter с несколькими именами сразу возвращает кортеж
+            namespace["_values"] = lambda self: getter(self)
+        with _record_types_lock:
+            cls = _record_types.setdefault(names, type("Record", (Record,), namespace))
+    return cls
+
+
+def _make_init(fields):
+    # Как namedtuple: __init__ с присваиваниями по именам в несколько раз
+    # быстрее цикла setattr, а строк в результате бывают миллионы
+    source = (
+        f"def __init__(self, {', '.join(fields)}):\n"
+        + "".join(f"    self.{name} = {name}\n" for name in fields)
+        if fields else "def __init__(self):\n    pass\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["__init__"]
+
+
+def _field_names(names):
+    # Имена столбцов вида "?column?", повторы и ключевые слова —
+    # недопустимые имена атрибутов
+    fields = []
+    for index, name in enumerate(names):
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_"):
+            name = f"column{index}"
+        while name in fields:
+            name += "_"
+        fields.append(name)
+    return tuple(fields)
+
+
+class RecordCursor(PreparingCursor):
+    """Курсор, возвращающий строки Record.
+
+    Значения столбцов из encoded (по умолчанию DICTIONARY_COLUMNS)
+    кодируются словарем курсора: повторяющаяся строка хранится
+    в памяти один раз на весь результат, в том числе при чтении
+    порциями (fetchmany, серверные курсоры).
+    """
+
+    encoded = DICTIONARY_COLUMNS
+
+    def execute(self, query, vars=None):
+        self._record_type = None
+        return super().execute(query, vars)
+
+    def fetchone(self):
+        row = super().fetchone()
+        return None if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        return self._convert(rows)
+
+    def fetchall(self):
+        return self._convert(super().fetchall())
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+    def _convert(self, rows):
+        if not rows:
+            return rows
+        if getattr(self, "_record_type", None) is None:
+            names = [column.name for column in self.description]
+            self._record_type = record_type(names)
+            self._dictionaries = [
+                ({} if name in self.encoded else None) for name in names
+            ]
+        encoders = [
+            (index, dictionary) for index, dictionary in enumerate(self._dictionaries)
+            if dictionary is not None
+        ]
+        cls = self._record_type
+        if not encoders:
+            return [cls(*row) for row in rows]
+        result = []
+        for row in rows:
+            values = list(row)
+            for index, dictionary in encoders:
+                value = values[index]
+                if value is not None:
+                    values[index] = dictionary.setdefault(value, value)
+            result.append(cls(*values))
+        return result
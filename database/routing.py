@@ -0,0 +1,236 @@
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.pool import PoolError
+
+from .cache import tables_written
+from .pool import PoolTimeoutError
+
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_READ_START_RE = re.compile(r"^\s*\(*\s*(?:SELECT|WITH|VALUES|TABLE|SHOW)\b", re.I)
+# Чтения, которые блокируют строки или меняют состояние сервера
+_NOT_READ_ONLY_RE = re.compile(
+    r"\bFOR\s+(?:UPDATE|SHARE|NO\s+KEY\s+UPDATE|KEY\s+SHARE)\b"
+    r"|\b(?:nextval|setval|pg_advisory\w*|set_config)\s*\(",
+    re.I,
+)
+
+# Задержка реплики, с; 0 — если реплика получает WAL и применила все
+# полученные записи. Без работающего приемника WAL (связь с основным сервером
+# потеряна) равенство позиций ничего не значит: задержка — время с последней
+# примененной транзакции, NULL — неизвестна. Без прав pg_read_all_stats
+# status скрыт (NULL) — тогда достаточно наличия приемника
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE COALESCE(status, 'streaming') = 'streaming'
+        ) THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaUnavailableError(OperationalError):
+    """Реплика недоступна или отменила запрос — его можно повторить на основном сервере"""
+
+
+@lru_cache(maxsize=1024)
+def is_read_only(sql):
+    """Оператор только читает данные и может выполняться на реплике"""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _COMMENT_RE.sub(" ", sql)
+    return (
+        bool(_READ_START_RE.match(sql))
+        and not _NOT_READ_ONLY_RE.search(sql)
+        and not tables_written(sql)
+    )
+
+
+class _ReplicaState:
+    def __init__(self):
+        self.lag = None
+        self.checked_at = None
+        self.down_until = 0.0
+        self.checking = False
+        self.last_error = None
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Выбор пула для чтения: реплика или основной сервер.
+
+    Реплика используется, пока ее задержка не больше max_lag секунд
+    (проверяется не чаще раза в check_interval); недоступная реплика
+    исключается на retry_interval. В течение sticky_seconds после
+    фиксации изменений все чтения процесса идут на основной сервер —
+    пользователь сразу видит свои записи.
+    """
+
+    def __init__(self, max_lag=5.0, check_interval=2.0, retry_interval=30.0,
+                 sticky_seconds=5.0):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self.sticky_seconds = sticky_seconds
+        self._lock = threading.Lock()
+        self._pools = []
+        self._states = {}
+        self._next = 0
+        self._last_write = None
+        self._local = threading.local()
+        self._stats = {
+            "replica_reads": 0,
+            "primary_reads": 0,
+            "sticky_reads": 0,
+            "lag_fallbacks": 0,
+            "failures": 0,
+        }
+
+    def configure(self, pools, **settings):
+        """Задает пулы реплик; состояние уже известных реплик сохраняется"""
+        with self._lock:
+            for name, value in settings.items():
+                setattr(self, name, value)
+            self._pools = list(pools)
+            self._states = {
+                id(pool): self._states.get(id(pool)) or _ReplicaState()
+                for pool in self._pools
+            }
+
+    @property
+    def enabled(self):
+        return bool(self._pools)
+
+    def note_write(self):
+        """Фиксация изменений на основном сервере"""
+        self._last_write = time.monotonic()
+
+    def _sticky(self):
+        if getattr(self._local, "pinned", 0):
+            return True
+        last_write = self._last_write
+        return last_write is not None and time.monotonic() - last_write < self.sticky_seconds
+
+    @contextmanager
+    def pinned(self):
+        """Все чтения текущего потока внутри блока идут на основной сервер"""
+        self._local.pinned = getattr(self._local, "pinned", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.pinned -= 1
+
+    def read_pool(self):
+        """Пул реплики для очередного чтения или None — читать с основного сервера"""
+        if not self._pools:
+            return None
+        if self._sticky():
+            self._count("sticky_reads")
+            return None
+        with self._lock:
+            pools = self._pools[self._next:] + self._pools[:self._next]
+            self._next = (self._next + 1) % len(self._pools)
+        lagging = False
+        for pool in pools:
+            state = self._states.get(id(pool))
+            if state is None:
+                continue
+            usable = self._usable(pool, state)
+            if usable:
+                with self._lock:
+                    self._stats["replica_reads"] += 1
+                    state.reads += 1
+                return pool
+            lagging = lagging or usable is None
+        self._count("lag_fallbacks" if lagging else "primary_reads")
+        return None
+
+    def _usable(self, pool, state):
+        """True — реплика пригодна, None — отстает или ее пул занят,
+        False — недоступна"""
+        now = time.monotonic()
+        if state.down_until > now:
+            return False
+        with self._lock:
+            stale = state.checked_at is None or now - state.checked_at >= self.check_interval
+            check = stale and not state.checking
+            if check:
+                state.checking = True
+        if check:
+            try:
+                state.lag = self._measure_lag(pool)
+                state.last_error = None
+            except (PoolTimeoutError, PoolError):
+                # Все соединения реплики заняты — она исправна, это чтение
+                # идет на основной сервер
+                return None
+            except (OperationalError, InterfaceError) as e:
+                self.report_failure(pool, e)
+                return False
+            finally:
+                state.checked_at = time.monotonic()
+                state.checking = False
+        elif state.lag is None:
+            # Первая проверка еще идет в другом потоке
+            return False
+        return True if state.lag <= self.max_lag else None
+
+    def _measure_lag(self, pool):
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_QUERY)
+                lag = cursor.fetchone()[0]
+            conn.rollback()
+            # Неизвестная задержка — больше любой допустимой
+            return math.inf if lag is None else float(lag)
+        finally:
+            pool.putconn(conn)
+
+    def report_failure(self, pool, error):
+        """Исключает реплику из выбора на retry_interval секунд"""
+        state = self._states.get(id(pool))
+        if state is None:
+            return
+        print(f"Replica error ({pool.conn_params.get('host')}:{pool.conn_params.get('port')}): {error}")
+        with self._lock:
+            state.down_until = time.monotonic() + self.retry_interval
+            state.last_error = str(error)
+            state.lag = None
+            state.checked_at = None
+            self._stats["failures"] += 1
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["replicas"] = [
+                {
+                    "address": f"{pool.conn_params.get('host')}:{pool.conn_params.get('port')}",
+                    "lag": self._states[id(pool)].lag,
+                    "available": self._states[id(pool)].down_until <= now,
+                    "reads": self._states[id(pool)].reads,
+                    "last_error": self._states[id(pool)].last_error,
+                }
+                for pool in self._pools
+            ]
+            stats["sticky"] = self._last_write is not None and now - self._last_write < self.sticky_seconds
+            return stats
+
+
+# Общий для процесса маршрутизатор (как и пулы соединений)
+router = ReplicaRouter()
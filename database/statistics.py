@@ -0,0 +1,106 @@
+import datetime
+
+from .cache import result_cache
+from .db import Database
+from .queries import Queries
+from .routing import ReplicaUnavailableError
+
+
+# Снимок статистики кэшируется как результат запроса к этим таблицам:
+# запись в любую из них удаляет его из кэша
+_TABLES = frozenset({"deposit", "client", "transaction"})
+_CACHE_KEY = ("statistics_snapshot", None)
+
+
+class StatisticsSnapshot:
+    """Показатели окна «Статистика» на один момент времени.
+
+    amount_by_type — [(тип вклада, сумма)] по убыванию суммы;
+    средние значения — None, если строк нет.
+    """
+
+    def __init__(
+        self, deposits_total, deposits_open, deposits_amount, average_interest_rate,
+        clients_total, clients_with_deposits,
+        transactions_total, transactions_amount, average_transaction,
+        amount_by_type, taken_at,
+    ):
+        self.deposits_total = deposits_total
+        self.deposits_open = deposits_open
+        self.deposits_amount = deposits_amount
+        self.average_interest_rate = average_interest_rate
+        self.clients_total = clients_total
+        self.clients_with_deposits = clients_with_deposits
+        self.transactions_total = transactions_total
+        self.transactions_amount = transactions_amount
+        self.average_transaction = average_transaction
+        self.amount_by_type = amount_by_type
+        self.taken_at = taken_at
+
+    @property
+    def deposits_per_client(self):
+        """Среднее число вкладов у клиента, у которого они есть"""
+        if not self.clients_with_deposits:
+            return None
+        return self.deposits_total / self.clients_with_deposits
+
+    def __repr__(self):
+        return (
+            f"<StatisticsSnapshot {self.taken_at:%Y-%m-%d %H:%M:%S}: "
+            f"{self.deposits_total} deposits, {self.clients_total} clients, "
+            f"{self.transactions_total} transactions>"
+        )
+
+
+class StatisticsService:
+    """Собирает StatisticsSnapshot: по одному запросу на таблицу внутри
+    одной транзакции REPEATABLE READ READ ONLY, поэтому все показатели
+    согласованы между собой (на реплике, если она настроена)."""
+
+    def __init__(self, db=None):
+        self.db = db or Database()
+
+    def snapshot(self, cache=True):
+        """Снимок статистики; cache=True — из кэша, пока таблицы не менялись"""
+        if cache:
+            cached = result_cache.get(_CACHE_KEY)
+            if cached is not None:
+                return cached[0]
+        versions = result_cache.snapshot(_TABLES)
+        try:
+            snapshot = self._collect(readonly=True)
+        except ReplicaUnavailableError:
+            snapshot = self._collect(readonly=False)
+        result_cache.store(_CACHE_KEY, [snapshot], _TABLES, versions)
+        return snapshot
+
+    def _collect(self, readonly):
+        with self.db.get_connection(readonly) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                cursor.execute(Queries.GET_DEPOSIT_STATISTICS)
+                deposit_rows = cursor.fetchall()
+                cursor.execute(Queries.GET_CLIENT_STATISTICS)
+                (clients_total,) = cursor.fetchone()
+                cursor.execute(Queries.GET_TRANSACTION_STATISTICS)
+                transactions_total, transactions_amount, average_transaction = cursor.fetchone()
+            conn.rollback()
+
+        totals = next(row for row in deposit_rows if row[0] == 1)
+        amount_by_type = sorted(
+            ((row[1], row[4]) for row in deposit_rows if row[0] == 0),
+            key=lambda item: item[1], reverse=True,
+        )
+        return StatisticsSnapshot(
+            deposits_total=totals[2],
+            deposits_open=totals[3],
+            deposits_amount=totals[4],
+            average_interest_rate=totals[5],
+            clients_total=clients_total,
+            clients_with_deposits=totals[6],
+            transactions_total=transactions_total,
+            transactions_amount=transactions_amount,
+            average_transaction=average_transaction,
+            amount_by_type=amount_by_type,
+            taken_at=datetime.datetime.now(),
+        )
@@ -0,0 +1,123 @@
+import re
+
+from psycopg2 import extensions
+
+
+_RETURNING_RE = re.compile(r"\bRETURNING\b", re.I)
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_ ]*$")
+
+
+class Returning:
+    """Значение RETURNING оператора из очереди UnitOfWork.
+
+    До отправки очереди подставляется в параметры следующих операторов
+    как ссылка на серверную переменную транзакции; после фиксации
+    значение доступно в value.
+    """
+
+    def __init__(self, index, cast):
+        self.index = index
+        self.cast = cast
+        self.value = None
+        self.resolved = False
+
+    @property
+    def setting(self):
+        return f"uow.v{self.index}"
+
+    def __conform__(self, protocol):
+        if protocol is extensions.ISQLQuote:
+            return self
+
+    def getquoted(self):
+        if self.resolved:
+            return extensions.adapt(self.value).getquoted()
+        return f"NULLIF(current_setting('{self.setting}'), '')::{self.cast}".encode()
+
+    def __repr__(self):
+        return f"<Returning {self.setting}: {self.value!r}>"
+
+
+class UnitOfWork:
+    """Группа операторов, выполняемых на одном соединении в одной транзакции.
+
+    execute() ставит оператор в очередь; очередь отправляется на сервер
+    одним многооператорным запросом при fetch_one/fetch_all или при
+    фиксации. Значение RETURNING оператора можно передать параметром
+    следующему оператору той же очереди — оно сохраняется в локальной
+    переменной транзакции (set_config) и не требует отдельного round trip.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._queue = []
+        self._pending = []
+        self._counter = 0
+
+    def execute(self, query, params=None, returning=None):
+        """Ставит оператор в очередь.
+
+        returning — SQL-тип значения единственного столбца RETURNING
+        (например "integer"); тогда возвращается объект Returning.
+        """
+        with self.conn.cursor() as cursor:
+            sql = self._mogrify(cursor, query, params)
+        if not returning:
+            self._queue.append(sql)
+            return None
+        if not _RETURNING_RE.search(query):
+            raise ValueError("Оператор без RETURNING не может вернуть значение")
+        if not _IDENTIFIER_RE.match(returning):
+            raise ValueError(f"Недопустимый тип: {returning!r}")
+        self._counter += 1
+        value = Returning(self._counter, returning)
+        self._queue.append(
+            f"WITH r AS ({sql}) SELECT set_config('{value.setting}', "
+            f"COALESCE((SELECT * FROM r LIMIT 1)::text, ''), true)"
+        )
+        self._pending.append(value)
+        return value
+
+    def fetch_one(self, query, params=None):
+        """Отправляет очередь вместе с запросом и возвращает первую строку"""
+        rows = self._flush(query, params)
+        return rows[0] if rows else None
+
+    def fetch_all(self, query, params=None):
+        """Отправляет очередь вместе с запросом и возвращает все строки"""
+        return self._flush(query, params)
+
+    def commit(self):
+        """Отправляет оставшуюся очередь, получает значения RETURNING
+        и фиксирует транзакцию"""
+        pending, self._pending = self._pending, []
+        if pending:
+            row = self._flush("SELECT " + ", ".join(
+                f"NULLIF(current_setting('{value.setting}'), '')::{value.cast}"
+                for value in pending
+            ), None)[0]
+            for value, result in zip(pending, row):
+                value.value = result
+                value.resolved = True
+        elif self._queue:
+            self._flush(None, None)
+        self.conn.commit()
+
+    def rollback(self):
+        self._queue.clear()
+        self._pending.clear()
+        self.conn.rollback()
+
+    def _mogrify(self, cursor, query, params):
+        encoding = extensions.encodings.get(self.conn.encoding, "utf-8")
+        sql = cursor.mogrify(query, params).decode(encoding)
+        return sql.strip().rstrip(";")
+
+    def _flush(self, query, params):
+        statements, self._queue = self._queue, []
+        with self.conn.cursor() as cursor:
+            if query is not None:
+                statements.append(self._mogrify(cursor, query, params))
+            # Один round trip: сервер возвращает результат последнего оператора
+            cursor.execute(";\n".join(statements))
+            return cursor.fetchall() if cursor.description else []
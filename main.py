@@ -9,6 +9,7 @@ from ui.login_dialog import LoginDialog
 from ui.main_window import MainWindow
 import psycopg2  # Импортируем для ловли OperationalError
 from ui.login_window import LoginWindow
+from database.pool import close_all_pools
 
 
 def set_glass_dark_palette(app):
@@ -43,7 +44,11 @@ def main():
     window.show()
 
     # Start event loop
-    return app.exec_()
+    exit_code = app.exec_()
+
+    # Закрываем соединения общего пула
+    close_all_pools()
+    return exit_code
 
 
 if __name__ == "__main__":
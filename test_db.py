@@ -1,3 +1,5 @@
+import re
+
 from database.db import Database
 
 def test_tables():
@@ -27,5 +29,45 @@ def test_tables():
         reports = db.execute_query("SELECT * FROM Report LIMIT 3", fetch_all=True)
         print("Sample reports:", reports)
 
+def test_migrations():
+    from database.migrate import MigrationRunner
+
+    runner = MigrationRunner()
+    print("\nTesting migrations:")
+    # Миграции, которым нужны расширения, отсутствующие на сервере, пропускаются
+    available = {
+        row[0] for row in runner.db.execute_query(
+            "SELECT name FROM pg_available_extensions", fetch_all=True
+        )
+    }
+    target = None
+    for migration in runner.available():
+        missing = set(re.findall(r"CREATE EXTENSION IF NOT EXISTS (\w+)", migration.sql)) - available
+        if missing:
+            print(f"{migration!r}: skipped, no extension {', '.join(sorted(missing))}")
+            target = migration.version - 1
+            break
+    runner.migrate(target)
+
+    expected = set()
+    for migration, applied_at in runner.status():
+        if target is not None and migration.version > target:
+            continue
+        print(f"{migration!r}: {applied_at}")
+        assert applied_at is not None
+        expected.update(re.findall(r"INDEX CONCURRENTLY IF NOT EXISTS (\w+)", migration.sql))
+        expected.difference_update(re.findall(r"DROP INDEX CONCURRENTLY IF EXISTS (\w+)", migration.sql))
+
+    # Все индексы примененных миграций созданы и валидны
+    rows = runner.db.execute_query(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indisvalid AND c.relname = ANY(%s)",
+        (sorted(expected),), fetch_all=True,
+    )
+    missing = expected - {row[0] for row in rows}
+    print(f"Indexes: {len(expected) - len(missing)}/{len(expected)}")
+    assert not missing, missing
+
 if __name__ == "__main__":
-    test_tables() 
\ No newline at end of file
+    test_tables()
+    test_migrations() 
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Маршрутизация чтений на реплику (database.routing).
+
+Нужны два экземпляра PostgreSQL: основной сервер Database и потоковая
+реплика (например, pg_basebackup -R на порту 5433), адрес которой задан
+в BANK_DB_REPLICAS ("host:port"). Без переменной тесты пропускаются.
+"""
+import os
+import time
+
+import psycopg2
+import pytest
+
+from database.db import Database
+
+REPLICAS = os.environ.get("BANK_DB_REPLICAS")
+
+pytestmark = pytest.mark.skipif(
+    not REPLICAS, reason="BANK_DB_REPLICAS не задана: нет второго экземпляра PostgreSQL"
+)
+
+IN_RECOVERY = "SELECT pg_is_in_recovery()"
+
+
+def connect(monkeypatch, **settings):
+    """Database с настройками маршрутизации settings (проверка задержки —
+    при каждом чтении, без закрепления чтений после записи)"""
+    monkeypatch.setattr(Database, "replica_settings", {
+        **Database.replica_settings, "check_interval": 0, "sticky_seconds": 0, **settings,
+    })
+    return Database()
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    yield monkeypatch
+    # Маршрутизатор общий для процесса: возвращаем реплики и настройки
+    monkeypatch.undo()
+    Database()
+
+
+def read_on_replica(db):
+    """Чтение выполнено на реплике"""
+    return db.execute_query(IN_RECOVERY, fetch_one=True)[0]
+
+
+def test_replica_reads(routing):
+    print(f"\nTesting replica reads ({REPLICAS}):")
+    db = connect(routing)
+    reads = db.replica_stats()["replica_reads"]
+    assert read_on_replica(db)
+    assert db.replica_stats()["replica_reads"] == reads + 1
+    # get_connection() без readonly — основной сервер (записи)
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(IN_RECOVERY)
+            assert not cursor.fetchone()[0]
+
+
+def test_lag_fallback(routing):
+    print("\nTesting lag fallback:")
+    # Любая задержка больше допустимой
+    db = connect(routing, max_lag=0)
+    replica = psycopg2.connect(**{**db.conn_params, **db.replica_params()[0]})
+    replica.autocommit = True
+    try:
+        with replica.cursor() as cursor:
+            cursor.execute("SELECT pg_wal_replay_pause()")
+            # Запись WAL без изменения данных: реплика получит ее, но не применит
+            # (commit=True — на основном сервере)
+            db.execute_query(
+                "SELECT pg_logical_emit_message(false, 'test_routing', 'lag')",
+                fetch_one=True, commit=True,
+            )
+            deadline = time.monotonic() + 10
+            while True:
+                cursor.execute("SELECT pg_last_wal_receive_lsn() > pg_last_wal_replay_lsn()")
+                if cursor.fetchone()[0]:
+                    break
+                assert time.monotonic() < deadline, "реплика не получила WAL"
+                time.sleep(0.1)
+
+            fallbacks = db.replica_stats()["lag_fallbacks"]
+            assert not read_on_replica(db)
+            assert db.replica_stats()["lag_fallbacks"] == fallbacks + 1
+
+            cursor.execute("SELECT pg_wal_replay_resume()")
+            deadline = time.monotonic() + 10
+            while not read_on_replica(db):
+                assert time.monotonic() < deadline, "реплика не догнала основной сервер"
+                time.sleep(0.1)
+    finally:
+        with replica.cursor() as cursor:
+            cursor.execute("SELECT pg_wal_replay_resume()")
+        replica.close()
+
+
+def test_sticky_after_write(routing):
+    print("\nTesting reads after a write:")
+    db = connect(routing)
+    assert read_on_replica(db)
+    # Фиксация изменения таблицы (пусть и без строк) — следующие sticky_seconds
+    # чтения идут на основной сервер
+    db.execute_query("UPDATE sells SET num = num WHERE false", commit=True)
+    db = connect(routing, sticky_seconds=60)
+    sticky = db.replica_stats()["sticky_reads"]
+    assert not read_on_replica(db)
+    assert db.replica_stats()["sticky_reads"] == sticky + 1
+
+    db = connect(routing, sticky_seconds=0)
+    assert read_on_replica(db)
+
+    # use_primary() закрепляет чтения блока за основным сервером
+    with db.use_primary():
+        assert not read_on_replica(db)
+
+
+def test_failover(routing):
+    print("\nTesting failover:")
+    # Первая реплика в списке недоступна: чтения идут на вторую
+    routing.setenv("BANK_DB_REPLICAS", f"127.0.0.1:1,{REPLICAS}")
+    database = connect(routing)
+    failures = database.replica_stats()["failures"]
+    for _ in range(3):
+        assert read_on_replica(database)
+    stats = database.replica_stats()
+    assert stats["failures"] == failures + 1
+    assert [replica["available"] for replica in stats["replicas"]] == [False, True]
+
+    # Недоступны все реплики: чтения идут на основной сервер
+    routing.setenv("BANK_DB_REPLICAS", "127.0.0.1:2")
+    database = connect(routing)
+    assert not read_on_replica(database)
+    print(database.replica_stats())
@@ -4,13 +4,10 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QComboBox,
-    QAbstractItemView,
     QPushButton,
     QStackedWidget,
-    QTableWidget,
     QHeaderView,
     QFileDialog,  # Заменили QTextEdit на QStackedWidget
-    QTableWidgetItem,
     QMessageBox,
     QLabel,
     QDateEdit,
@@ -28,11 +25,15 @@ import matplotlib.pyplot as plt  # Для доступа к стилям и фу
 
 from database.db import Database
 from database.queries import Queries
+from database.analytics import summaries_available
+from database.export import CsvExporter
+from .data_table import Column, DataTable, infer_columns
+from .query_executor import query_executor
 import psycopg2
 import datetime
-import csv
 from decimal import Decimal
 import random  # Для цветов в графиках (можно заменить на палитру)
+import numpy as np
 
 
 # --- Виджет для отображения графика ---
@@ -102,12 +103,20 @@ class PlotCanvasWidget(QWidget):
 # --- Конец виджета для графика ---
 
 
+def _row_count(data):
+    """Число строк результата: списка строк или списка столбцов"""
+    if data and not isinstance(data[0], tuple):
+        return len(data[0])
+    return len(data)
+
+
 class AnalyticsTab(QWidget):
     def __init__(self):
         super().__init__()
         self.db = Database()
         self.current_headers = []
         self.current_data = []
+        self.current_query = None  # (запрос, параметры) последнего отчета — для экспорта
         # Определяем, какие отчеты могут быть графиками
         self.plot_reports = [
             "run_emissions_by_status",
@@ -191,10 +200,7 @@ class AnalyticsTab(QWidget):
         self.result_display_widget = QStackedWidget()
 
         # Страница 0: Таблица
-        self.result_table = QTableWidget()
-        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.result_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.result_table = DataTable([])
         self.result_table.setAlternatingRowColors(True)
         self.result_table.verticalHeader().setVisible(False)
         self.result_display_widget.addWidget(self.result_table)
@@ -204,8 +210,13 @@ class AnalyticsTab(QWidget):
         self.result_display_widget.addWidget(self.plot_widget)
         # -------------------------------------------------
 
+        # Время последнего изменения сводной таблицы, из которой построен отчет
+        self.freshness_label = QLabel()
+        self.freshness_label.setVisible(False)
+
         main_layout.addLayout(controls_layout)
         main_layout.addWidget(self.result_display_widget)  # Добавляем QStackedWidget
+        main_layout.addWidget(self.freshness_label)
 
     # load_registrars_combo, set_param_visibility (без изменений)
     def load_registrars_combo(self):
@@ -213,13 +224,11 @@ class AnalyticsTab(QWidget):
         self.registrar_combo.clear()
         self.registrar_combo.addItem("Все регистраторы", None)
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        Queries.GET_REGISTRAR_LIST
-                    )  # Запрос выбирает активных
-                    for reg_id, name in cursor.fetchall():
-                        self.registrar_combo.addItem(name, reg_id)
+            # Запрос выбирает активных
+            for reg_id, name in self.db.execute_query(
+                Queries.GET_REGISTRAR_LIST, fetch_all=True, cache=True
+            ):
+                self.registrar_combo.addItem(name, reg_id)
         except Exception as e:
             QMessageBox.warning(
                 self, "Ошибка БД", f"Не удалось загрузить регистраторов:\n{str(e)}"
@@ -244,12 +253,14 @@ class AnalyticsTab(QWidget):
         self.export_btn.setEnabled(False)  # Сбрасываем экспорт
 
         # Очищаем предыдущий результат (и таблицу, и график)
-        self.result_table.setRowCount(0)
-        self.result_table.setColumnCount(0)
+        self.result_table.set_columns([])
         self.plot_widget.figure.clear()
         self.plot_widget.canvas.draw()
         self.current_headers = []
         self.current_data = []
+        self.current_query = None
+        self.freshness_label.setVisible(False)
+        query_executor().invalidate(self)  # Результат прежнего отчета больше не нужен
 
         # Показываем нужный виджет (таблицу или пустой график)
         if report_method_name in self.plot_reports:
@@ -309,37 +320,93 @@ class AnalyticsTab(QWidget):
 
     # --- Методы для выполнения КОНКРЕТНЫХ отчетов ---
 
-    def _execute_and_get_data(self, query, params):
-        """Вспомогательный метод для выполнения запроса и получения данных."""
+    def _execute_and_get_data(self, query, params, on_data, updated_at_query=None,
+                              columns=False, fallback=None):
+        """Выполняет запрос отчета в фоновом потоке и передает строки в on_data.
+
+        updated_at_query — запрос времени последнего изменения сводки,
+        из которой читает отчет; оно показывается под результатом.
+        columns=True — вместо строк on_data получает список столбцов
+        (массивы NumPy из Database.fetch_columns) — для графиков.
+        fallback — тот же отчет агрегатами по исходным таблицам: выполняется
+        вместо query, если сводных таблиц нет (миграция 0005 не применена).
+        """
         print(
             f"DEBUG [Analytics]: Executing query: {query[:100]}... with params: {params}"
         )  # Отладка
-        with self.db.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query, params)
-                data = cursor.fetchall()
-                print(f"DEBUG [Analytics]: Fetched {len(data)} rows.")  # Отладка
-                return data
+        self.current_query = (query, params)
+
+        def fetch():
+            report_query, summary_query = query, updated_at_query
+            if fallback and not summaries_available(self.db):
+                report_query, summary_query = fallback, None
+            if columns:
+                data = list(self.db.fetch_columns(report_query, params).values())
+            else:
+                data = self.db.execute_query(report_query, params=params, fetch_all=True)
+            updated_at = None
+            if summary_query:
+                updated_at = self.db.execute_query(summary_query, fetch_one=True)[0]
+            return data, updated_at, report_query
+
+        query_executor().submit(
+            self,
+            fetch,
+            lambda result: self._on_report_data(result, params, on_data),
+            self._on_report_error,
+        )
+
+    def _on_report_data(self, result, params, on_data):
+        data, updated_at, query = result
+        self.current_query = (query, params)
+        print(f"DEBUG [Analytics]: Fetched {_row_count(data)} rows.")  # Отладка
+        if updated_at is not None:
+            self.freshness_label.setText(
+                f"Данные обновлены: {updated_at.astimezone():%d.%m.%Y %H:%M:%S}"
+            )
+        self.freshness_label.setVisible(updated_at is not None)
+        try:
+            on_data(data)
+        except Exception as e:
+            self._on_report_error(e)
+
+    def _on_report_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
+            QMessageBox.critical(
+                self, "Ошибка БД", f"Ошибка при выполнении отчета:\n{error}"
+            )
+        else:
+            QMessageBox.critical(
+                self,
+                "Ошибка выполнения отчета",
+                f"Не удалось сформировать отчет:\n{str(error)}",
+            )
 
     # --- Отчеты с ГРАФИКАМИ ---
     def run_emissions_by_status(self):
         headers = ["Статус", "Количество", "Общий объем"]
         query = Queries.GET_EMISSIONS_BY_STATUS
-        raw_data = self._execute_and_get_data(query, ())
-        if not raw_data:
-            QMessageBox.information(
-                self, "Информация", "Нет данных для построения графика."
+
+        def show(columns):
+            if not _row_count(columns):
+                QMessageBox.information(
+                    self, "Информация", "Нет данных для построения графика."
+                )
+                self.plot_widget.figure.clear()
+                self.plot_widget.canvas.draw()
+                return
+            labels = columns[0].values()
+            sizes = columns[1]
+            self.plot_widget.plot_pie(
+                sizes, labels, title="Распределение эмиссий по статусам (по количеству)"
             )
-            self.plot_widget.figure.clear()
-            self.plot_widget.canvas.draw()
-            return
-        labels = [row[0] for row in raw_data]
-        sizes = [row[1] for row in raw_data]
-        self.plot_widget.plot_pie(
-            sizes, labels, title="Распределение эмиссий по статусам (по количеству)"
+            self.current_headers = headers
+            self.current_data = columns
+
+        self._execute_and_get_data(
+            query, (), show, Queries.GET_EMISSION_STATUS_UPDATED_AT, columns=True,
+            fallback=Queries.GET_EMISSIONS_BY_STATUS_GROUPED,
         )
-        self.current_headers = headers
-        self.current_data = raw_data
 
     def run_top_emissions(self):
         n_limit = self.top_n_spinbox.value()
@@ -350,21 +417,27 @@ class AnalyticsTab(QWidget):
             "Дата регистрации",
         ]  # Полные заголовки
         query = Queries.GET_TOP_EMISSIONS_BY_VALUE
-        raw_data = self._execute_and_get_data(query, (n_limit,))
-        if not raw_data:
-            QMessageBox.information(
-                self, "Информация", "Нет данных для построения графика."
+
+        def show(columns):
+            if not _row_count(columns):
+                QMessageBox.information(
+                    self, "Информация", "Нет данных для построения графика."
+                )
+                self.plot_widget.figure.clear()
+                self.plot_widget.canvas.draw()
+                return
+            emission_ids, emitters, values = columns[0], columns[1].values(), columns[2]
+            labels = [
+                f"{emitter}\n(ID:{emission_id})"
+                for emission_id, emitter in zip(emission_ids, emitters)
+            ]
+            self.plot_widget.plot_bar(
+                labels, values, title=f"Топ-{n_limit} эмиссий по объему", ylabel="Объем"
             )
-            self.plot_widget.figure.clear()
-            self.plot_widget.canvas.draw()
-            return
-        labels = [f"{row[1]}\n(ID:{row[0]})" for row in raw_data]
-        values = [float(row[2]) for row in raw_data]
-        self.plot_widget.plot_bar(
-            labels, values, title=f"Топ-{n_limit} эмиссий по объему", ylabel="Объем"
-        )
-        self.current_headers = headers
-        self.current_data = raw_data
+            self.current_headers = headers
+            self.current_data = columns
+
+        self._execute_and_get_data(query, (n_limit,), show, columns=True)
 
     def run_investor_activity(self):
         headers = [
@@ -375,44 +448,54 @@ class AnalyticsTab(QWidget):
             "Потрачено всего",
         ]
         query = Queries.GET_INVESTOR_ACTIVITY
-        raw_data = self._execute_and_get_data(query, ())
-        if not raw_data:
-            QMessageBox.information(
-                self, "Информация", "Нет данных для построения графика."
+
+        def show(columns):
+            if not _row_count(columns):
+                QMessageBox.information(
+                    self, "Информация", "Нет данных для построения графика."
+                )
+                self.plot_widget.figure.clear()
+                self.plot_widget.canvas.draw()
+                return
+            top_n = 15
+            labels = columns[0].values()[:top_n]
+            values = np.nan_to_num(columns[4][:top_n])
+            self.plot_widget.plot_bar(
+                labels,
+                values,
+                title=f"Активность инвесторов (Топ-{top_n} по затратам)",
+                ylabel="Потрачено всего",
             )
-            self.plot_widget.figure.clear()
-            self.plot_widget.canvas.draw()
-            return
-        top_n = 15
-        plot_data = raw_data[:top_n]
-        labels = [row[0] for row in plot_data]
-        values = [float(row[4]) if row[4] else 0.0 for row in plot_data]
-        self.plot_widget.plot_bar(
-            labels,
-            values,
-            title=f"Активность инвесторов (Топ-{top_n} по затратам)",
-            ylabel="Потрачено всего",
+            self.current_headers = headers
+            self.current_data = columns
+
+        self._execute_and_get_data(
+            query, (), show, Queries.GET_INVESTOR_SELLS_UPDATED_AT, columns=True,
+            fallback=Queries.GET_INVESTOR_ACTIVITY_GROUPED,
         )
-        self.current_headers = headers
-        self.current_data = raw_data
 
     # --- Отчеты ТАБЛИЧНЫЕ ---
     def run_stocks_avg_price(self):
         headers = ["Тикер", "Номинал", "Средняя цена продажи", "Всего продано (шт.)"]
         query = Queries.GET_STOCKS_AVG_PRICE
-        raw_data = self._execute_and_get_data(query, ())  # <<< Получаем данные
-        # --- Отображаем в таблице ---
-        if raw_data:
-            self.display_results(headers, raw_data)
-            self.current_headers = headers
-            self.current_data = raw_data
-            self.export_btn.setEnabled(True)
-        else:
-            self.result_table.setRowCount(0)
-            self.result_table.setColumnCount(0)
-            self.export_btn.setEnabled(False)
-            QMessageBox.information(self, "Информация", "Нет данных для отображения.")
-        # ---------------------------
+
+        def show(raw_data):
+            # --- Отображаем в таблице ---
+            if raw_data:
+                self.display_results(headers, raw_data)
+                self.current_headers = headers
+                self.current_data = raw_data
+                self.export_btn.setEnabled(True)
+            else:
+                self.result_table.set_columns([])
+                self.export_btn.setEnabled(False)
+                QMessageBox.information(self, "Информация", "Нет данных для отображения.")
+            # ---------------------------
+
+        self._execute_and_get_data(
+            query, (), show, Queries.GET_STOCK_SELLS_UPDATED_AT,
+            fallback=Queries.GET_STOCKS_AVG_PRICE_GROUPED,
+        )
 
     def run_registrar_emissions(self):
         registrar_id = self.registrar_combo.currentData()
@@ -425,22 +508,22 @@ class AnalyticsTab(QWidget):
             "Дата регистрации",
         ]
         query = Queries.GET_REGISTRAR_EMISSIONS
-        raw_data = self._execute_and_get_data(
-            query, (registrar_id, registrar_id)
-        )  # <<< Получаем данные
-        # --- Отображаем в таблице ---
-        if raw_data:
-            self.display_results(headers, raw_data)
-            self.current_headers = headers
-            self.current_data = raw_data
-            self.export_btn.setEnabled(True)
-        else:
-            self.result_table.setRowCount(0)
-            self.result_table.setColumnCount(0)
-            self.export_btn.setEnabled(False)
-            QMessageBox.information(
-                self, "Информация", "Нет данных для отображения по выбранным критериям."
-            )
+
+        def show(raw_data):
+            # --- Отображаем в таблице ---
+            if raw_data:
+                self.display_results(headers, raw_data)
+                self.current_headers = headers
+                self.current_data = raw_data
+                self.export_btn.setEnabled(True)
+            else:
+                self.result_table.set_columns([])
+                self.export_btn.setEnabled(False)
+                QMessageBox.information(
+                    self, "Информация", "Нет данных для отображения по выбранным критериям."
+                )
+
+        self._execute_and_get_data(query, (registrar_id, registrar_id), show)
 
     def run_new_emissions_period(self):
         date_start = self.date_start_edit.date().toPyDate()
@@ -452,72 +535,50 @@ class AnalyticsTab(QWidget):
             return
         headers = ["ID эмиссии", "Эмитент", "Объем", "Статус", "Дата регистрации"]
         query = Queries.GET_NEW_EMISSIONS_BY_PERIOD
-        raw_data = self._execute_and_get_data(
-            query, (date_start, date_end)
-        )  # <<< Получаем данные
-        # --- Отображаем в таблице ---
-        if raw_data:
-            self.display_results(headers, raw_data)
-            self.current_headers = headers
-            self.current_data = raw_data
-            self.export_btn.setEnabled(True)
-        else:
-            self.result_table.setRowCount(0)
-            self.result_table.setColumnCount(0)
-            self.export_btn.setEnabled(False)
-            QMessageBox.information(
-                self, "Информация", "Нет данных для отображения за выбранный период."
-            )
-        # ---------------------------
+
+        def show(raw_data):
+            # --- Отображаем в таблице ---
+            if raw_data:
+                self.display_results(headers, raw_data)
+                self.current_headers = headers
+                self.current_data = raw_data
+                self.export_btn.setEnabled(True)
+            else:
+                self.result_table.set_columns([])
+                self.export_btn.setEnabled(False)
+                QMessageBox.information(
+                    self, "Информация", "Нет данных для отображения за выбранный период."
+                )
+            # ---------------------------
+
+        self._execute_and_get_data(query, (date_start, date_end), show)
 
     # --- Отображение таблицы и экспорт (без изменений) ---
     def display_results(self, headers, data):
         """Отображает данные в таблице с форматированием."""
-        self.result_table.setColumnCount(len(headers))
-        self.result_table.setHorizontalHeaderLabels(headers)
-        self.result_table.setRowCount(len(data))
-        # ... (код форматирования ячеек как в предыдущем шаге) ...
-        for row_idx, row_data in enumerate(data):
-            for col_idx, cell_value in enumerate(row_data):
-                align = Qt.AlignLeft | Qt.AlignVCenter
-                if isinstance(cell_value, (Decimal, float)):
-                    text_value = "{:,.2f}".format(cell_value)
-                    align = Qt.AlignRight | Qt.AlignVCenter
-                elif isinstance(cell_value, int):
-                    header_lower = headers[col_idx].lower()
-                    if (
-                        "id" in header_lower
-                        or "количество" in header_lower
-                        or "кол-во" in header_lower
-                        or "шт" in header_lower
-                    ):
-                        text_value = str(cell_value)
-                    else:
-                        text_value = "{:,}".format(cell_value).replace(",", " ")
-                    align = Qt.AlignRight | Qt.AlignVCenter
-                elif isinstance(cell_value, datetime.date):
-                    text_value = cell_value.strftime("%Y-%m-%d")
-                    align = Qt.AlignCenter | Qt.AlignVCenter
-                else:
-                    text_value = str(cell_value) if cell_value is not None else ""
-                    if headers[col_idx].lower() == "статус":
-                        align = Qt.AlignCenter | Qt.AlignVCenter
-                item = QTableWidgetItem(text_value)
-                item.setTextAlignment(align)
-                self.result_table.setItem(row_idx, col_idx, item)
-
-        self.result_table.resizeColumnsToContents()
-        if self.result_table.columnCount() > 0:
-            last_col = self.result_table.columnCount() - 1
-            # Только если больше 1 колонки, иначе растягивать нечего
-            if last_col > 0:
-                self.result_table.horizontalHeader().setSectionResizeMode(
-                    last_col, QHeaderView.Stretch
-                )
+        columns = infer_columns(headers, data, date_format="%Y-%m-%d")
+        for index, column in enumerate(columns):
+            header_lower = column.title.lower()
+            if column.kind == "int" and any(
+                word in header_lower for word in ("id", "количество", "кол-во", "шт")
+            ):
+                columns[index] = Column(column.title, align=Qt.AlignRight | Qt.AlignVCenter)
+            elif column.kind == "date":
+                column.align = Qt.AlignCenter | Qt.AlignVCenter
+            elif header_lower == "статус":
+                column.align = Qt.AlignCenter | Qt.AlignVCenter
+        self.result_table.set_columns(columns)
+        self.result_table.set_rows(data)
+
+        # Только если больше 1 колонки, иначе растягивать нечего
+        if len(columns) > 1:
+            self.result_table.horizontalHeader().setSectionResizeMode(
+                len(columns) - 1, QHeaderView.Stretch
+            )
 
     def export_to_csv(self):
-        # (код без изменений)
-        if not self.current_data:
+        """Выгружает отчет с текущими параметрами через COPY ... TO STDOUT."""
+        if not self.current_data or not self.current_query:
             QMessageBox.information(self, "Экспорт", "Нет данных для экспорта.")
             return
         report_name = (
@@ -531,23 +592,15 @@ class AnalyticsTab(QWidget):
             self,
             "Сохранить отчет как CSV",
             default_filename,
-            "CSV Files (*.csv);;All Files (*)",
+            "CSV Files (*.csv);;CSV gzip (*.csv.gz);;All Files (*)",
         )
         if path:
             try:
-                with open(path, "w", newline="", encoding="utf-8-sig") as csvfile:
-                    writer = csv.writer(csvfile, delimiter=";")
-                    writer.writerow(self.current_headers)
-                    for row_data in self.current_data:
-                        formatted_row = []
-                        for val in row_data:
-                            if isinstance(val, (Decimal, float)):
-                                formatted_row.append(str(val).replace(".", ","))
-                            else:
-                                formatted_row.append(
-                                    str(val) if val is not None else ""
-                                )
-                        writer.writerow(formatted_row)
+                # Запрос выполняется повторно, строки пишутся в файл потоком с сервера
+                query, params = self.current_query
+                CsvExporter(self.db).export_query(
+                    query, params, path, headers=self.current_headers
+                )
                 QMessageBox.information(
                     self, "Экспорт завершен", f"Отчет успешно сохранен в файл:\n{path}"
                 )
@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -12,12 +9,16 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QDialog,
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
 from .client_dialog import ClientDialog
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 import psycopg2
 
 
@@ -27,10 +28,8 @@ class ClientsTab(QWidget):
         self.user_role = user_role
         self.is_admin = self.user_role == "admin"
         self.db = Database()
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()
@@ -98,9 +97,12 @@ class ClientsTab(QWidget):
         toolbar.addStretch(1)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["ID", "Имя", "Фамилия", "Телефон"])
+        self.table = DataTable([
+            Column("ID", align=Qt.AlignCenter),
+            Column("Имя"),
+            Column("Фамилия"),
+            Column("Телефон", align=Qt.AlignCenter),
+        ])
         
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
@@ -108,20 +110,17 @@ class ClientsTab(QWidget):
         header.setSectionResizeMode(2, QHeaderView.Stretch)
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
         
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
         
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
 
         layout.addLayout(search_layout)
         layout.addLayout(toolbar)
         layout.addWidget(self.table)
 
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -137,67 +136,43 @@ class ClientsTab(QWidget):
         lname = self.search_lname_input.text().strip()
         phone = self.search_phone_input.text().strip()
         
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Базовый запрос
-                    query = "SELECT id, first_name, last_name, phone FROM Client WHERE 1=1"
-                    params = []
-                    
-                    # Добавляем условия поиска
-                    if fname:
-                        query += " AND LOWER(first_name) LIKE LOWER(%s)"
-                        params.append(f"%{fname}%")
-                    if lname:
-                        query += " AND LOWER(last_name) LIKE LOWER(%s)"
-                        params.append(f"%{lname}%")
-                    if phone:
-                        query += " AND phone LIKE %s"
-                        params.append(f"%{phone}%")
-                    
-                    query += " ORDER BY last_name, first_name"
-                    
-                    cursor.execute(query, params)
-                    clients = cursor.fetchall()
-                    
-                    self.table.setRowCount(len(clients))
-                    for row, client in enumerate(clients):
-                        # ID
-                        id_item = QTableWidgetItem(str(client[0]))
-                        id_item.setTextAlignment(Qt.AlignCenter)
-                        self.table.setItem(row, 0, id_item)
-                        
-                        # First Name
-                        self.table.setItem(row, 1, QTableWidgetItem(client[1]))
-                        
-                        # Last Name
-                        self.table.setItem(row, 2, QTableWidgetItem(client[2]))
-                        
-                        # Phone
-                        phone_item = QTableWidgetItem(client[3])
-                        phone_item.setTextAlignment(Qt.AlignCenter)
-                        self.table.setItem(row, 3, phone_item)
-                        
-        except psycopg2.Error as e:
-            QMessageBox.critical(
-                self,
-                "Ошибка БД",
-                f"Не удалось загрузить список клиентов:\n{str(e)}"
-            )
-            self.table.setRowCount(0)
+        # В запрос попадают только условия заданных фильтров
+        query, params = Queries.GET_ALL_CLIENTS.build({
+            "first_name": contains(fname),
+            "last_name": contains(lname),
+            # Телефон ищется по цифрам, без скобок, пробелов и дефисов
+            "phone": contains("".join(c for c in phone if c.isdigit())),
+        })
+
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error
+        )
+
+    def fill_table(self, clients):
+        self.table.set_rows(clients)
+
+    def on_load_error(self, error):
+        QMessageBox.critical(
+            self,
+            "Ошибка БД",
+            f"Не удалось загрузить список клиентов:\n{str(error)}"
+        )
+        self.table.clear_rows()
 
     def on_selection_changed(self):
-        has_selection = bool(self.table.selectedItems())
+        has_selection = self.table.current_row() >= 0
         self.edit_btn.setEnabled(has_selection and self.is_admin)
         self.delete_btn.setEnabled(has_selection and self.is_admin)
         self.documents_btn.setEnabled(has_selection)
         self.deposits_btn.setEnabled(has_selection)
 
     def get_selected_client_id(self):
-        selected_rows = self.table.selectedItems()
-        if selected_rows:
-            return int(self.table.item(selected_rows[0].row(), 0).text())
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_client(self):
         dialog = ClientDialog(self)
@@ -277,8 +252,8 @@ class ClientsTab(QWidget):
             QMessageBox.warning(self, "Внимание", "Выберите клиента для просмотра документов")
             return
             
-        selected_row = self.table.selectedItems()[0].row()
-        client_name = f"{self.table.item(selected_row, 1).text()} {self.table.item(selected_row, 2).text()}"
+        selected_row = self.table.current_row()
+        client_name = f"{self.table.text(selected_row, 1)} {self.table.text(selected_row, 2)}"
         
         dialog = DocumentsDialog(self, client_id, client_name)
         dialog.exec_()
@@ -289,8 +264,8 @@ class ClientsTab(QWidget):
             QMessageBox.warning(self, "Внимание", "Выберите клиента для просмотра вкладов")
             return
             
-        selected_row = self.table.selectedItems()[0].row()
-        client_name = f"{self.table.item(selected_row, 1).text()} {self.table.item(selected_row, 2).text()}"
+        selected_row = self.table.current_row()
+        client_name = f"{self.table.text(selected_row, 1)} {self.table.text(selected_row, 2)}"
         
         dialog = DepositsDialog(self, client_id, client_name)
         dialog.exec_() 
\ No newline at end of file
@@ -0,0 +1,506 @@
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+from operator import itemgetter
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFont, QPalette
+from PyQt5.QtWidgets import QAbstractItemView, QHeaderView, QStyledItemDelegate, QTableView
+
+from database.columns import CategoricalColumn
+from .formatting import as_date, format_value, format_values
+from .search_index import SEPARATOR, SearchFilterModel
+
+
+# Исходное значение ячейки (для сортировки, выбора записи и т.п.)
+RawRole = Qt.UserRole
+
+_LEFT = Qt.AlignLeft | Qt.AlignVCenter
+_RIGHT = Qt.AlignRight | Qt.AlignVCenter
+_CENTER = Qt.AlignCenter
+
+
+class Column:
+    """Столбец таблицы: заголовок и вид значения.
+
+    Виды: text, int (разряды через пробел), money (два знака, suffix —
+    например " ₽"), percent, date, datetime, status (labels — подписи
+    значений, colors — цвета), check (флажок по истинности значения).
+    empty — текст для NULL; expires — прошедшие даты выделяются.
+    """
+
+    _ALIGNMENT = {
+        "text": _LEFT, "int": _RIGHT, "money": _RIGHT, "percent": _CENTER,
+        "date": _CENTER, "datetime": _CENTER, "status": _CENTER, "check": _CENTER,
+    }
+
+    def __init__(self, title, kind="text", align=None, empty="", suffix="",
+                 date_format=None, labels=None, colors=None, expires=False):
+        if kind not in self._ALIGNMENT:
+            raise ValueError(f"Неизвестный вид столбца: {kind}")
+        self.title = title
+        self.kind = kind
+        self.align = align if align is not None else self._ALIGNMENT[kind]
+        self.empty = empty
+        self.suffix = suffix
+        self.date_format = date_format or ("%Y-%m-%d %H:%M:%S" if kind == "datetime" else "%d.%m.%Y")
+        self.labels = labels or {}
+        self.colors = colors or {}
+        self.expires = expires
+
+    def format(self, value):
+        """Текст ячейки со значением value (столбец целиком — format_values)"""
+        return format_value(self, value)
+
+
+def infer_columns(titles, rows, date_format=None):
+    """Столбцы для результата с заранее неизвестным составом: вид —
+    по типу первого непустого значения столбца"""
+    columns = []
+    for index, title in enumerate(titles):
+        sample = next((row[index] for row in rows if row[index] is not None), None)
+        if isinstance(sample, bool):
+            kind = "text"
+        elif isinstance(sample, (Decimal, float)):
+            kind = "money"
+        elif isinstance(sample, int):
+            kind = "int"
+        elif isinstance(sample, datetime.datetime):
+            kind = "datetime"
+        elif isinstance(sample, datetime.date):
+            kind = "date"
+        else:
+            kind = "text"
+        columns.append(Column(title, kind, date_format=date_format))
+    return columns
+
+
+class ColumnStore:
+    """Данные таблицы по столбцам.
+
+    Столбец — последовательность значений: кортеж, список, массив NumPy
+    или CategoricalColumn (fetch_columns). Строки не хранятся отдельно,
+    значение ячейки берется из столбца по номеру строки.
+    """
+
+    def __init__(self, columns, size):
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def from_rows(cls, rows, width):
+        """Транспонирует строки запроса (кортежи, Record) в столбцы"""
+        # По столбцу за проход: zip(*rows) создавал бы кортеж на строку
+        return cls([list(map(itemgetter(column), rows)) for column in range(width)], len(rows))
+
+    def extend(self, rows):
+        """Добавляет строки запроса в конец (столбцы — списки, как у from_rows)"""
+        for column, values in enumerate(self.columns):
+            values.extend(map(itemgetter(column), rows))
+        self.size += len(rows)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Столбцы результата fetch_columns в порядке столбцов таблицы"""
+        arrays = list(arrays)
+        return cls(arrays, len(arrays[0]) if arrays else 0)
+
+    def __len__(self):
+        return self.size
+
+    def value(self, row, column):
+        values = self.columns[column]
+        if isinstance(values, CategoricalColumn):
+            code = values.codes[row]
+            return None if code < 0 else values.categories[code]
+        value = values[row]
+        if isinstance(value, np.generic):
+            # NaN/NaT из fetch_columns — NULL
+            if isinstance(value, (np.floating, np.datetime64)) and np.isnan(value):
+                return None
+            return value.item()
+        return value
+
+    def row(self, row):
+        return tuple(self.value(row, column) for column in range(len(self.columns)))
+
+    def column(self, column, rows=None):
+        """Значения столбца для строк rows (None — все, slice или массив
+        номеров) в исходном виде: для format_values"""
+        values = self.columns[column]
+        if rows is None:
+            return values
+        if isinstance(values, CategoricalColumn):
+            return CategoricalColumn(values.codes[rows], values.categories)
+        if isinstance(values, np.ndarray) or isinstance(rows, slice):
+            return values[rows]
+        return list(map(values.__getitem__, np.asarray(rows).tolist()))
+
+    def sort_order(self, column, descending=False):
+        """Номера строк в порядке значений столбца; NULL — в конце"""
+        values = self.columns[column]
+        if isinstance(values, (np.ndarray, CategoricalColumn)):
+            keys = values.codes if isinstance(values, CategoricalColumn) else values
+            if isinstance(values, CategoricalColumn):
+                missing = keys < 0
+            elif keys.dtype.kind in "fM":
+                missing = np.isnan(keys)
+            else:
+                missing = np.zeros(len(keys), dtype=bool)
+            present = np.flatnonzero(~missing)
+            order = present[np.argsort(keys[present], kind="stable")]
+            if descending:
+                order = order[::-1]
+            return np.concatenate([order, np.flatnonzero(missing)])
+        present = [row for row in range(self.size) if values[row] is not None]
+        missing = [row for row in range(self.size) if values[row] is None]
+        present.sort(key=values.__getitem__, reverse=descending)
+        return present + missing
+
+
+class BaseTableModel(QAbstractTableModel):
+    """Модель таблицы со столбцами columns (ui.data_table.Column).
+
+    Роли данных и заголовки; строки дают подклассы: rowCount(), value(),
+    text(), row_values() и search_texts(). Строки, у которых
+    в inactive_column значение inactive_value, показываются серым.
+    """
+
+    # Текст строк first..last для поиска больше не хранится (строки выгружены)
+    search_texts_dropped = pyqtSignal(int, int)
+
+    inactive_color = QColor("gray")
+
+    def __init__(self, columns, parent=None, inactive_column=None, inactive_value=False):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.inactive_column = inactive_column
+        self.inactive_value = inactive_value
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.text(index.row(), index.column())
+        if role == RawRole:
+            return self.value(index.row(), index.column())
+        if role == Qt.TextAlignmentRole:
+            return int(self.columns[index.column()].align)
+        if role == Qt.CheckStateRole and self.columns[index.column()].kind == "check":
+            return Qt.Checked if self.value(index.row(), index.column()) else Qt.Unchecked
+        if role == Qt.ForegroundRole and self.inactive_column is not None:
+            if self.value(index.row(), self.inactive_column) == self.inactive_value:
+                return self.inactive_color
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self.columns[section].title
+            return str(section + 1)
+        return None
+
+
+class TableModel(BaseTableModel):
+    """Модель таблицы над ColumnStore.
+
+    Текст ячеек формируется по запросу представления — только для
+    показанных строк, объекты на каждую ячейку не создаются: столбец
+    форматируется (ui.formatting) блоком по text_block строк, и готовые
+    блоки служат перерисовке и прокрутке, пока не вытеснены.
+    Сортировка переставляет номера строк, а не данные.
+    """
+
+    text_block = 64
+    max_text_blocks = 4096
+
+    def __init__(self, columns, parent=None, inactive_column=None, inactive_value=False):
+        super().__init__(columns, parent, inactive_column, inactive_value)
+        self.store = ColumnStore.from_rows([], len(self.columns))
+        self._order = None       # номер строки в представлении -> строка store
+        self._sort = (-1, Qt.AscendingOrder)
+        self._texts = OrderedDict()  # (столбец, блок строк представления) -> тексты
+
+    def set_columns(self, columns):
+        """Заменяет состав столбцов (данные и сортировка сбрасываются)"""
+        self.beginResetModel()
+        self.columns = list(columns)
+        self.store = ColumnStore.from_rows([], len(self.columns))
+        self._order = None
+        self._sort = (-1, Qt.AscendingOrder)
+        self._texts.clear()
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """Заменяет данные строками запроса"""
+        self.set_store(ColumnStore.from_rows(rows, len(self.columns)))
+
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self._order = self._sorted(*self._sort)
+        self._texts.clear()
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Добавляет строки запроса после загруженных (следующая пачка)"""
+        if not rows:
+            return
+        if self._sort[0] >= 0:
+            # Отсортированная таблица: новые строки встают на свои места
+            self.store.extend(rows)
+            self.set_store(self.store)
+            return
+        start = len(self.store)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.store.extend(rows)
+        # Неполный последний блок текста дополнится новыми строками
+        last = start // self.text_block
+        for key in [key for key in self._texts if key[1] >= last]:
+            del self._texts[key]
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_rows([])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # sortByColumn представления и индикатор заголовка сортируют дважды
+        if (column, order) == self._sort:
+            return
+        self.layoutAboutToBeChanged.emit()
+        # Выделение и текущая ячейка остаются на тех же строках store
+        persistent = self.persistentIndexList()
+        rows = [self._source_row(index.row()) for index in persistent]
+        self._sort = (column, order)
+        self._order = self._sorted(column, order)
+        self._texts.clear()
+        if persistent:
+            positions = self._positions()
+            self.changePersistentIndexList(persistent, [
+                self.index(positions[row], index.column())
+                for row, index in zip(rows, persistent)
+            ])
+        self.layoutChanged.emit()
+
+    def _sorted(self, column, order):
+        if column < 0 or column >= len(self.columns) or not len(self.store):
+            return None
+        return self.store.sort_order(column, descending=order == Qt.DescendingOrder)
+
+    def _positions(self):
+        # Строка store -> номер строки в представлении
+        if self._order is None:
+            return range(len(self.store))
+        positions = np.empty(len(self.store), dtype=np.int64)
+        positions[np.asarray(self._order)] = np.arange(len(self.store))
+        return positions.tolist()
+
+    def _source_row(self, row):
+        return row if self._order is None else int(self._order[row])
+
+    def _store_rows(self, start, stop):
+        # Строки store для строк представления start..stop-1 (None — все по порядку)
+        if self._order is not None:
+            return np.asarray(self._order[start:stop])
+        if start == 0 and stop >= len(self.store):
+            return None
+        return slice(start, stop)
+
+    def value(self, row, column):
+        """Исходное значение ячейки (строка — в порядке представления)"""
+        return self.store.value(self._source_row(row), column)
+
+    def text(self, row, column):
+        block, offset = divmod(row, self.text_block)
+        key = (column, block)
+        texts = self._texts.get(key)
+        if texts is None:
+            start = block * self.text_block
+            rows = self._store_rows(start, start + self.text_block)
+            texts = format_values(self.columns[column], self.store.column(column, rows))
+            self._texts[key] = texts
+            if len(self._texts) > self.max_text_blocks:
+                self._texts.popitem(last=False)
+        else:
+            self._texts.move_to_end(key)
+        return texts[offset]
+
+    def row_values(self, row):
+        return self.store.row(self._source_row(row))
+
+    def search_texts(self, first, last):
+        """Текст строк first..last для SearchIndex: ячейки, как они показаны"""
+        rows = self._store_rows(first, last + 1)
+        columns = [
+            format_values(column, self.store.column(index, rows))
+            for index, column in enumerate(self.columns)
+        ]
+        return [SEPARATOR.join(cells).casefold() for cells in zip(*columns)]
+
+
+class MoneyDelegate(QStyledItemDelegate):
+    """Суммы: отрицательные — красным"""
+
+    negative_color = QColor("#C62828")
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        value = index.data(RawRole)
+        if value is not None and value < 0:
+            option.palette.setColor(QPalette.Text, self.negative_color)
+
+
+class DateDelegate(QStyledItemDelegate):
+    """Даты: пустые — серым; для сроков (expires) прошедшие — на красном"""
+
+    empty_color = QColor("#999999")
+    expired_color = QColor("red")
+
+    def __init__(self, expires=False, parent=None):
+        super().__init__(parent)
+        self.expires = expires
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        value = as_date(index.data(RawRole))
+        if value is None:
+            option.palette.setColor(QPalette.Text, self.empty_color)
+        elif self.expires:
+            if isinstance(value, datetime.datetime):
+                value = value.date()
+            if value < datetime.date.today():
+                option.backgroundBrush = QBrush(self.expired_color)
+                option.palette.setColor(QPalette.Text, QColor("white"))
+
+
+class StatusDelegate(QStyledItemDelegate):
+    """Статусы: цвет по значению (Column.colors), полужирный шрифт"""
+
+    def __init__(self, colors, parent=None):
+        super().__init__(parent)
+        self.colors = {value: QColor(color) for value, color in colors.items()}
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        color = self.colors.get(index.data(RawRole))
+        if color is not None:
+            option.palette.setColor(QPalette.Text, color)
+            option.font.setWeight(QFont.DemiBold)
+
+
+class BaseDataTable(QTableView):
+    """Таблица только для чтения над моделью create_model() (BaseTableModel).
+
+    value()/text() — ячейка по номеру строки представления,
+    current_row() — текущая строка (-1 — нет). selection_changed —
+    изменение выделения, в том числе его сброс при загрузке новых строк.
+    Строки загружают подклассы.
+    """
+
+    selection_changed = pyqtSignal()
+
+    # Сколько строк учитывается при подборе ширины столбцов
+    resize_precision = 200
+
+    def __init__(self, columns, parent=None, sortable=False, inactive_column=None,
+                 inactive_value=False):
+        super().__init__(parent)
+        self.table_model = self.create_model(columns, inactive_column, inactive_value)
+        # Представление показывает строки table_model через фильтр поиска;
+        # номера строк в методах DataTable — номера видимых строк
+        self.filter_model = SearchFilterModel(self.table_model, self)
+        self.setModel(self.filter_model)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setWordWrap(False)
+        # Высота строк фиксирована: представление не измеряет каждую строку
+        vertical = self.verticalHeader()
+        vertical.setSectionResizeMode(QHeaderView.Fixed)
+        vertical.setDefaultSectionSize(self.fontMetrics().height() + 12)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        # Ширина по содержимому — по первым строкам (страница списка), а не по всем
+        header.setResizeContentsPrecision(self.resize_precision)
+        if sortable:
+            self.setSortingEnabled(True)
+        self._install_delegates()
+        self.selectionModel().selectionChanged.connect(lambda *_: self.selection_changed.emit())
+
+    def _install_delegates(self):
+        for column, spec in enumerate(self.table_model.columns):
+            delegate = self._delegate(spec)
+            if delegate is not None:
+                self.setItemDelegateForColumn(column, delegate)
+
+    def _delegate(self, column):
+        if column.kind == "money":
+            return MoneyDelegate(self)
+        if column.kind in ("date", "datetime"):
+            return DateDelegate(column.expires, self)
+        if column.kind == "status" and column.colors:
+            return StatusDelegate(column.colors, self)
+        return None
+
+    def set_filter(self, text):
+        """Оставляет видимыми строки, текст которых содержит text"""
+        self.filter_model.set_query(text)
+        self.selection_changed.emit()
+
+    def row_count(self):
+        return self.filter_model.rowCount()
+
+    def column_titles(self):
+        return [column.title for column in self.table_model.columns]
+
+    def current_row(self):
+        """Выделенная строка или -1"""
+        rows = self.selectionModel().selectedRows()
+        return rows[0].row() if rows else -1
+
+    def value(self, row, column):
+        return self.table_model.value(self.filter_model.source_row(row), column)
+
+    def text(self, row, column):
+        return self.table_model.text(self.filter_model.source_row(row), column)
+
+    def row_values(self, row):
+        return self.table_model.row_values(self.filter_model.source_row(row))
+
+
+class DataTable(BaseDataTable):
+    """Таблица с моделью TableModel: set_rows() показывает результат запроса"""
+
+    def create_model(self, columns, inactive_column, inactive_value):
+        return TableModel(columns, self, inactive_column, inactive_value)
+
+    def set_columns(self, columns):
+        """Новый состав столбцов, например для результата другого отчета"""
+        for column in range(len(self.table_model.columns)):
+            self.setItemDelegateForColumn(column, None)
+        self.table_model.set_columns(columns)
+        self._install_delegates()
+        self.selection_changed.emit()
+
+    def set_rows(self, rows):
+        self.table_model.set_rows(rows)
+        self.selection_changed.emit()
+
+    def set_store(self, store):
+        self.table_model.set_store(store)
+        self.selection_changed.emit()
+
+    def append_rows(self, rows):
+        """Дописывает строки к показанным (следующая пачка результата)"""
+        self.table_model.append_rows(rows)
+        self.selection_changed.emit()
+
+    def clear_rows(self):
+        self.set_rows([])
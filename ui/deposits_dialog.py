@@ -334,16 +334,16 @@ class DepositsDialog(QDialog):
         dialog = TransactionDialog(self, deposit_id=deposit_id)
         if dialog.exec_() == QDialog.Accepted:
             try:
-                with self.db.get_connection() as conn:
-                    with conn.cursor() as cursor:
-                        amount = dialog.get_amount()
-                        cursor.execute(
-                            Queries.UPDATE_DEPOSIT_AMOUNT,
-                            (amount, deposit_id)
-                        )
-                        conn.commit()
-                        QMessageBox.information(self, "Успех", "Вклад успешно пополнен")
-                        self.load_data()
+                amount = dialog.get_amount()
+                # Пополнение и запись транзакции фиксируются вместе
+                with self.db.unit_of_work() as uow:
+                    uow.execute(Queries.UPDATE_DEPOSIT_AMOUNT, (amount, deposit_id))
+                    uow.execute(
+                        Queries.ADD_TRANSACTION,
+                        (deposit_id, amount, datetime.now(), "addition")
+                    )
+                QMessageBox.information(self, "Успех", "Вклад успешно пополнен")
+                self.load_data()
             except psycopg2.Error as e:
                 QMessageBox.critical(
                     self,
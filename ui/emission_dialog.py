@@ -82,19 +82,17 @@ class EmissionDialog(QDialog):
         self.emitter_combo.clear()
         self.emitter_combo.addItem("--- Выберите эмитента ---", None)
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        Queries.GET_EMITTER_LIST
-                    )  # Запрос должен выбирать активных
-                    emitters = cursor.fetchall()
-                    if emitters:
-                        emitter_ok = True
-                        for em_id, name in emitters:
-                            self.emitter_combo.addItem(name, em_id)
-                    else:
-                        self.emitter_combo.addItem("Нет активных эмитентов", None)
-                        self.emitter_combo.setEnabled(False)
+            # Запрос должен выбирать активных
+            emitters = self.db.execute_query(
+                Queries.GET_EMITTER_LIST, fetch_all=True, cache=True
+            )
+            if emitters:
+                emitter_ok = True
+                for em_id, name in emitters:
+                    self.emitter_combo.addItem(name, em_id)
+            else:
+                self.emitter_combo.addItem("Нет активных эмитентов", None)
+                self.emitter_combo.setEnabled(False)
 
         except Exception as e:
             QMessageBox.warning(
@@ -106,18 +104,17 @@ class EmissionDialog(QDialog):
         self.registrar_combo.clear()
         self.registrar_combo.addItem("--- Выберите регистратора ---", None)
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Запрос должен выбирать активных с действующей лицензией
-                    cursor.execute(Queries.GET_REGISTRAR_LIST)
-                    registrars = cursor.fetchall()
-                    if registrars:
-                        registrar_ok = True
-                        for reg_id, name in registrars:
-                            self.registrar_combo.addItem(name, reg_id)
-                    else:
-                        self.registrar_combo.addItem("Нет активных регистраторов", None)
-                        self.registrar_combo.setEnabled(False)
+            # Запрос должен выбирать активных с действующей лицензией
+            registrars = self.db.execute_query(
+                Queries.GET_REGISTRAR_LIST, fetch_all=True, cache=True
+            )
+            if registrars:
+                registrar_ok = True
+                for reg_id, name in registrars:
+                    self.registrar_combo.addItem(name, reg_id)
+            else:
+                self.registrar_combo.addItem("Нет активных регистраторов", None)
+                self.registrar_combo.setEnabled(False)
 
         except Exception as e:
             QMessageBox.warning(
@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -16,18 +13,20 @@ from PyQt5.QtWidgets import (
     QDateEdit,
     QCheckBox,
 )
-from PyQt5.QtCore import Qt, QTimer, QDate
+from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QIcon, QColor
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .pagination import PageNavigator
 
 # Относительный импорт диалога
 from .emission_dialog import EmissionDialog
 import psycopg2
-from decimal import Decimal  # Для форматирования
-import datetime  # Для дат
 
 
 class EmissionsTab(QWidget):
@@ -39,10 +38,8 @@ class EmissionsTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()
@@ -141,12 +138,15 @@ class EmissionsTab(QWidget):
         toolbar.addWidget(self.delete_btn)
         toolbar.addStretch(1)
 
-        # Table (без изменений)
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Эмитент", "Объем (шт)", "Статус", "Дата рег.", "Регистратор"]
-        )
+        # Table: неактивные эмиссии показываются серым
+        self.table = DataTable([
+            Column("ID", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Эмитент"),
+            Column("Объем (шт)", "int"),
+            Column("Статус", "status", colors={"Активна": "#21A038"}),
+            Column("Дата рег.", "date", date_format="%Y-%m-%d"),
+            Column("Регистратор"),
+        ], inactive_column=3, inactive_value="Не активна")
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         header.setSectionResizeMode(5, QHeaderView.Stretch)
@@ -154,20 +154,21 @@ class EmissionsTab(QWidget):
         header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         self.table.doubleClicked.connect(self.edit_emission_on_double_click)
 
         layout.addLayout(filter_layout)
         layout.addLayout(toolbar)
         layout.addWidget(self.table)
 
+        # Постраничная загрузка: список открывается сразу при любом объеме таблицы
+        self.pages = PageNavigator(self, self.fill_table, self.on_load_error, table="emissions")
+        layout.addWidget(self.pages)
+
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -216,97 +217,43 @@ class EmissionsTab(QWidget):
             else None
         )
 
-        emitter_param = f"%{emitter_text}%" if emitter_text else None
-        registrar_param = f"%{registrar_text}%" if registrar_text else None
+        emitter_param = contains(emitter_text)
+        registrar_param = contains(registrar_text)
         status_param = status_val
 
-        params = (
-            emitter_param,
-            emitter_param,
-            registrar_param,
-            registrar_param,
-            status_param,
-            status_param,
-            date_start,
-            date_start,
-            date_end,
-            date_end,
-        )
+        params = {
+            "emitter": emitter_param,
+            "registrar": registrar_param,
+            "status": status_param,
+            "date_start": date_start,
+            "date_end": date_end,
+        }
 
         return params
 
     def load_data(self):
-        params = self.get_filter_params()
-        self.table.blockSignals(True)
+        # В запрос попадают только условия заданных фильтров; страницы
+        # читаются в фоновом потоке, таблица заполняется по готовности
+        self.pages.load(Queries.GET_EMISSIONS, self.get_filter_params())
 
+    def fill_table(self, emissions):
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # --- ОТЛАДКА ---
-                    # print(f"DEBUG [load_data] Executing GET_EMISSIONS with params: {params}")
-                    # ---------------
-                    cursor.execute(Queries.GET_EMISSIONS, params)
-                    emissions = cursor.fetchall()
-                    # --- ОТЛАДКА ---
-                    # print(f"DEBUG [load_data] Fetched {len(emissions)} rows.")
-                    # ---------------
-
-                    self.table.setRowCount(0)  # Очистка перед заполнением
-                    self.table.setRowCount(len(emissions))
-
-                    for row, emission in enumerate(emissions):
-                        # --- ОТЛАДКА ---
-                        # print(f"DEBUG [load_data] Row {row}: {emission}")
-                        # ---------------
-                        emission_id = emission[0]
-                        emitter_name = emission[1]
-                        value = emission[2]
-                        status_text = emission[3]
-                        date_reg = emission[4]
-                        registrar_name = emission[5]
-
-                        # ID
-                        id_item = QTableWidgetItem(str(emission_id))
-                        id_item.setData(Qt.UserRole, emission_id)
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-                        # Emitter
-                        self.table.setItem(row, 1, QTableWidgetItem(emitter_name))
-                        # Value
-                        value_item = QTableWidgetItem(f"{value:,}")
-                        value_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 2, value_item)
-                        # Status
-                        status_item = QTableWidgetItem(status_text)
-                        status_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                        self.table.setItem(row, 3, status_item)
-                        # Date Reg
-                        date_item = QTableWidgetItem(date_reg.strftime("%Y-%m-%d"))
-                        date_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                        self.table.setItem(row, 4, date_item)
-                        # Registrar
-                        self.table.setItem(row, 5, QTableWidgetItem(registrar_name))
-
-                        if status_text == "Не активна":
-                            for col in range(self.table.columnCount()):
-                                item = self.table.item(row, col)
-                                if item:
-                                    item.setForeground(QColor("gray"))
-
-            self.on_selection_changed()
-
-        except psycopg2.OperationalError as db_err:
+            # Строки: ID, эмитент, объем, статус, дата регистрации, регистратор
+            self.table.set_rows(emissions)
+        except Exception as e:
+            self.on_load_error(e)
+
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить эмиссии:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить эмиссии:\n{error}"
             )
-            self.table.setRowCount(0)
-        except Exception as e:
+            self.table.clear_rows()
+        else:
             QMessageBox.critical(
-                self, "Ошибка загрузки", f"Не удалось загрузить эмиссии:\n{str(e)}"
+                self, "Ошибка загрузки", f"Не удалось загрузить эмиссии:\n{str(error)}"
             )
-            self.table.setRowCount(0)
-        finally:
-            self.table.blockSignals(False)
+            self.table.clear_rows()
 
     # --- Остальные методы (on_selection_changed, get_selected_id, add_emission, etc.) без изменений ---
     def on_selection_changed(self):
@@ -324,11 +271,8 @@ class EmissionsTab(QWidget):
             self.sales_btn.setEnabled(is_selected)  # Зависит только от выбора
 
     def get_selected_id(self):
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_emission(self):
         dialog = EmissionDialog(self)
@@ -413,17 +357,9 @@ class EmissionsTab(QWidget):
                 QMessageBox.warning(self, "Внимание", "Выберите эмиссию для удаления.")
             return
 
-        current_row = self.table.currentRow()
-        emitter_name = (
-            self.table.item(current_row, 1).text()
-            if self.table.item(current_row, 1)
-            else "??"
-        )
-        date_reg = (
-            self.table.item(current_row, 4).text()
-            if self.table.item(current_row, 4)
-            else "??"
-        )
+        current_row = self.table.current_row()
+        emitter_name = self.table.text(current_row, 1) or "??"
+        date_reg = self.table.text(current_row, 4) or "??"
 
         reply = QMessageBox.question(
             self,
@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QComboBox,
     QHeaderView,
@@ -13,12 +10,16 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QSizePolicy,
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 import psycopg2
 
 
@@ -31,10 +32,8 @@ class EmittersTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()  # Загрузка данных и комбо-бокса
@@ -102,22 +101,19 @@ class EmittersTab(QWidget):
         toolbar.addWidget(self.delete_btn)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(
-            ["ID эмитента", "Название юр. лица", "ИНН"]
-        )
+        self.table = DataTable([
+            Column("ID эмитента", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Название юр. лица"),
+            Column("ИНН"),
+        ])
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # Название
         header.setSectionResizeMode(2, QHeaderView.Stretch)  # ИНН
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
 
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         # Двойной клик здесь не нужен (нет доп. окна)
 
         layout.addLayout(search_layout)
@@ -127,7 +123,7 @@ class EmittersTab(QWidget):
         self.load_entities_combo()  # Загрузка комбо при создании
 
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -146,21 +142,20 @@ class EmittersTab(QWidget):
         self.entity_combo.blockSignals(True)
         self.entity_combo.clear()
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_AVAILABLE_ENTITIES_FOR_EMITTER)
-                    entities = cursor.fetchall()
-                    if not entities:
-                        self.entity_combo.addItem("Нет доступных юр. лиц", None)
-                        self.entity_combo.setEnabled(False)
-                    else:
-                        self.entity_combo.setEnabled(True)
-                        self.entity_combo.addItem("--- Выберите юр. лицо ---", None)
-                        for entity_id, name in entities:
-                            self.entity_combo.addItem(name, entity_id)
-                        index = self.entity_combo.findData(current_selection_id)
-                        if index != -1:
-                            self.entity_combo.setCurrentIndex(index)
+            entities = self.db.execute_query(
+                Queries.GET_AVAILABLE_ENTITIES_FOR_EMITTER, fetch_all=True, cache=True
+            )
+            if not entities:
+                self.entity_combo.addItem("Нет доступных юр. лиц", None)
+                self.entity_combo.setEnabled(False)
+            else:
+                self.entity_combo.setEnabled(True)
+                self.entity_combo.addItem("--- Выберите юр. лицо ---", None)
+                for entity_id, name in entities:
+                    self.entity_combo.addItem(name, entity_id)
+                index = self.entity_combo.findData(current_selection_id)
+                if index != -1:
+                    self.entity_combo.setCurrentIndex(index)
 
         except psycopg2.OperationalError as db_err:
             QMessageBox.warning(
@@ -187,54 +182,39 @@ class EmittersTab(QWidget):
         self.add_btn.setEnabled(can_add)
 
     def load_data(self):
-        self.table.blockSignals(True)
-
         search_name_text = self.search_name_input.text().strip()
         search_inn_text = self.search_inn_input.text().strip()
-        name_param = f"%{search_name_text}%" if search_name_text else None
-        inn_param = f"%{search_inn_text}%" if search_inn_text else None
-        params = (name_param, name_param, inn_param, inn_param)
+        name_param = contains(search_name_text)
+        inn_param = contains(search_inn_text)
+        query, params = Queries.GET_EMITTERS.build({"name": name_param, "inn": inn_param})
 
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_EMITTERS, params)
-                    emitters = cursor.fetchall()
-
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(emitters))
-                    for row, emitter in enumerate(emitters):
-                        emitter_id = emitter[0]
-                        entity_name = emitter[1]
-                        inn = emitter[2]
-
-                        # ID (числовой, сохраняем ID и имя)
-                        id_item = QTableWidgetItem(str(emitter_id))
-                        id_item.setData(
-                            Qt.UserRole, {"id": emitter_id, "name": entity_name}
-                        )
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-                        # Название
-                        self.table.setItem(row, 1, QTableWidgetItem(entity_name))
-                        # ИНН
-                        self.table.setItem(row, 2, QTableWidgetItem(inn))
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error,
+        )
 
+    def fill_table(self, emitters):
+        try:
+            # Строки: ID эмитента, название юр. лица, ИНН
+            self.table.set_rows(emitters)
             self.load_entities_combo()  # Обновляем комбо
-            self.on_selection_changed()  # Обновляем кнопки
+        except Exception as e:
+            self.on_load_error(e)
 
-        except psycopg2.OperationalError as db_err:
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить эмитентов:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить эмитентов:\n{error}"
             )
-            self.table.setRowCount(0)
-        except Exception as e:
+            self.table.clear_rows()
+        else:
             QMessageBox.critical(
-                self, "Ошибка загрузки", f"Не удалось загрузить эмитентов:\n{str(e)}"
+                self, "Ошибка загрузки", f"Не удалось загрузить эмитентов:\n{str(error)}"
             )
-            self.table.setRowCount(0)
-        finally:
-            self.table.blockSignals(False)
+            self.table.clear_rows()
 
     def on_selection_changed(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -251,10 +231,9 @@ class EmittersTab(QWidget):
             self.sales_btn.setEnabled(is_selected)  # Зависит только от выбора
 
     def get_selected_emitter_info(self):
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
+        row = self.table.current_row()
+        if row >= 0:
+            return {"id": self.table.value(row, 0), "name": self.table.value(row, 1)}
         return None
 
     def add_emitter(self):
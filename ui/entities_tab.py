@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -13,12 +10,16 @@ from PyQt5.QtWidgets import (
     QDialog,
     QSizePolicy,
 )  # Добавили QSizePolicy
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QColor  # Добавили QColor
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 
 # Относительный импорт диалога из той же папки ui
 from .entity_dialog import EntityDialog
@@ -35,10 +36,8 @@ class EntitiesTab(QWidget):
         )
         self.db = Database()  # Экземпляр для вкладки
         # Таймер для отложенного поиска
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)  # 500 мс задержка
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()  # Первоначальная загрузка данных
@@ -124,11 +123,15 @@ class EntitiesTab(QWidget):
         toolbar.addStretch(1)
 
         # --- Table ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Название", "Адрес", "ИНН", "Телефон", "Статус"]
-        )
+        # Неактивные юр. лица (статус — ложь) показываются серым
+        self.table = DataTable([
+            Column("ID"),
+            Column("Название"),
+            Column("Адрес"),
+            Column("ИНН"),
+            Column("Телефон", empty="-"),
+            Column("Статус", "check"),
+        ], inactive_column=5)
         # Настройка таблицы
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # Название растягиваем
@@ -138,14 +141,11 @@ class EntitiesTab(QWidget):
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Телефон
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Статус
 
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
         self.table.setShowGrid(True)
         self.table.setAlternatingRowColors(True)
 
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         # Добавим реакцию на двойной клик для редактирования
         self.table.doubleClicked.connect(self.edit_entity_on_double_click)
 
@@ -154,7 +154,7 @@ class EntitiesTab(QWidget):
         layout.addWidget(self.table)
 
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -174,64 +174,35 @@ class EntitiesTab(QWidget):
         search_name_text = self.search_name_input.text().strip()
         search_inn_text = self.search_inn_input.text().strip()
 
-        name_param = f"%{search_name_text}%" if search_name_text else None
-        inn_param = f"%{search_inn_text}%" if search_inn_text else None
-
-        params = (name_param, name_param, inn_param, inn_param)
+        name_param = contains(search_name_text)
+        inn_param = contains(search_inn_text)
 
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_ALL_ENTITIES, params)
-                    entities = cursor.fetchall()
-
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(entities))
-                    for row, entity in enumerate(entities):
-                        entity_id = entity[0]
-                        status = entity[5]
-
-                        # ID (сохраняем в UserRole)
-                        id_item = QTableWidgetItem(str(entity_id))
-                        id_item.setData(Qt.UserRole, entity_id)
-                        self.table.setItem(row, 0, id_item)
-
-                        # Остальные поля
-                        self.table.setItem(row, 1, QTableWidgetItem(entity[1]))
-                        self.table.setItem(row, 2, QTableWidgetItem(entity[2]))
-                        self.table.setItem(row, 3, QTableWidgetItem(entity[3]))
-                        self.table.setItem(
-                            row, 4, QTableWidgetItem(entity[4] if entity[4] else "-")
-                        )
+        query, params = Queries.GET_ALL_ENTITIES.build({"name": name_param, "inn": inn_param})
 
-                        # Статус (чекбокс для отображения)
-                        status_item = QTableWidgetItem()
-                        status_item.setCheckState(
-                            Qt.Checked if status else Qt.Unchecked
-                        )
-                        status_item.setFlags(
-                            Qt.ItemIsEnabled
-                        )  # Не редактируемый в таблице
-                        self.table.setItem(row, 5, status_item)
-
-                        # Подсветка неактивных
-                        if not status:
-                            for col in range(self.table.columnCount()):
-                                item = self.table.item(row, col)
-                                if item:
-                                    item.setForeground(QColor("gray"))
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error,
+        )
 
-            self.on_selection_changed()  # Обновляем состояние кнопок
+    def fill_table(self, entities):
+        try:
+            self.table.set_rows(entities)
+        except Exception as e:
+            self.on_load_error(e)
 
-        except psycopg2.OperationalError as db_err:
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить данные:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить данные:\n{error}"
             )
-        except Exception as e:
+        else:
             QMessageBox.critical(
-                self, "Ошибка загрузки", f"Не удалось загрузить юр. лица:\n{str(e)}"
+                self, "Ошибка загрузки", f"Не удалось загрузить юр. лица:\n{str(error)}"
             )
-            self.table.setRowCount(0)
+            self.table.clear_rows()
 
     def on_selection_changed(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -248,12 +219,8 @@ class EntitiesTab(QWidget):
             self.sales_btn.setEnabled(is_selected)  # Зависит только от выбора
 
     def get_selected_id(self):
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            # Получаем ID из UserRole первого столбца
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_entity(self):
         dialog = EntityDialog(self)
@@ -333,11 +300,7 @@ class EntitiesTab(QWidget):
             return
 
         # Получаем имя для сообщения
-        current_row = self.table.currentRow()
-        entity_name_item = self.table.item(current_row, 1)
-        entity_name = (
-            entity_name_item.text() if entity_name_item else f"ID: {entity_id}"
-        )
+        entity_name = self.table.text(self.table.current_row(), 1) or f"ID: {entity_id}"
 
         reply = QMessageBox.question(
             self,
@@ -0,0 +1,53 @@
+from PyQt5.QtCore import QObject, QTimer
+
+from .query_executor import query_executor
+
+
+_NOT_APPLIED = object()
+
+
+class FilterController(QObject):
+    """Загрузка списка по фильтрам, которые меняются по мере ввода.
+
+    changed() откладывает загрузку на delay мс после последнего изменения:
+    серия нажатий дает один вызов apply(). apply_now() загружает сразу
+    (выбор в выпадающем списке, сброс фильтров). Если state() совпадает
+    с состоянием последней загрузки, apply() не вызывается.
+
+    Запрос прежнего фильтра отменяется на сервере, когда view отправляет
+    новый (query_executor); statement_timeout ограничивает время каждого
+    запроса view, мс.
+    """
+
+    delay = 300
+    statement_timeout = 15000
+
+    def __init__(self, view, apply, state=None, delay=None, statement_timeout=None):
+        super().__init__(view)
+        self.apply = apply
+        self.state = state
+        self._applied = _NOT_APPLIED
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.delay if delay is None else delay)
+        self.timer.timeout.connect(self.apply_now)
+        if statement_timeout is None:
+            statement_timeout = self.statement_timeout
+        query_executor().set_statement_timeout(view, statement_timeout)
+
+    def changed(self, *args):
+        """Фильтр изменен: загрузка — после паузы во вводе"""
+        self.timer.start()
+
+    def apply_now(self, *args):
+        self.timer.stop()
+        if self.state is not None:
+            try:
+                state = self.state()
+            except Exception:
+                # Ошибку в значениях фильтров покажет apply()
+                state = _NOT_APPLIED
+            if state is not _NOT_APPLIED and state == self._applied:
+                return
+            self._applied = state
+        self.apply()
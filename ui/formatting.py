@@ -0,0 +1,115 @@
+"""Текст ячеек таблиц по описаниям столбцов (ui.data_table.Column).
+
+format_value — текст одного значения; format_values — текст столбца
+целиком (список, массив NumPy или CategoricalColumn) с тем же
+результатом, что format_value для каждого значения, но без разбора вида
+столбца на каждую ячейку: числа форматируются одним проходом, а даты,
+статусы и значения словаря CategoricalColumn — по разу на различное
+значение.
+"""
+import datetime
+
+import numpy as np
+
+from database.columns import CategoricalColumn
+
+
+_NUMBER_FORMATS = {"int": "{:,}", "money": "{:,.2f}", "percent": "{:.2f}%"}
+
+
+def _grouped(text):
+    """Разделитель разрядов — пробел"""
+    return text.replace(",", " ")
+
+
+def as_date(value):
+    """datetime64 из fetch_columns — как date/datetime"""
+    if isinstance(value, np.datetime64):
+        return value.astype(object)
+    return value
+
+
+def format_value(column, value):
+    """Текст ячейки столбца column со значением value"""
+    if value is None:
+        return column.empty
+    kind = column.kind
+    if kind == "int":
+        return _grouped(f"{value:,}")
+    if kind == "money":
+        return _grouped(f"{value:,.2f}") + column.suffix
+    if kind == "percent":
+        return f"{value:.2f}%"
+    if kind in ("date", "datetime"):
+        value = as_date(value)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.strftime(column.date_format)
+        return str(value)
+    if kind == "status":
+        return column.labels.get(value, str(value))
+    if kind == "check":
+        return ""
+    return str(value)
+
+
+def format_values(column, values):
+    """Список текстов ячеек столбца column для значений values.
+
+    values — последовательность значений, массив NumPy (NaN/NaT — NULL,
+    как в fetch_columns) или CategoricalColumn.
+    """
+    if isinstance(values, CategoricalColumn):
+        # Код -1 (NULL) указывает на последний элемент — текст пустого значения
+        texts = format_values(column, list(values.categories)) + [column.empty]
+        return np.array(texts, dtype=object)[values.codes].tolist()
+    if isinstance(values, np.ndarray):
+        return _format_array(column, values)
+    return _format_list(column, list(values))
+
+
+def _format_array(column, values):
+    if values.dtype.kind in "fM":
+        missing = np.isnan(values)
+        if missing.any():
+            texts = np.full(len(values), column.empty, dtype=object)
+            texts[~missing] = _format_array(column, values[~missing])
+            return texts.tolist()
+    if values.dtype.kind == "M":
+        # Различных дат намного меньше, чем строк
+        unique, inverse = np.unique(values, return_inverse=True)
+        texts = _format_list(column, unique.tolist())
+        return np.array(texts, dtype=object)[inverse].tolist()
+    return _format_list(column, values.tolist())
+
+
+def _format_list(column, values):
+    kind = column.kind
+    if kind in _NUMBER_FORMATS:
+        return _format_numbers(column, values)
+    if kind == "check":
+        return [""] * len(values)
+    if kind == "text":
+        empty = column.empty
+        return [
+            value if type(value) is str else empty if value is None else str(value)
+            for value in values
+        ]
+    # Даты и статусы повторяются: текст — по разу на различное значение
+    texts = dict.fromkeys(values)
+    for value in texts:
+        texts[value] = format_value(column, value)
+    return list(map(texts.__getitem__, values))
+
+
+def _format_numbers(column, values):
+    if None in values:
+        present = iter(_format_numbers(column, [value for value in values if value is not None]))
+        return [column.empty if value is None else next(present) for value in values]
+    texts = list(map(_NUMBER_FORMATS[column.kind].format, values))
+    if column.kind != "percent" and texts:
+        # Одна замена разделителя разрядов на весь столбец
+        texts = "\n".join(texts).replace(",", " ").split("\n")
+    if column.kind == "money" and column.suffix:
+        suffix = column.suffix
+        texts = [text + suffix for text in texts]
+    return texts
@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QComboBox,
     QHeaderView,
@@ -13,12 +10,16 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QSizePolicy,
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 
 # Относительный импорт диалога
 from .investor_sales_dialog import InvestorSalesDialog
@@ -34,10 +35,8 @@ class InvestorsTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         # Инициализируем переменные для зависимостей как None
         self.main_tabs = None
@@ -142,23 +141,20 @@ class InvestorsTab(QWidget):
         toolbar.addWidget(self.add_sell_btn)
 
         # --- Table ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(
-            ["ID инвестора", "Название юр. лица", "ИНН"]
-        )
+        self.table = DataTable([
+            Column("ID инвестора", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Название юр. лица"),
+            Column("ИНН"),
+        ])
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # Название
         header.setSectionResizeMode(2, QHeaderView.Stretch)  # ИНН
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
 
         # Сигналы таблицы
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         self.table.doubleClicked.connect(self.show_investor_sales_on_double_click)
 
         layout.addLayout(search_layout)
@@ -169,7 +165,7 @@ class InvestorsTab(QWidget):
 
     def on_search_text_changed(self):
         """Запускает таймер для отложенного поиска."""
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         """Выполняет загрузку данных (поиск)."""
@@ -193,24 +189,23 @@ class InvestorsTab(QWidget):
         self.entity_combo.clear()
         self.entity_combo.setEnabled(False)  # По умолчанию недоступен
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_AVAILABLE_ENTITIES_FOR_INVESTOR)
-                    entities = cursor.fetchall()
-                    if not entities:
-                        self.entity_combo.addItem("Нет доступных юр. лиц", None)
-                    else:
-                        self.entity_combo.setEnabled(
-                            self.is_admin
-                        )  # Доступен только админу
-                        self.entity_combo.addItem("--- Выберите юр. лицо ---", None)
-                        for entity_id, name in entities:
-                            self.entity_combo.addItem(name, entity_id)
-                        # Восстанавливаем выбор, если он был и если комбо доступен
-                        if self.is_admin:
-                            index = self.entity_combo.findData(current_selection_id)
-                            if index != -1:
-                                self.entity_combo.setCurrentIndex(index)
+            entities = self.db.execute_query(
+                Queries.GET_AVAILABLE_ENTITIES_FOR_INVESTOR, fetch_all=True, cache=True
+            )
+            if not entities:
+                self.entity_combo.addItem("Нет доступных юр. лиц", None)
+            else:
+                self.entity_combo.setEnabled(
+                    self.is_admin
+                )  # Доступен только админу
+                self.entity_combo.addItem("--- Выберите юр. лицо ---", None)
+                for entity_id, name in entities:
+                    self.entity_combo.addItem(name, entity_id)
+                # Восстанавливаем выбор, если он был и если комбо доступен
+                if self.is_admin:
+                    index = self.entity_combo.findData(current_selection_id)
+                    if index != -1:
+                        self.entity_combo.setCurrentIndex(index)
 
         except psycopg2.OperationalError as db_err:
             QMessageBox.warning(
@@ -236,57 +231,43 @@ class InvestorsTab(QWidget):
 
     def load_data(self):
         """Загружает данные инвесторов в таблицу с учетом фильтров поиска."""
-        self.table.blockSignals(True)
-
         search_name_text = self.search_name_input.text().strip()
         search_inn_text = self.search_inn_input.text().strip()
-        name_param = f"%{search_name_text}%" if search_name_text else None
-        inn_param = f"%{search_inn_text}%" if search_inn_text else None
-        params = (name_param, name_param, inn_param, inn_param)
+        name_param = contains(search_name_text)
+        inn_param = contains(search_inn_text)
+        query, params = Queries.GET_INVESTORS.build({"name": name_param, "inn": inn_param})
 
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_INVESTORS, params)
-                    investors = cursor.fetchall()
-
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(investors))
-                    for row, investor in enumerate(investors):
-                        investor_id, entity_name, inn = investor
-
-                        # ID (числовой, сохраняем ID и имя в UserRole)
-                        id_item = QTableWidgetItem(str(investor_id))
-                        id_item.setData(
-                            Qt.UserRole, {"id": investor_id, "name": entity_name}
-                        )
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-                        # Название (строка)
-                        name_item = QTableWidgetItem(entity_name)
-                        self.table.setItem(row, 1, name_item)
-                        # ИНН (строка)
-                        inn_item = QTableWidgetItem(inn if inn else "")
-                        self.table.setItem(row, 2, inn_item)
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error,
+        )
 
-            self.on_selection_changed()  # Обновляем состояние кнопок после загрузки
+    def fill_table(self, investors):
+        try:
+            # Строки: ID инвестора, название юр. лица, ИНН
+            self.table.set_rows(investors)
+        except Exception as e:
+            self.on_load_error(e)
+        finally:
+            # Обновляем комбобокс после загрузки данных (чтобы убрать добавленных)
+            self.load_entities_combo()
 
-        except psycopg2.OperationalError as db_err:
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить инвесторов:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить инвесторов:\n{error}"
             )
-            self.table.setRowCount(0)
-        except Exception as e:
+            self.table.clear_rows()
+        else:
             QMessageBox.critical(
                 self,
                 "Критическая Ошибка",
-                f"Не удалось загрузить инвесторов:\n{str(e)}",
+                f"Не удалось загрузить инвесторов:\n{str(error)}",
             )
-            self.table.setRowCount(0)
-        finally:
-            self.table.blockSignals(False)
-            # Обновляем комбобокс после загрузки данных (чтобы убрать добавленных)
-            self.load_entities_combo()
+            self.table.clear_rows()
 
     def on_selection_changed(self):
         """Обновляет состояние кнопок ('Удалить', 'Сделки', 'Доб. сделку') при изменении выбора в таблице."""
@@ -307,10 +288,9 @@ class InvestorsTab(QWidget):
 
     def get_selected_investor_info(self):
         """Возвращает словарь {'id': ..., 'name': ...} для выбранного инвестора или None."""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
+        row = self.table.current_row()
+        if row >= 0:
+            return {"id": self.table.value(row, 0), "name": self.table.value(row, 1)}
         return None
 
     def show_investor_sales_on_double_click(self, index):
@@ -0,0 +1,75 @@
+from PyQt5 import sip
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer, Qt, pyqtSignal
+
+from database.db import Database
+from database.notifications import ChangeListener
+
+
+class ChangeNotifier(QObject):
+    """Рассылка уведомлений об изменении строк открытым представлениям.
+
+    Уведомления ChangeListener передаются в GUI-поток и копятся до конца
+    текущей итерации цикла событий: пачка записей в таблицу дает каждому
+    подписчику один вызов callback(ids) с объединенным множеством ключей
+    (None — перечитать все).
+    """
+
+    _received = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscribers = {}  # таблица -> {id(view): (view, callback)}
+        self._pending = {}      # таблица -> множество ключей или None
+        self._flush_scheduled = False
+        self._received.connect(self._collect, Qt.QueuedConnection)
+        self.listener = ChangeListener(Database().conn_params, self._received.emit)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(lambda: self.listener.stop(timeout=2))
+
+    def subscribe(self, table, view, callback):
+        """callback(ids) при изменении строк таблицы, пока view существует"""
+        views = self._subscribers.setdefault(table.lower(), {})
+        key = id(view)
+        if key not in views:
+            view.destroyed.connect(lambda *_: views.pop(key, None))
+        views[key] = (view, callback)
+        self.listener.start()
+
+    def _collect(self, changes):
+        for table, ids in changes:
+            tables = list(self._subscribers) if table is None else [table]
+            for name in tables:
+                if name not in self._subscribers:
+                    continue
+                pending = self._pending.get(name, set())
+                if ids is None or pending is None:
+                    self._pending[name] = None
+                else:
+                    self._pending[name] = pending | ids
+        if self._pending and not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for table, ids in pending.items():
+            for view, callback in list(self._subscribers.get(table, {}).values()):
+                if sip.isdeleted(view):
+                    continue
+                try:
+                    callback(None if ids is None else frozenset(ids))
+                except Exception as e:
+                    print(f"Live update error ({type(view).__name__}): {e}")
+
+
+_notifier = None
+
+
+def change_notifier():
+    """Общий для приложения источник уведомлений об изменениях"""
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
@@ -19,6 +19,7 @@ from .table_windows.transactions_window import TransactionsWindow
 from .table_windows.employees_window import EmployeesWindow
 from .table_windows.reports_window import ReportsWindow
 from .statistics_window import StatisticsWindow
+from .query_monitor_window import QueryMonitorWindow
 
 from database.db import Database
 from .clients_tab import ClientsTab
@@ -201,6 +202,13 @@ class MainWindow(QMainWindow):
         statistics_button.setStyleSheet(button_style)
         statistics_button.clicked.connect(self.open_statistics_window)
         buttons_layout.addWidget(statistics_button)
+        
+        # Кнопка "Мониторинг запросов" (только для администратора)
+        if self.user_role == "admin":
+            monitor_button = QPushButton("Мониторинг запросов")
+            monitor_button.setStyleSheet(button_style)
+            monitor_button.clicked.connect(self.open_query_monitor_window)
+            buttons_layout.addWidget(monitor_button)
             
         content_layout.addLayout(buttons_layout)
         main_layout.addWidget(content_container)
@@ -250,6 +258,11 @@ class MainWindow(QMainWindow):
         window = StatisticsWindow(self)
         window.show()
         
+    def open_query_monitor_window(self):
+        """Открывает панель мониторинга запросов"""
+        window = QueryMonitorWindow(self)
+        window.show()
+        
     def logout(self):
         """Выход из системы"""
         reply = QMessageBox.question(
@@ -0,0 +1,127 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QPushButton, QLabel
+
+from database.pagination import KeysetPager
+from .live_updates import change_notifier
+from .query_executor import query_executor
+
+
+class PageNavigator(QWidget):
+    """Панель листания списка: «◀ Назад», номер страницы с оценкой
+    общего числа строк, «Вперед ▶».
+
+    load() открывает список заново (новые фильтры) и загружает первую
+    страницу вместе с оценкой числа строк; соседние страницы читаются
+    KeysetPager, следующая — заранее, в фоне. Все запросы выполняются
+    через query_executor() от имени view; строки страницы передаются
+    в on_rows, ошибки — в on_error (в GUI-потоке).
+
+    table — таблица, строки которой показывает список: при уведомлении
+    об их изменении (LISTEN/NOTIFY) текущая страница обновляется на месте.
+    """
+
+    # Повтор обновления, пока у представления выполняется запрос (мс)
+    refresh_retry_ms = 200
+
+    def __init__(self, view, on_rows, on_error, page_size=200, parent=None, table=None):
+        super().__init__(parent)
+        self.view = view
+        self.on_rows = on_rows
+        self.on_error = on_error
+        self.page_size = page_size
+        self.pager = None
+        self.total = None
+        self._refresh_ids = set()  # ключи отложенного обновления; None — все
+        self._refresh_scheduled = False
+        if table:
+            change_notifier().subscribe(table, self, self.refresh)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.previous_button = QPushButton("◀ Назад")
+        self.previous_button.clicked.connect(self.previous_page)
+        self.page_label = QLabel()
+        self.next_button = QPushButton("Вперед ▶")
+        self.next_button.clicked.connect(self.next_page)
+        layout.addWidget(self.previous_button)
+        layout.addWidget(self.page_label)
+        layout.addWidget(self.next_button)
+        self.update_state(None)
+
+    def load(self, query, values=None):
+        """Первая страница запроса с новыми значениями фильтров"""
+        if self.pager is not None:
+            self.pager.cancel_prefetch()
+        pager = KeysetPager(query, values, page_size=self.page_size)
+        self.pager = pager
+
+        def fetch():
+            page = pager.first()
+            return page, pager.estimated_total()
+
+        query_executor().submit(self.view, fetch, self._on_first_page, self.on_error)
+
+    def next_page(self):
+        if self.pager is not None:
+            query_executor().submit(self.view, self.pager.next, self._on_page, self.on_error)
+
+    def previous_page(self):
+        if self.pager is not None:
+            query_executor().submit(self.view, self.pager.previous, self._on_page, self.on_error)
+
+    def refresh(self, ids=None):
+        """Обновляет показанную страницу после изменения строк ids"""
+        if self.pager is None:
+            return
+        if ids is None or self._refresh_ids is None:
+            self._refresh_ids = None
+        else:
+            self._refresh_ids |= ids
+        # Новый запрос отменил бы результат запущенного (листание, фильтр) —
+        # обновление ждет его завершения
+        if query_executor().is_busy(self.view):
+            if not self._refresh_scheduled:
+                self._refresh_scheduled = True
+                QTimer.singleShot(self.refresh_retry_ms, self._retry_refresh)
+            return
+        ids, self._refresh_ids = self._refresh_ids, set()
+        pager = self.pager
+        query_executor().submit(
+            self.view, lambda: pager.refresh(ids), self._on_page, self._on_refresh_error
+        )
+
+    def _retry_refresh(self):
+        self._refresh_scheduled = False
+        if self._refresh_ids is None or self._refresh_ids:
+            self.refresh(set())
+
+    def _on_refresh_error(self, error):
+        # Фоновое обновление не показывает диалог: данные обновятся при следующем
+        print(f"Live refresh error: {error}")
+
+    def _on_first_page(self, result):
+        page, self.total = result
+        self._on_page(page)
+
+    def _on_page(self, page):
+        if page is None:
+            return
+        self.on_rows(page.rows)
+        self.update_state(page)
+
+    def update_state(self, page):
+        self.previous_button.setEnabled(bool(page and page.has_previous))
+        self.next_button.setEnabled(bool(page and page.has_next))
+        if page is None:
+            self.page_label.setText("")
+            return
+        text = f"Стр. {page.number}"
+        if self.total is not None:
+            text += f" · {total_text(self.total)}"
+        self.page_label.setText(text)
+
+
+def total_text(total):
+    """Подпись с оценкой числа строк списка"""
+    # Оценка планировщика, а не точный COUNT(*)
+    return f"≈{total:,} записей".replace(",", " ")
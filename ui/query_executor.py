@@ -0,0 +1,201 @@
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+
+from database.cancellation import CancelScope, cancel_scope
+from database.instrumentation import query_tag
+
+
+class _QueryRequest:
+    """Контекст одного фонового запроса"""
+
+    def __init__(self, view, generation, fetch, on_result, on_error, statement_timeout=None,
+                 on_batch=None):
+        self.view = view
+        self.tag = type(view).__name__
+        self.generation = generation
+        self.fetch = fetch
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_batch = on_batch
+        self.scope = CancelScope(statement_timeout)
+        self.ok = False
+        self.value = None
+
+
+class _WorkerSignals(QObject):
+    batch = pyqtSignal(object, object, bool)
+    finished = pyqtSignal(object)
+
+
+class _QueryWorker(QRunnable):
+    """Выполняет fetch() в потоке пула и сообщает о результате сигналом;
+    пачки потокового результата (on_batch) — по одной по мере чтения"""
+
+    def __init__(self, request, signals):
+        super().__init__()
+        self.request = request
+        self.signals = signals
+
+    def run(self):
+        try:
+            with query_tag(self.request.tag), cancel_scope(self.request.scope):
+                self.request.value = self.request.fetch()
+                if self.request.on_batch is not None:
+                    self._emit_batches(self.request.value)
+                    self.request.value = None
+            self.request.ok = True
+        except Exception as e:
+            self.request.value = e
+        self.signals.finished.emit(self.request)
+
+    def _emit_batches(self, batches):
+        first = True
+        for rows in batches:
+            # Результат отмененного запроса дочитывать незачем
+            if self.request.scope.cancelled:
+                return
+            self.signals.batch.emit(self.request, rows, first)
+            first = False
+        if first:
+            self.signals.batch.emit(self.request, [], True)
+
+
+class QueryExecutor(QObject):
+    """Фоновое выполнение запросов к БД.
+
+    fetch() выполняется в QThreadPool и не должен обращаться к виджетам;
+    on_result/on_error вызываются в GUI-потоке. Для каждого представления
+    ведется счетчик поколений: результат устаревшего запроса отбрасывается,
+    а сам запрос отменяется на сервере (database.cancellation), если еще
+    выполняется. submit_batches() передает результат пачками по мере
+    чтения. set_statement_timeout() ограничивает время запросов
+    представления на сервере.
+    """
+
+    # Представление, есть ли у него незавершенные запросы
+    busy_changed = pyqtSignal(object, bool)
+
+    def __init__(self, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._signals = _WorkerSignals()
+        self._signals.batch.connect(self._on_batch, Qt.QueuedConnection)
+        self._signals.finished.connect(self._on_finished, Qt.QueuedConnection)
+        self._generations = {}
+        self._pending = {}
+        self._running = {}   # представление -> запущенные запросы
+        self._timeouts = {}  # представление -> statement_timeout, мс
+
+    def submit(self, view, fetch, on_result, on_error=None):
+        """Запускает fetch() в фоне; возвращает номер поколения запроса"""
+        return self._start(view, fetch, on_result, on_error)
+
+    def submit_batches(self, view, fetch, on_batch, on_error=None):
+        """Запускает fetch() в фоне; fetch() возвращает итератор пачек строк
+        (Database.stream_query), и каждая пачка передается on_batch(rows, first)
+        в GUI-потоке, пока читаются следующие. first — первая пачка запроса;
+        если строк нет, она одна и пустая."""
+        return self._start(view, fetch, None, on_error, on_batch)
+
+    def _start(self, view, fetch, on_result, on_error, on_batch=None):
+        key = id(view)
+        if key not in self._generations:
+            view.destroyed.connect(lambda *_: self._forget(key))
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._cancel_running(key)
+
+        self._pending[key] = self._pending.get(key, 0) + 1
+        if self._pending[key] == 1:
+            self._set_busy(view, True)
+
+        request = _QueryRequest(
+            view, generation, fetch, on_result, on_error, self._timeouts.get(key), on_batch
+        )
+        self._running.setdefault(key, set()).add(request)
+        self.thread_pool.start(_QueryWorker(request, self._signals))
+        return generation
+
+    def invalidate(self, view):
+        """Помечает все запущенные запросы представления устаревшими"""
+        key = id(view)
+        if key in self._generations:
+            self._generations[key] += 1
+        self._cancel_running(key)
+
+    def set_statement_timeout(self, view, milliseconds):
+        """Предел времени каждого запроса представления на сервере, мс
+        (None — без ограничения); действует для следующих запросов"""
+        key = id(view)
+        if key not in self._generations:
+            self._generations[key] = 0
+            view.destroyed.connect(lambda *_: self._forget(key))
+        self._timeouts[key] = milliseconds
+
+    def is_busy(self, view):
+        return self._pending.get(id(view), 0) > 0
+
+    def _forget(self, key):
+        self._cancel_running(key)
+        self._generations.pop(key, None)
+        self._pending.pop(key, None)
+        self._running.pop(key, None)
+        self._timeouts.pop(key, None)
+
+    def _cancel_running(self, key):
+        # Результат этих запросов уже не будет показан
+        for request in self._running.get(key, ()):
+            request.scope.cancel()
+
+    def _set_busy(self, view, busy):
+        if busy:
+            view.setCursor(Qt.BusyCursor)
+        else:
+            view.unsetCursor()
+        self.busy_changed.emit(view, busy)
+
+    def _is_current(self, request):
+        view = request.view
+        return not sip.isdeleted(view) and request.generation == self._generations.get(id(view))
+
+    def _on_batch(self, request, rows, first):
+        if self._is_current(request):
+            request.on_batch(rows, first)
+
+    def _on_finished(self, request):
+        view = request.view
+        if sip.isdeleted(view):
+            return
+        key = id(view)
+        if key not in self._pending:
+            return
+
+        self._running.get(key, set()).discard(request)
+        self._pending[key] -= 1
+        if self._pending[key] == 0:
+            del self._pending[key]
+            self._set_busy(view, False)
+
+        # Пока запрос выполнялся, представление запросило более свежие данные
+        if request.generation != self._generations.get(key):
+            return
+
+        if request.ok:
+            if request.on_result is not None:
+                request.on_result(request.value)
+        elif request.on_error:
+            request.on_error(request.value)
+        else:
+            print(f"Background query error: {request.value}")
+
+
+_executor = None
+
+
+def query_executor():
+    """Общий для приложения исполнитель фоновых запросов"""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
@@ -0,0 +1,211 @@
+import math
+
+from PyQt5.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QTabWidget,
+    QPushButton,
+    QHeaderView,
+    QTextEdit,
+    QSpinBox,
+    QSplitter,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+
+from database.db import Database
+from ui.data_table import Column, DataTable
+
+
+class QueryMonitorWindow(QMainWindow):
+    """Панель администратора: статистика запросов и журнал медленных запросов"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Мониторинг запросов")
+        self.setGeometry(120, 120, 1200, 700)
+        self.db = Database()
+        self.stats_rows = []
+        self.slow_entries = []
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+
+        # Панель управления
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Порог медленного запроса, мс:"))
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(1, 600000)
+        self.threshold_spin.setValue(int(self.db.slow_query_threshold()))
+        self.threshold_spin.valueChanged.connect(self.db.set_slow_query_threshold)
+        controls.addWidget(self.threshold_spin)
+
+        refresh_button = QPushButton("Обновить")
+        refresh_button.clicked.connect(self.refresh_data)
+        controls.addWidget(refresh_button)
+
+        reset_button = QPushButton("Сбросить статистику")
+        reset_button.clicked.connect(self.reset_stats)
+        controls.addWidget(reset_button)
+        controls.addStretch()
+        controls.addWidget(QLabel(f"Журнал: {self.db.slow_query_log_path()}"))
+        main_layout.addLayout(controls)
+
+        self.tabs = QTabWidget()
+        main_layout.addWidget(self.tabs)
+
+        # Вкладка "Операторы"
+        right = Qt.AlignRight | Qt.AlignVCenter
+        self.stats_table = self.create_table(
+            [Column("Оператор")]
+            + [
+                Column(title, align=right) for title in (
+                    "Вызовов", "Ошибок", "Всего, мс", "Среднее, мс", "p50, мс",
+                    "p95, мс", "Макс., мс", "Строк (сред.)", "Ожидание соединения, мс",
+                )
+            ]
+            + [Column("Представления")]
+        )
+        self.stats_table.selection_changed.connect(self.show_histogram)
+        self.histogram_view = self.create_text_view()
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.stats_table)
+        splitter.addWidget(self.histogram_view)
+        splitter.setSizes([500, 150])
+        self.tabs.addTab(splitter, "Операторы")
+
+        # Вкладка "Медленные запросы"
+        self.slow_table = self.create_table([
+            Column("Время"), Column("Оператор"), Column("Длительность, мс"),
+            Column("Строк"), Column("Представление"),
+        ])
+        self.slow_table.selection_changed.connect(self.show_plan)
+        self.plan_view = self.create_text_view()
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.slow_table)
+        splitter.addWidget(self.plan_view)
+        splitter.setSizes([300, 350])
+        self.tabs.addTab(splitter, "Медленные запросы")
+
+        # Вкладка "Пул и кэш"
+        self.resources_view = self.create_text_view()
+        self.tabs.addTab(self.resources_view, "Пул и кэш")
+
+        self.refresh_data()
+
+    def create_table(self, columns):
+        table = DataTable(columns)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+
+    def create_text_view(self):
+        view = QTextEdit()
+        view.setReadOnly(True)
+        view.setFont(QFont("Monospace"))
+        return view
+
+    def refresh_data(self):
+        """Перечитывает счетчики"""
+        self.fill_stats(self.db.query_stats())
+        self.slow_entries = self.db.slow_queries()
+        self.fill_slow(self.slow_entries)
+        self.fill_resources()
+
+    def reset_stats(self):
+        self.db.reset_query_stats()
+        self.refresh_data()
+
+    def fill_stats(self, stats):
+        self.stats_rows = stats
+        rows = []
+        for entry in stats:
+            views = ", ".join(
+                f"{view} ({count})" for view, count in
+                sorted(entry["views"].items(), key=lambda item: -item[1])
+            )
+            rows.append((
+                entry["statement"],
+                str(entry["count"]),
+                str(entry["errors"]),
+                f"{entry['total_ms']:.1f}",
+                f"{entry['avg_ms']:.2f}",
+                f"{entry['p50_ms']:.0f}",
+                f"{entry['p95_ms']:.0f}",
+                f"{entry['max_ms']:.1f}",
+                f"{entry['avg_rows']:.1f}",
+                f"{entry['wait_ms']:.1f}",
+                views,
+            ))
+        self.stats_table.set_rows(rows)
+
+    def fill_slow(self, entries):
+        self.slow_table.set_rows([
+            (
+                entry["time"],
+                entry["statement"],
+                f"{entry['duration_ms']:.1f}",
+                str(entry["rows"]),
+                entry["view"],
+            )
+            for entry in entries
+        ])
+        self.plan_view.clear()
+
+    def fill_resources(self):
+        lines = ["Пул соединений:"]
+        lines += [f"  {key}: {value}" for key, value in self.db.pool_stats().items()]
+        lines.append("")
+        lines.append("Кэш результатов:")
+        lines += [f"  {key}: {value}" for key, value in self.db.cache_stats().items()]
+        lines.append("")
+        lines.append("Маршрутизация чтений:")
+        replica_stats = self.db.replica_stats()
+        for replica in replica_stats.pop("replicas"):
+            if replica["lag"] is None:
+                lag = "-"
+            elif math.isinf(replica["lag"]):
+                lag = "неизвестна"
+            else:
+                lag = f"{replica['lag']:.1f} с"
+            state = "доступна" if replica["available"] else f"недоступна ({replica['last_error']})"
+            lines.append(
+                f"  реплика {replica['address']}: {state}, задержка {lag}, чтений {replica['reads']}"
+            )
+        lines += [f"  {key}: {value}" for key, value in replica_stats.items()]
+        lines.append("")
+        lines.append("Подготовленные операторы (PREPARE / EXECUTE / из кэша соединения):")
+        for name, stats in sorted(self.db.prepared_stats().items()):
+            lines.append(
+                f"  {name}: {stats.get('prepares', 0)} / "
+                f"{stats.get('executions', 0)} / {stats.get('hits', 0)}"
+            )
+        self.resources_view.setPlainText("\n".join(lines))
+
+    def show_histogram(self):
+        row = self.stats_table.current_row()
+        if row < 0 or row >= len(self.stats_rows):
+            return
+        entry = self.stats_rows[row]
+        total = max(entry["count"], 1)
+        lines = [entry["statement"], ""]
+        previous = 0
+        for bound, hits in entry["histogram"]:
+            label = f"> {previous} мс" if bound == float("inf") else f"{previous}-{bound} мс"
+            lines.append(f"{label:>14} | {'#' * round(40 * hits / total):<40} {hits}")
+            if bound != float("inf"):
+                previous = bound
+        self.histogram_view.setPlainText("\n".join(lines))
+
+    def show_plan(self):
+        row = self.slow_table.current_row()
+        if row < 0 or row >= len(self.slow_entries):
+            return
+        entry = self.slow_entries[row]
+        plan = entry["plan"] or "План еще не получен (или EXPLAIN для оператора уже снимался недавно)."
+        self.plan_view.setPlainText(f"{entry['sql']}\n\n{plan}")
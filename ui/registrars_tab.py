@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -13,17 +10,20 @@ from PyQt5.QtWidgets import (
     QDialog,
     QSizePolicy,
 )
-from PyQt5.QtCore import Qt, QTimer, QDate
-from PyQt5.QtGui import QIcon, QColor
+from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtGui import QIcon
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 
 # Относительный импорт диалога
 from .registrar_dialog import RegistrarDialog
 import psycopg2
-import datetime  # Для сравнения дат
 
 
 class RegistrarsTab(QWidget):
@@ -35,10 +35,8 @@ class RegistrarsTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()
@@ -108,11 +106,14 @@ class RegistrarsTab(QWidget):
         toolbar.addStretch(1)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Название юр. лица", "ИНН", "Лицензия", "Срок действия"]
-        )
+        # Просроченные лицензии выделяются красным
+        self.table = DataTable([
+            Column("ID", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Название юр. лица"),
+            Column("ИНН"),
+            Column("Лицензия"),
+            Column("Срок действия", "date", date_format="%Y-%m-%d", empty="Бессрочно", expires=True),
+        ])
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # Название ЮЛ
         header.setSectionResizeMode(2, QHeaderView.Stretch)  # ИНН
@@ -120,13 +121,10 @@ class RegistrarsTab(QWidget):
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Срок
 
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
 
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         self.table.doubleClicked.connect(self.edit_registrar_on_double_click)
 
         layout.addLayout(search_layout)
@@ -134,7 +132,7 @@ class RegistrarsTab(QWidget):
         layout.addWidget(self.table)
 
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -152,89 +150,47 @@ class RegistrarsTab(QWidget):
         self.load_data()
 
     def load_data(self):
-        self.table.blockSignals(True)
-
         search_name_text = self.search_name_input.text().strip()
         search_inn_text = self.search_inn_input.text().strip()
         search_license_text = self.search_license_input.text().strip()
 
-        name_param = f"%{search_name_text}%" if search_name_text else None
-        inn_param = f"%{search_inn_text}%" if search_inn_text else None
-        license_param = f"%{search_license_text}%" if search_license_text else None
-
-        params = (
-            name_param,
-            name_param,
-            inn_param,
-            inn_param,
-            license_param,
-            license_param,
+        name_param = contains(search_name_text)
+        inn_param = contains(search_inn_text)
+        license_param = contains(search_license_text)
+
+        query, params = Queries.GET_REGISTRARS.build({
+            "name": name_param,
+            "inn": inn_param,
+            "license": license_param,
+        })
+
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error,
         )
 
+    def fill_table(self, registrars):
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_REGISTRARS, params)
-                    registrars = cursor.fetchall()
-
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(registrars))
-                    today = datetime.date.today()  # Текущая дата для сравнения
-
-                    for row, registrar in enumerate(registrars):
-                        reg_id = registrar[0]
-                        entity_name = registrar[1]
-                        inn = registrar[2]
-                        license_num = registrar[3]
-                        expiry_date = registrar[4]  # Это datetime.date или None
-
-                        # ID
-                        id_item = QTableWidgetItem(str(reg_id))
-                        id_item.setData(Qt.UserRole, reg_id)
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-                        # Name
-                        self.table.setItem(row, 1, QTableWidgetItem(entity_name))
-                        # INN
-                        self.table.setItem(row, 2, QTableWidgetItem(inn))
-                        # License Num
-                        self.table.setItem(row, 3, QTableWidgetItem(license_num))
-                        # Expiry Date
-                        expiry_text = (
-                            expiry_date.strftime("%Y-%m-%d")
-                            if expiry_date
-                            else "Бессрочно"
-                        )
-                        expiry_item = QTableWidgetItem(expiry_text)
-                        expiry_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                        self.table.setItem(row, 4, expiry_item)
-
-                        # Подсветка просроченных лицензий
-                        is_expired = expiry_date is not None and expiry_date < today
-                        if is_expired:
-                            expiry_item.setForeground(QColor("white"))
-                            expiry_item.setBackground(QColor("red"))  # Красный фон
-                            # Можно подсветить всю строку
-                            # for col in range(self.table.columnCount()):
-                            #     item = self.table.item(row, col)
-                            #     if item: item.setForeground(QColor('red'))
-
-            self.on_selection_changed()
-
-        except psycopg2.OperationalError as db_err:
+            self.table.set_rows(registrars)
+        except Exception as e:
+            self.on_load_error(e)
+
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить регистраторов:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить регистраторов:\n{error}"
             )
-            self.table.setRowCount(0)
-        except Exception as e:
+            self.table.clear_rows()
+        else:
             QMessageBox.critical(
                 self,
                 "Ошибка загрузки",
-                f"Не удалось загрузить регистраторов:\n{str(e)}",
+                f"Не удалось загрузить регистраторов:\n{str(error)}",
             )
-            self.table.setRowCount(0)
-        finally:
-            self.table.blockSignals(False)
+            self.table.clear_rows()
 
     def on_selection_changed(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -251,11 +207,8 @@ class RegistrarsTab(QWidget):
             self.sales_btn.setEnabled(is_selected)  # Зависит только от выбора
 
     def get_selected_id(self):
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_registrar(self):
         # Диалог сам загрузит доступные ЮЛ
@@ -345,17 +298,9 @@ class RegistrarsTab(QWidget):
             return
 
         # Получаем имя и лицензию для сообщения
-        current_row = self.table.currentRow()
-        reg_name = (
-            self.table.item(current_row, 1).text()
-            if self.table.item(current_row, 1)
-            else f"ID {registrar_id}"
-        )
-        license_num = (
-            self.table.item(current_row, 3).text()
-            if self.table.item(current_row, 3)
-            else "??"
-        )
+        current_row = self.table.current_row()
+        reg_name = self.table.text(current_row, 1) or f"ID {registrar_id}"
+        license_num = self.table.text(current_row, 3) or "??"
 
         reply = QMessageBox.question(
             self,
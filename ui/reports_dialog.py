@@ -73,7 +73,7 @@ class ReportDialog(QDialog):
         try:
             with self.db.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_ALL_TRANSACTIONS)
+                    cursor.execute(*Queries.GET_ALL_TRANSACTIONS.build())
                     transactions = cursor.fetchall()
                     
                     self.transaction_combo.clear()
@@ -253,7 +253,7 @@ class ReportsDialog(QDialog):
         try:
             with self.db.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_ALL_REPORTS)
+                    cursor.execute(*Queries.GET_ALL_REPORTS.build())
                     reports = cursor.fetchall()
 
                     self.table.setRowCount(len(reports))
@@ -0,0 +1,253 @@
+from bisect import bisect_left, bisect_right
+
+from PyQt5.QtCore import QAbstractProxyModel, QModelIndex, QPersistentModelIndex
+
+
+# Разделитель ячеек в тексте строки: совпадение не захватывает соседние ячейки
+SEPARATOR = "\x1f"
+
+class SearchIndex:
+    """Текст строк модели для поиска подстроки.
+
+    Для каждой строки хранится текст ее ячеек (как они показаны), склеенный
+    через разделитель и приведенный casefold: поиск — одна проверка
+    «подстрока в строке» на строку модели, без обращения к ячейкам.
+    None — текст строки неизвестен (строка не загружена), такая строка
+    подходит под любой запрос.
+
+    Если новый запрос содержит предыдущий (пользователь дописывает
+    слово), проверяются только строки, найденные по предыдущему.
+    """
+
+    def __init__(self, texts=()):
+        self.texts = list(texts)
+        self._last = None  # (запрос, найденные строки) для уточнения
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query):
+        """Номера строк (по возрастанию), текст которых содержит query"""
+        query = query.casefold()
+        if self._last is not None and self._last[0] in query:
+            texts = self.texts
+            rows = [row for row in self._last[1] if texts[row] is None or query in texts[row]]
+        else:
+            rows = [
+                row for row, text in enumerate(self.texts) if text is None or query in text
+            ]
+        self._last = (query, rows)
+        return rows
+
+    def matches(self, query, first, last):
+        """Строки first..last, текст которых содержит query"""
+        query = query.casefold()
+        return [
+            row for row in range(first, last + 1)
+            if self.texts[row] is None or query in self.texts[row]
+        ]
+
+    def replace(self, first, texts):
+        self.texts[first:first + len(texts)] = texts
+        self._last = None
+
+    def insert(self, first, texts):
+        self.texts[first:first] = texts
+        self._last = None
+
+    def delete(self, first, last):
+        del self.texts[first:last + 1]
+        self._last = None
+
+
+class SearchFilterModel(QAbstractProxyModel):
+    """Строки исходной модели, текст которых содержит строку поиска.
+
+    Исходная модель дает текст строк методом search_texts(first, last);
+    SearchIndex строится при первом поиске после загрузки и дальше
+    обновляется по сигналам модели (пачки StreamingTableModel, правки
+    строк), в том числе пока строка поиска пуста. По сигналу
+    search_texts_dropped (пачка вытеснена из памяти) текст строк в индексе
+    забывается, как у еще не загруженных. Отобранные строки — отсортированный список номеров строк
+    исходной модели; без строки поиска модель показывает все строки как есть.
+    """
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.query = ""
+        self.search_index = None
+        self._rows = None  # номера отобранных строк source; None — все строки
+        self._persistent = None
+        self._source = source
+        self.setSourceModel(source)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._on_reset)
+        source.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        source.rowsInserted.connect(self._on_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source.rowsRemoved.connect(self._on_rows_removed)
+        source.dataChanged.connect(self._on_data_changed)
+        source.layoutAboutToBeChanged.connect(self._on_layout_about_to_be_changed)
+        source.layoutChanged.connect(self._on_layout_changed)
+        source.headerDataChanged.connect(self.headerDataChanged)
+        source.search_texts_dropped.connect(self._on_texts_dropped)
+
+    def set_query(self, query):
+        """Отбирает строки, содержащие query; пустая строка — все строки"""
+        query = query.strip()
+        if query == self.query:
+            return
+        # Перестановка, а не сброс модели: выделение остается на
+        # строках, которые подходят под новый запрос
+        self._on_layout_about_to_be_changed()
+        self.query = query
+        self._filter()
+        self._remap_persistent()
+
+    def source_row(self, row):
+        """Номер строки исходной модели для строки row"""
+        return row if self._rows is None else self._rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.sourceModel().rowCount() if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        # Номер строки уже проверен: без проверок index() исходной модели
+        row = index.row() if self._rows is None else self._rows[index.row()]
+        return self._source.createIndex(row, index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = index.row()
+        if self._rows is not None:
+            position = bisect_left(self._rows, row)
+            if position == len(self._rows) or self._rows[position] != row:
+                return QModelIndex()
+            row = position
+        return self.index(row, index.column())
+
+    def _filter(self):
+        if not self.query:
+            self._rows = None
+            return
+        if self.search_index is None:
+            source = self.sourceModel()
+            self.search_index = SearchIndex(source.search_texts(0, source.rowCount() - 1))
+        self._rows = self.search_index.search(self.query)
+
+    def _on_reset(self):
+        self.search_index = None
+        self._filter()
+        self.endResetModel()
+
+    def _texts(self, first, last):
+        return self.sourceModel().search_texts(first, last)
+
+    def _on_rows_about_to_be_inserted(self, parent, first, last):
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent, first, last):
+        if self.search_index is not None:
+            self.search_index.insert(first, self._texts(first, last))
+        if self._rows is None:
+            self.endInsertRows()
+            return
+        count = last - first + 1
+        position = bisect_left(self._rows, first)
+        self._rows[position:] = [row + count for row in self._rows[position:]]
+        added = self.search_index.matches(self.query, first, last)
+        if added:
+            self.beginInsertRows(QModelIndex(), position, position + len(added) - 1)
+            self._rows[position:position] = added
+            self.endInsertRows()
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if self._rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            return
+        start, end = bisect_left(self._rows, first), bisect_right(self._rows, last)
+        if start < end:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+            del self._rows[start:end]
+            self.endRemoveRows()
+
+    def _on_rows_removed(self, parent, first, last):
+        if self.search_index is not None:
+            self.search_index.delete(first, last)
+        if self._rows is None:
+            self.endRemoveRows()
+            return
+        count = last - first + 1
+        position = bisect_left(self._rows, first)
+        self._rows[position:] = [row - count for row in self._rows[position:]]
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        first, last = top_left.row(), bottom_right.row()
+        if self.search_index is not None:
+            self.search_index.replace(first, self._texts(first, last))
+        if self._rows is None:
+            self.dataChanged.emit(
+                self.index(first, top_left.column()), self.index(last, bottom_right.column())
+            )
+            return
+        start, end = bisect_left(self._rows, first), bisect_right(self._rows, last)
+        matched = self.search_index.matches(self.query, first, last)
+        if matched == self._rows[start:end]:
+            if start < end:
+                self.dataChanged.emit(
+                    self.index(start, 0), self.index(end - 1, self.columnCount() - 1)
+                )
+            return
+        # Строки перестали (или начали) подходить под запрос
+        if start < end:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+            del self._rows[start:end]
+            self.endRemoveRows()
+        if matched:
+            self.beginInsertRows(QModelIndex(), start, start + len(matched) - 1)
+            self._rows[start:start] = matched
+            self.endInsertRows()
+
+    def _on_texts_dropped(self, first, last):
+        # Отобранные строки не меняются: строка без текста подходит под любой запрос
+        if self.search_index is not None:
+            self.search_index.replace(first, [None] * (last - first + 1))
+
+    def _on_layout_about_to_be_changed(self):
+        # Строки исходной модели переставляются (сортировка): выделение и
+        # прочие постоянные индексы запоминаются по исходным строкам
+        self.layoutAboutToBeChanged.emit()
+        self._persistent = [
+            (index, QPersistentModelIndex(self.mapToSource(index)))
+            for index in self.persistentIndexList()
+        ]
+
+    def _on_layout_changed(self):
+        # Текст индекса — в прежнем порядке строк
+        self.search_index = None
+        if self._rows is not None:
+            self._filter()
+        self._remap_persistent()
+
+    def _remap_persistent(self):
+        for index, source in self._persistent or ():
+            self.changePersistentIndex(index, self.mapFromSource(QModelIndex(source)))
+        self._persistent = None
+        self.layoutChanged.emit()
@@ -3,16 +3,13 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QLineEdit,
-    QAbstractItemView,
     QPushButton,
-    QTableWidget,
     QHeaderView,
     QLabel,
     QDateEdit,
     QMessageBox,
     QGroupBox,
     QFormLayout,
-    QTableWidgetItem,
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QIcon
@@ -20,9 +17,10 @@ from PyQt5.QtGui import QIcon
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable, infer_columns
+from .query_executor import query_executor
 import psycopg2
-import datetime
-from decimal import Decimal
 
 
 class SearchTab(QWidget):
@@ -83,10 +81,7 @@ class SearchTab(QWidget):
         btn_layout.addWidget(self.search_button)
 
         # Таблица результатов
-        self.results_table = QTableWidget()
-        self.results_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.results_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.results_table = DataTable([])
         self.results_table.setAlternatingRowColors(True)
         self.results_table.verticalHeader().setVisible(False)
         # Сортировку здесь пока не добавляем, чтобы не усложнять
@@ -106,36 +101,15 @@ class SearchTab(QWidget):
         self.date_start_edit.setDate(QDate())
         self.date_end_edit.setDate(QDate())
         # Очистка таблицы результатов
-        self.results_table.setRowCount(0)
-        self.results_table.setColumnCount(0)
+        self.results_table.set_columns([])
 
     def get_search_params(self):
         """Собирает параметры из полей ввода для SQL запроса."""
-        inv_name = (
-            f"%{self.investor_name_input.text().strip()}%"
-            if self.investor_name_input.text().strip()
-            else None
-        )
-        inv_inn = (
-            f"%{self.investor_inn_input.text().strip()}%"
-            if self.investor_inn_input.text().strip()
-            else None
-        )
-        reg_name = (
-            f"%{self.registrar_name_input.text().strip()}%"
-            if self.registrar_name_input.text().strip()
-            else None
-        )
-        em_name = (
-            f"%{self.emitter_name_input.text().strip()}%"
-            if self.emitter_name_input.text().strip()
-            else None
-        )
-        ticker = (
-            f"%{self.stock_ticker_input.text().strip().upper()}%"
-            if self.stock_ticker_input.text().strip()
-            else None
-        )
+        inv_name = contains(self.investor_name_input.text().strip())
+        inv_inn = contains(self.investor_inn_input.text().strip())
+        reg_name = contains(self.registrar_name_input.text().strip())
+        em_name = contains(self.emitter_name_input.text().strip())
+        ticker = contains(self.stock_ticker_input.text().strip().upper())
 
         date_start_q = self.date_start_edit.date()
         date_start = (
@@ -150,196 +124,120 @@ class SearchTab(QWidget):
             else None
         )
 
-        # Формируем кортеж из 35 параметров
-        params = (
-            # --- Параметры для секции Сделок (WHERE) --- (14 штук)
-            inv_name,
-            inv_name,  # investor_name
-            inv_inn,
-            inv_inn,  # investor_inn
-            reg_name,
-            reg_name,  # registrar_name
-            em_name,
-            em_name,  # emitter_name
-            ticker,
-            ticker,  # stock_ticker
-            date_start,
-            date_start,  # date_start
-            date_end,
-            date_end,  # date_end
-            # --- Параметры для секции Эмиссий (WHERE) --- (11 штук)
-            # Вместо инвестора передаем сами значения (которые будут None если не заданы)
-            inv_name,  # %s IS NULL для имени инвестора
-            inv_inn,  # %s IS NULL для ИНН инвестора
-            reg_name,
-            reg_name,  # registrar_name
-            em_name,
-            em_name,  # emitter_name
-            # Вместо тикера передаем само значение
-            ticker,  # %s IS NULL для тикера
-            date_start,
-            date_start,  # date_start
-            date_end,
-            date_end,  # date_end
-            # --- Параметры для подзапроса NOT EXISTS в секции Эмиссий --- (10 штук)
-            # Повторяем параметры, относящиеся к сделке
-            inv_name,
-            inv_name,  # investor_name
-            inv_inn,
-            inv_inn,  # investor_inn
-            ticker,
-            ticker,  # stock_ticker
-            date_start,
-            date_start,  # date_start
-            date_end,
-            date_end,  # date_end
-        )
-
-        # Проверка длины кортежа
-        if len(params) != 35:
-            raise ValueError(
-                f"Ошибка формирования параметров для поиска: ожидалось 35, получено {len(params)}"
-            )
+        # Незаданные фильтры (None) в запрос не попадают
+        params = {
+            "investor": inv_name,
+            "inn": inv_inn,
+            "registrar": reg_name,
+            "emitter": em_name,
+            "ticker": ticker,
+            "date_start": date_start,
+            "date_end": date_end,
+        }
 
         return params
 
     def perform_search(self):
         try:  # Добавим try..except вокруг get_search_params на случай ошибки там
-            params = self.get_search_params()
+            query, params = Queries.COMBINED_SEARCH.build(self.get_search_params())
         except ValueError as e:
             QMessageBox.critical(self, "Ошибка параметров", str(e))
             return
 
-        self.results_table.setRowCount(0)
-        self.results_table.setColumnCount(0)
+        self.results_table.set_columns([])
 
-        try:
+        def fetch():
             with self.db.get_connection() as conn:
                 with conn.cursor() as cursor:
                     print(
                         f"DEBUG [SearchTab]: Executing COMBINED_SEARCH with {len(params)} params."
                     )
-                    cursor.execute(Queries.COMBINED_SEARCH, params)
-                    results = cursor.fetchall()
-
-                    if not results:
-                        QMessageBox.information(
-                            self, "Поиск", "По вашему запросу ничего не найдено."
-                        )
-                        return
+                    cursor.execute(query, params)
+                    return cursor.description, cursor.fetchall()
 
-                    # --- ИЗМЕНЕНИЕ ЗДЕСЬ: Задаем русские заголовки ---
-                    # Словарь соответствия: 'алиас_из_sql' : 'Русский заголовок'
-                    # Ключи должны ТОЧНО совпадать с алиасами в вашем COMBINED_SEARCH
-                    header_map = {
-                        "result_type": "Тип",
-                        "id": "ID",
-                        "investor_name": "Инвестор",
-                        "investor_inn": "ИНН Инвестора",
-                        "stock_ticker": "Тикер ЦБ",
-                        "sale_date": "Дата сделки",  # Будет пустым для эмиссий
-                        "emitter_name": "Эмитент",
-                        "registrar_name": "Регистратор",
-                        "emission_date": "Дата эмиссии",  # Будет пустым для сделок? Нет, ваш запрос возвращает и там и там.
-                        # Возможно, лучше назвать 'Дата'? Или оставить так. Оставим пока так.
-                    }
+        # Поиск выполняется в фоновом потоке, результат выводится по готовности
+        query_executor().submit(self, fetch, self.show_results, self.on_search_error)
 
-                    # Получаем оригинальные имена столбцов (алиасы) из курсора
-                    original_headers = [desc[0] for desc in cursor.description]
-
-                    # Проверка: Выведем алиасы, которые вернул запрос (для отладки)
-                    print(
-                        f"DEBUG [SearchTab]: Original headers from DB: {original_headers}"
-                    )
-
-                    # Формируем список русских заголовков, используя карту
-                    # Если алиас не найден в карте, используем его как есть (запасной вариант)
-                    display_headers = [
-                        header_map.get(h, h.replace("_", " ").title())
-                        for h in original_headers
-                    ]
-
-                    self.results_table.setColumnCount(len(display_headers))
-                    self.results_table.setHorizontalHeaderLabels(
-                        display_headers
-                    )  # Используем новые заголовки
-
-                    try:
-                        id_column_index = display_headers.index("ID")
-                        self.results_table.setColumnHidden(id_column_index, True)
-                    except ValueError:
-                        print("Warning: 'ID' header not found, cannot hide column.")
-
-                    self.results_table.setRowCount(len(results))
-                    for row_idx, row_data in enumerate(results):
-                        for col_idx, cell_value in enumerate(row_data):
-                            # Преобразование в строку и форматирование
-                            if isinstance(cell_value, datetime.date):
-                                formatted_value = cell_value.strftime(
-                                    "%d.%m.%Y"
-                                )  # Формат даты
-                            elif isinstance(cell_value, (Decimal, float)):
-                                # Форматирование с пробелом как разделителем тысяч
-                                try:
-                                    formatted_value = "{:,.2f}".format(
-                                        cell_value
-                                    ).replace(",", " ")
-                                except (ValueError, TypeError):
-                                    formatted_value = str(
-                                        cell_value
-                                    )  # Запасной вариант
-                            elif (
-                                isinstance(cell_value, int)
-                                and display_headers[col_idx] == "Количество"
-                            ):  # Пример для целых
-                                formatted_value = "{:,}".format(cell_value).replace(
-                                    ",", " "
-                                )
-                            else:
-                                formatted_value = (
-                                    str(cell_value) if cell_value is not None else ""
-                                )
-
-                            item = QTableWidgetItem(formatted_value)
-
-                            # Выравнивание (можно улучшить, проверяя тип данных или конкретные заголовки)
-                            if display_headers[col_idx] in [
-                                "ID",
-                                "ИНН Инвестора",
-                                "Количество",
-                                "Цена/Объем",
-                            ]:
-                                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                            elif display_headers[col_idx] in [
-                                "Дата сделки",
-                                "Дата эмиссии",
-                            ]:
-                                item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-
-                            self.results_table.setItem(row_idx, col_idx, item)
+    def show_results(self, result):
+        description, results = result
+        try:
+            if not results:
+                QMessageBox.information(
+                    self, "Поиск", "По вашему запросу ничего не найдено."
+                )
+                return
+
+            # --- ИЗМЕНЕНИЕ ЗДЕСЬ: Задаем русские заголовки ---
+            # Словарь соответствия: 'алиас_из_sql' : 'Русский заголовок'
+            # Ключи должны ТОЧНО совпадать с алиасами в вашем COMBINED_SEARCH
+            header_map = {
+                "result_type": "Тип",
+                "id": "ID",
+                "investor_name": "Инвестор",
+                "investor_inn": "ИНН Инвестора",
+                "stock_ticker": "Тикер ЦБ",
+                "sale_date": "Дата сделки",  # Будет пустым для эмиссий
+                "emitter_name": "Эмитент",
+                "registrar_name": "Регистратор",
+                "emission_date": "Дата эмиссии",  # Будет пустым для сделок? Нет, ваш запрос возвращает и там и там.
+                # Возможно, лучше назвать 'Дата'? Или оставить так. Оставим пока так.
+            }
+
+            # Получаем оригинальные имена столбцов (алиасы) из курсора
+            original_headers = [desc[0] for desc in description]
+
+            # Проверка: Выведем алиасы, которые вернул запрос (для отладки)
+            print(
+                f"DEBUG [SearchTab]: Original headers from DB: {original_headers}"
+            )
 
-                    # Настройка ширины колонок
-                    # self.results_table.resizeColumnsToContents() # Вариант 1: Автоматически по содержимому
-                    # Вариант 2: Растянуть некоторые, остальные по содержимому
-                    header = self.results_table.horizontalHeader()
-                    for i in range(len(display_headers)):
-                        if display_headers[i] in ["Инвестор", "Эмитент", "Регистратор"]:
-                            header.setSectionResizeMode(i, QHeaderView.Stretch)
-                        else:
-                            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+            # Формируем список русских заголовков, используя карту
+            # Если алиас не найден в карте, используем его как есть (запасной вариант)
+            display_headers = [
+                header_map.get(h, h.replace("_", " ").title())
+                for h in original_headers
+            ]
+
+            # Вид столбца — по типу значений; целые, кроме количества, без разрядов
+            columns = infer_columns(display_headers, results, date_format="%d.%m.%Y")
+            for index, column in enumerate(columns):
+                if column.kind == "int" and column.title != "Количество":
+                    columns[index] = Column(column.title, align=Qt.AlignRight | Qt.AlignVCenter)
+                elif column.title in ("ИНН Инвестора", "Цена/Объем"):
+                    column.align = Qt.AlignRight | Qt.AlignVCenter
+                elif column.title in ("Дата сделки", "Дата эмиссии"):
+                    column.align = Qt.AlignCenter | Qt.AlignVCenter
+            self.results_table.set_columns(columns)
+
+            try:
+                id_column_index = display_headers.index("ID")
+                self.results_table.setColumnHidden(id_column_index, True)
+            except ValueError:
+                print("Warning: 'ID' header not found, cannot hide column.")
+
+            self.results_table.set_rows(results)
+
+            # Растянуть некоторые, остальные по содержимому
+            header = self.results_table.horizontalHeader()
+            for i in range(len(display_headers)):
+                if display_headers[i] in ["Инвестор", "Эмитент", "Регистратор"]:
+                    header.setSectionResizeMode(i, QHeaderView.Stretch)
+                else:
+                    header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        except Exception as e:
+            self.on_search_error(e)
 
-        except psycopg2.Error as db_err:  # Ловим специфичные ошибки БД
+    def on_search_error(self, error):
+        if isinstance(error, psycopg2.Error):  # Ловим специфичные ошибки БД
             QMessageBox.critical(
-                self, "Ошибка БД", f"Ошибка при выполнении поиска:\n{db_err}"
+                self, "Ошибка БД", f"Ошибка при выполнении поиска:\n{error}"
             )
-            print(f"DB ERROR in perform_search: {db_err}")  # Для консоли
-        except ValueError as val_err:  # Ловим ошибку из get_search_params
-            QMessageBox.critical(self, "Ошибка параметров", str(val_err))
-        except Exception as e:
+            print(f"DB ERROR in perform_search: {error}")  # Для консоли
+        else:
             QMessageBox.critical(
-                self, "Ошибка поиска", f"Произошла непредвиденная ошибка:\n{str(e)}"
+                self, "Ошибка поиска", f"Произошла непредвиденная ошибка:\n{str(error)}"
             )
-            print(f"ERROR in perform_search: {e}")
+            print(f"ERROR in perform_search: {error}")
             import traceback
 
-            traceback.print_exc()
+            traceback.print_exception(type(error), error, error.__traceback__)
@@ -102,19 +102,18 @@ class SellDialog(QDialog):
         self.investor_combo.clear()
         self.investor_combo.addItem("--- Выберите инвестора ---", None)  # ID = None
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_INVESTOR_LIST)
-                    investors = cursor.fetchall()
-                    if investors:
-                        investor_ok = True
-                        for inv_id, name in investors:
-                            self.investor_combo.addItem(
-                                name, inv_id
-                            )  # Сохраняем ID в данных
-                    else:
-                        self.investor_combo.addItem("Нет инвесторов в БД", None)
-                        self.investor_combo.setEnabled(False)
+            investors = self.db.execute_query(
+                Queries.GET_INVESTOR_LIST, fetch_all=True, cache=True
+            )
+            if investors:
+                investor_ok = True
+                for inv_id, name in investors:
+                    self.investor_combo.addItem(
+                        name, inv_id
+                    )  # Сохраняем ID в данных
+            else:
+                self.investor_combo.addItem("Нет инвесторов в БД", None)
+                self.investor_combo.setEnabled(False)
         except Exception as e:
             print(f"ERROR loading investors: {e}")
             QMessageBox.warning(
@@ -126,21 +125,19 @@ class SellDialog(QDialog):
         self.stock_combo.clear()
         self.stock_combo.addItem("--- Выберите ЦБ ---", None)  # ID = None
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        Queries.GET_STOCK_LIST
-                    )  # Запрос должен возвращать ID и Ticker/Name
-                    stocks = cursor.fetchall()
-                    if stocks:
-                        stock_ok = True
-                        for st_id, name in stocks:
-                            self.stock_combo.addItem(
-                                name, st_id
-                            )  # Сохраняем ID в данных
-                    else:
-                        self.stock_combo.addItem("Нет ЦБ в БД", None)
-                        self.stock_combo.setEnabled(False)
+            # Запрос должен возвращать ID и Ticker/Name
+            stocks = self.db.execute_query(
+                Queries.GET_STOCK_LIST, fetch_all=True, cache=True
+            )
+            if stocks:
+                stock_ok = True
+                for st_id, name in stocks:
+                    self.stock_combo.addItem(
+                        name, st_id
+                    )  # Сохраняем ID в данных
+            else:
+                self.stock_combo.addItem("Нет ЦБ в БД", None)
+                self.stock_combo.setEnabled(False)
         except Exception as e:
             print(f"ERROR loading stocks: {e}")
             QMessageBox.warning(
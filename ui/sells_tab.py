@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -14,12 +11,17 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     QDateEdit,
 )
-from PyQt5.QtCore import Qt, QTimer, QDate
+from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QIcon, QColor
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column
+from .filter_controller import FilterController
+from .pagination import total_text
+from .streaming_table import StreamingTable
 
 # Относительный импорт диалога
 from .sell_dialog import SellDialog
@@ -37,12 +39,11 @@ class SellsTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
 
         self.init_ui()
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        # (пачки списка читаются от имени таблицы)
+        self.search_filter = FilterController(self.table, self._perform_search)
         self.load_data()
 
     def init_ui(self):
@@ -121,12 +122,15 @@ class SellsTab(QWidget):
         toolbar.addStretch(1)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        # Указываем заголовки столбцов
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Инвестор", "Тикер ЦБ", "Дата", "Кол-во (шт)", "Цена за шт (руб)"]
-        )
+        # Строки читаются пачками по мере прокрутки, порядок — по дате продажи
+        self.table = StreamingTable([
+            Column("ID", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Инвестор"),
+            Column("Тикер ЦБ"),
+            Column("Дата", "date"),
+            Column("Кол-во (шт)", "int"),
+            Column("Цена за шт (руб)", "money"),
+        ], self.on_load_error, table="sells")
         header = self.table.horizontalHeader()
         # Настройка ширины колонок
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # Инвестор
@@ -136,19 +140,11 @@ class SellsTab(QWidget):
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Кол-во
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Цена
         # Настройки поведения таблицы
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)  # Выбор строк
-        self.table.setSelectionMode(
-            QAbstractItemView.SingleSelection
-        )  # Только одна строка
-        self.table.setEditTriggers(
-            QAbstractItemView.NoEditTriggers
-        )  # Запрет редактирования в ячейках
         self.table.setAlternatingRowColors(True)  # Чередование цветов строк
         self.table.verticalHeader().setVisible(False)  # Скрыть номера строк слева
-        self.table.setSortingEnabled(True)  # Включаем сортировку по клику на заголовок
 
         # Сигналы таблицы
-        self.table.itemSelectionChanged.connect(
+        self.table.selection_changed.connect(
             self.on_selection_changed
         )  # При изменении выбора
         self.table.doubleClicked.connect(
@@ -160,9 +156,16 @@ class SellsTab(QWidget):
         layout.addLayout(toolbar)
         layout.addWidget(self.table)
 
+        # Оценка числа строк списка
+        self.total_label = QLabel()
+        self.table.total_changed.connect(
+            lambda total: self.total_label.setText(total_text(total))
+        )
+        layout.addWidget(self.total_label)
+
     def on_search_text_changed(self):
         """Запускает таймер для отложенного поиска/фильтрации."""
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         """Выполняет загрузку данных (фильтрацию)."""
@@ -189,7 +192,7 @@ class SellsTab(QWidget):
         self.load_data()
 
     def get_filter_params(self):
-        """Собирает параметры из полей фильтрации для SQL запроса GET_SELLS."""
+        """Собирает значения фильтров для запроса GET_SELLS (None — фильтр не задан)."""
         investor_text = self.search_investor_input.text().strip()
         stock_text = (
             self.search_stock_input.text().strip().upper()
@@ -204,111 +207,38 @@ class SellsTab(QWidget):
         date_end = date_end_qdate.toPyDate()
 
         # Подготавливаем параметры для SQL LIKE (None если поле пустое)
-        investor_param = f"%{investor_text}%" if investor_text else None
-        stock_param = f"%{stock_text}%" if stock_text else None
-
-        # Кортеж параметров в порядке, ожидаемом запросом Queries.GET_SELLS
-        params = (
-            investor_param,
-            investor_param,  # Для имени инвестора
-            stock_param,
-            stock_param,  # Для тикера ЦБ
-            date_start,
-            date_start,  # Для даты С
-            date_end,
-            date_end,  # Для даты ПО
-        )
+        investor_param = contains(investor_text)
+        stock_param = contains(stock_text)
+
+        params = {
+            "investor": investor_param,
+            "stock": stock_param,
+            "date_start": date_start,
+            "date_end": date_end,
+        }
         print(f"DEBUG [{self.__class__.__name__}]: Filter params: {params}")
         return params
 
     def load_data(self):
         """Загружает данные сделок в таблицу с учетом фильтров."""
-        params = self.get_filter_params()
-        # Выключаем сортировку перед манипуляциями с таблицей
-        self.table.setSortingEnabled(False)
-        # Блокируем сигналы таблицы, чтобы избежать лишних вызовов on_selection_changed
-        self.table.blockSignals(True)
-
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Выполняем запрос к БД
-                    cursor.execute(Queries.GET_SELLS, params)
-                    sells = cursor.fetchall()  # Получаем все строки
-
-                    # Очищаем таблицу и устанавливаем новое количество строк
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(sells))
-
-                    # Заполняем таблицу данными
-                    for row, sell in enumerate(sells):
-                        # Распаковываем данные строки
-                        sell_id, investor_name, stock_ticket, sale_date, num, price = (
-                            sell
-                        )
-
-                        # Создаем и настраиваем ячейку ID
-                        id_item = QTableWidgetItem()
-                        id_item.setData(
-                            Qt.DisplayRole, sell_id
-                        )  # Данные для отображения и сортировки
-                        id_item.setData(
-                            Qt.UserRole, sell_id
-                        )  # Данные для get_selected_id (внутреннее использование)
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-
-                        # Создаем ячейки для остальных столбцов
-                        self.table.setItem(row, 1, QTableWidgetItem(investor_name))
-                        self.table.setItem(row, 2, QTableWidgetItem(stock_ticket))
-
-                        # Форматируем и выравниваем дату
-                        date_item = QTableWidgetItem(
-                            sale_date.strftime("%d.%m.%Y")
-                        )  # Российский формат
-                        date_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                        self.table.setItem(row, 3, date_item)
-
-                        # Форматируем и выравниваем количество
-                        num_item = QTableWidgetItem()
-                        num_item.setData(Qt.DisplayRole, num)  # Число для сортировки
-                        num_item.setText(
-                            f"{num:,}".replace(",", " ")
-                        )  # Формат с разделителем
-                        num_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 4, num_item)
-
-                        # Форматируем и выравниваем цену
-                        price_item = QTableWidgetItem()
-                        price_item.setData(
-                            Qt.DisplayRole, float(price)
-                        )  # Float для сортировки
-                        price_item.setText(
-                            f"{price:,.2f}".replace(",", " ")
-                        )  # Формат с разделителем и 2 знаками
-                        price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 5, price_item)
-
-            # Обновляем состояние кнопок после загрузки данных
-            self.on_selection_changed()
+        # В запрос попадают только условия заданных фильтров; пачки строк
+        # читаются в фоновом потоке по мере прокрутки таблицы
+        self.table.load(Queries.GET_SELLS, self.get_filter_params())
 
-        except psycopg2.OperationalError as db_err:
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить сделки:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить сделки:\n{error}"
             )
-            self.table.setRowCount(0)  # Очищаем таблицу при ошибке
-        except Exception as e:
+            self.table.clear_rows()  # Очищаем таблицу при ошибке
+        else:
             QMessageBox.critical(
-                self, "Критическая Ошибка", f"Не удалось загрузить сделки:\n{str(e)}"
+                self, "Критическая Ошибка", f"Не удалось загрузить сделки:\n{str(error)}"
             )
-            self.table.setRowCount(0)  # Очищаем таблицу при ошибке
+            self.table.clear_rows()  # Очищаем таблицу при ошибке
             import traceback
 
-            traceback.print_exc()  # Вывод полного стека ошибки в консоль
-        finally:
-            # Включаем сортировку и сигналы обратно
-            self.table.setSortingEnabled(True)
-            self.table.blockSignals(False)
+            traceback.print_exception(type(error), error, error.__traceback__)  # Вывод полного стека ошибки в консоль
 
     def on_selection_changed(self):
         """Обновляет состояние кнопок 'Редактировать', 'Удалить' при изменении выбора."""
@@ -323,12 +253,8 @@ class SellsTab(QWidget):
 
     def get_selected_id(self):
         """Возвращает ID выбранной сделки или None."""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            # Получаем ID из UserRole первой ячейки (столбец 0) выбранной строки
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_sell_preselected(self, preselected_investor_info):
         """Открывает диалог добавления сделки с предустановленным инвестором."""
@@ -485,25 +411,13 @@ class SellsTab(QWidget):
             return
 
         # Получаем информацию о сделке для окна подтверждения
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             return  # На всякий случай
 
-        investor = (
-            self.table.item(current_row, 1).text()
-            if self.table.item(current_row, 1)
-            else "?"
-        )
-        stock = (
-            self.table.item(current_row, 2).text()
-            if self.table.item(current_row, 2)
-            else "?"
-        )
-        date = (
-            self.table.item(current_row, 3).text()
-            if self.table.item(current_row, 3)
-            else "?"
-        )
+        investor = self.table.text(current_row, 1) or "?"
+        stock = self.table.text(current_row, 2) or "?"
+        date = self.table.text(current_row, 3) or "?"
 
         # Запрос подтверждения у пользователя
         reply = QMessageBox.question(
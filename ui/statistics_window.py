@@ -16,15 +16,20 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
+from decimal import Decimal
 
-from database.db import Database
+from database.statistics import StatisticsService
+from .query_executor import query_executor
 
 class StatisticsWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Статистика")
         self.setGeometry(100, 100, 1200, 800)
-        self.db = Database()
+        # Все показатели окна — из одного согласованного снимка; он читается
+        # в фоновом потоке (load_data), метки заполняются по его готовности
+        self.snapshot = None
+        self.stat_labels = []  # (подпись, атрибут снимка, метка значения)
         
         # Создаем центральный виджет и главный layout
         central_widget = QWidget()
@@ -185,8 +190,8 @@ class StatisticsWindow(QMainWindow):
         
         content_layout.addWidget(tab_widget)
         
-        # Обновляем данные
-        self.refresh_data()
+        # Загружаем данные
+        self.load_data()
         
     def create_stats_group(self, title, parent_layout):
         """Создает группу для статистики"""
@@ -236,59 +241,73 @@ class StatisticsWindow(QMainWindow):
     def add_deposit_stats(self, layout):
         """Добавляет статистику по вкладам"""
         stats = [
-            ("Всего вкладов:", "SELECT COUNT(*) FROM Deposit"),
-            ("Активных вкладов:", "SELECT COUNT(*) FROM Deposit WHERE status = 'open'"),
-            ("Общая сумма вкладов:", "SELECT SUM(amount) FROM Deposit"),
-            ("Средняя процентная ставка:", "SELECT AVG(interest_rate) FROM Deposit")
+            ("Всего вкладов:", "deposits_total"),
+            ("Активных вкладов:", "deposits_open"),
+            ("Общая сумма вкладов:", "deposits_amount"),
+            ("Средняя процентная ставка:", "average_interest_rate")
         ]
         self.add_stats_to_layout(layout, stats)
         
     def add_client_stats(self, layout):
         """Добавляет статистику по клиентам"""
         stats = [
-            ("Всего клиентов:", "SELECT COUNT(*) FROM Client"),
-            ("Клиентов с вкладами:", "SELECT COUNT(DISTINCT client_id) FROM Deposit"),
-            ("Среднее количество вкладов на клиента:", """
-                SELECT CAST(COUNT(d.id) AS FLOAT) / COUNT(DISTINCT d.client_id)
-                FROM Deposit d
-            """)
+            ("Всего клиентов:", "clients_total"),
+            ("Клиентов с вкладами:", "clients_with_deposits"),
+            ("Среднее количество вкладов на клиента:", "deposits_per_client")
         ]
         self.add_stats_to_layout(layout, stats)
         
     def add_transaction_stats(self, layout):
         """Добавляет статистику по транзакциям"""
         stats = [
-            ("Всего транзакций:", "SELECT COUNT(*) FROM Transaction"),
-            ("Общая сумма транзакций:", "SELECT SUM(ABS(amount)) FROM Transaction"),
-            ("Средняя сумма транзакции:", "SELECT AVG(ABS(amount)) FROM Transaction")
+            ("Всего транзакций:", "transactions_total"),
+            ("Общая сумма транзакций:", "transactions_amount"),
+            ("Средняя сумма транзакции:", "average_transaction")
         ]
         self.add_stats_to_layout(layout, stats)
         
     def add_stats_to_layout(self, layout, stats):
-        """Добавляет статистику в layout"""
-        for row, (label_text, query) in enumerate(stats):
-            try:
-                result = self.db.execute_query(query, fetch_one=True)[0]
-                if isinstance(result, (int, float)):
-                    if "сумма" in label_text.lower():
-                        value_text = f"₽ {result:,.2f}"
-                    elif "ставка" in label_text.lower():
-                        value_text = f"{result:.2f}%"
-                    else:
-                        value_text = f"{result:,.0f}"
-                else:
-                    value_text = str(result) if result is not None else "Н/Д"
-            except Exception:
-                value_text = "Н/Д"
-                
+        """Добавляет статистику в layout; значения — после загрузки снимка"""
+        for row, (label_text, attribute) in enumerate(stats):
             # Добавляем метку
             label = QLabel(label_text)
             layout.addWidget(label, row, 0)
             
             # Добавляем значение
-            value_label = QLabel(value_text)
+            value_label = QLabel("Загрузка...")
             value_label.setProperty("class", "stat-value")
             layout.addWidget(value_label, row, 1)
+            self.stat_labels.append((label_text, attribute, value_label))
+            
+    def format_stat(self, label_text, result):
+        """Текст значения показателя"""
+        if isinstance(result, (int, float, Decimal)):
+            if "сумма" in label_text.lower():
+                return f"₽ {result:,.2f}"
+            if "ставка" in label_text.lower():
+                return f"{result:.2f}%"
+            if isinstance(result, int):
+                return f"{result:,.0f}"
+            return f"{result:,.2f}"
+        return str(result) if result is not None else "Н/Д"
+        
+    def load_data(self):
+        """Читает снимок статистики в фоновом потоке"""
+        query_executor().submit(
+            self, StatisticsService().snapshot, self.on_snapshot, self.on_load_error
+        )
+        
+    def on_snapshot(self, snapshot):
+        """Снимок загружен: заполняет показатели и графики"""
+        self.snapshot = snapshot
+        for label_text, attribute, value_label in self.stat_labels:
+            value_label.setText(self.format_stat(label_text, getattr(snapshot, attribute)))
+        self.refresh_data()
+        
+    def on_load_error(self, error):
+        print(f"Ошибка при загрузке статистики: {str(error)}")
+        for label_text, attribute, value_label in self.stat_labels:
+            value_label.setText("Н/Д")
         
     def create_deposits_chart(self, parent_layout):
         """Создает график по вкладам"""
@@ -364,15 +383,11 @@ class StatisticsWindow(QMainWindow):
         
     def refresh_data(self):
         """Обновляет данные на графиках"""
+        if self.snapshot is None:
+            return
         try:
-            # График сумм по вкладам
-            query = """
-                SELECT d.type, SUM(d.amount) as total_amount
-                FROM Deposit d
-                GROUP BY d.type
-                ORDER BY total_amount DESC
-            """
-            results = self.db.execute_query(query, fetch_all=True)
+            # График сумм по вкладам (типы уже упорядочены по убыванию суммы)
+            results = self.snapshot.amount_by_type
             
             types = [r[0] for r in results]
             amounts = [float(r[1]) for r in results]
@@ -69,19 +69,18 @@ class StockDialog(QDialog):
         ok_button = self.findChild(QDialogButtonBox).button(QDialogButtonBox.Ok)
         emission_ok = False
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Используем запрос для списка эмиссий (возможно, только активных?)
-                    # Пока используем GET_EMISSION_LIST как есть
-                    cursor.execute(Queries.GET_EMISSION_LIST)
-                    emissions = cursor.fetchall()
-                    if emissions:
-                        emission_ok = True
-                        for em_id, name in emissions:
-                            self.emission_combo.addItem(name, em_id)
-                    else:
-                        self.emission_combo.addItem("Нет доступных эмиссий", None)
-                        self.emission_combo.setEnabled(False)
+            # Используем запрос для списка эмиссий (возможно, только активных?)
+            # Пока используем GET_EMISSION_LIST как есть
+            emissions = self.db.execute_query(
+                Queries.GET_EMISSION_LIST, fetch_all=True, cache=True
+            )
+            if emissions:
+                emission_ok = True
+                for em_id, name in emissions:
+                    self.emission_combo.addItem(name, em_id)
+            else:
+                self.emission_combo.addItem("Нет доступных эмиссий", None)
+                self.emission_combo.setEnabled(False)
 
         except Exception as e:
             QMessageBox.warning(
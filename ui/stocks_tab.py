@@ -2,9 +2,6 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QAbstractItemView,
-    QTableWidgetItem,
     QPushButton,
     QLineEdit,
     QLabel,
@@ -14,17 +11,20 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     QComboBox,
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QColor
 
 # Используем КЛАССЫ
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
+from .data_table import Column, DataTable
+from .filter_controller import FilterController
+from .query_executor import query_executor
 
 # Относительный импорт
 from .stock_dialog import StockDialog
 import psycopg2
-from decimal import Decimal  # Для форматирования
 
 
 class StocksTab(QWidget):
@@ -36,10 +36,8 @@ class StocksTab(QWidget):
             f"DEBUG [{self.__class__.__name__}]: Initialized with role '{self.user_role}', is_admin={self.is_admin}"
         )
         self.db = Database()  # Экземпляр
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.search_timer.setInterval(500)
-        self.search_timer.timeout.connect(self._perform_search)
+        # Отложенный поиск; запрос прежнего фильтра отменяется на сервере
+        self.search_filter = FilterController(self, self._perform_search)
 
         self.init_ui()
         self.load_data()  # Загрузка данных и комбо фильтра
@@ -112,11 +110,13 @@ class StocksTab(QWidget):
         toolbar.addStretch(1)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Тикер", "Номинал (руб.)", "Эмитент", "Дата эмиссии"]
-        )
+        self.table = DataTable([
+            Column("ID", align=Qt.AlignRight | Qt.AlignVCenter),
+            Column("Тикер"),
+            Column("Номинал (руб.)", "money"),
+            Column("Эмитент"),
+            Column("Дата эмиссии", "date", date_format="%Y-%m-%d"),
+        ])
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(3, QHeaderView.Stretch)  # Эмитент
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
@@ -124,13 +124,10 @@ class StocksTab(QWidget):
         header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # Номинал
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Дата эмиссии
 
-        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
 
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         self.table.doubleClicked.connect(self.edit_stock_on_double_click)
 
         layout.addLayout(filter_layout)
@@ -141,7 +138,7 @@ class StocksTab(QWidget):
         self.load_emission_filter_combo()
 
     def on_search_text_changed(self):
-        self.search_timer.start()
+        self.search_filter.changed()
 
     def _perform_search(self):
         self.load_data()
@@ -170,13 +167,11 @@ class StocksTab(QWidget):
             "Все эмиссии", None
         )  # Опция для отсутствия фильтра
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        Queries.GET_EMISSION_LIST
-                    )  # Используем тот же список
-                    for em_id, name in cursor.fetchall():
-                        self.filter_emission_combo.addItem(name, em_id)
+            # Используем тот же список
+            for em_id, name in self.db.execute_query(
+                Queries.GET_EMISSION_LIST, fetch_all=True, cache=True
+            ):
+                self.filter_emission_combo.addItem(name, em_id)
             # Восстанавливаем выбор
             index = self.filter_emission_combo.findData(current_selection)
             if index != -1:
@@ -194,75 +189,49 @@ class StocksTab(QWidget):
         emitter_text = self.search_emitter_input.text().strip()
         emission_id = self.filter_emission_combo.currentData()  # ID или None
 
-        ticket_param = f"%{ticket_text}%" if ticket_text else None
-        emitter_param = f"%{emitter_text}%" if emitter_text else None
+        ticket_param = contains(ticket_text)
+        emitter_param = contains(emitter_text)
         emission_id_param = emission_id
 
-        params = (
-            ticket_param,
-            ticket_param,
-            emitter_param,
-            emitter_param,
-            emission_id_param,
-            emission_id_param,
-        )
+        params = {
+            "ticket": ticket_param,
+            "emitter": emitter_param,
+            "emission_id": emission_id_param,
+        }
         return params
 
     def load_data(self):
-        params = self.get_filter_params()
-        self.table.blockSignals(True)
+        # В запрос попадают только условия заданных фильтров
+        query, params = Queries.GET_STOCKS.build(self.get_filter_params())
 
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(Queries.GET_STOCKS, params)
-                    stocks = cursor.fetchall()
-
-                    self.table.setRowCount(0)
-                    self.table.setRowCount(len(stocks))
-
-                    for row, stock in enumerate(stocks):
-                        stock_id = stock[0]
-                        ticket = stock[1]
-                        nominal_value = stock[2]  # Decimal
-                        emitter_name = stock[3]
-                        emission_date = stock[4]  # date
-
-                        # ID
-                        id_item = QTableWidgetItem(str(stock_id))
-                        id_item.setData(Qt.UserRole, stock_id)
-                        id_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 0, id_item)
-                        # Ticket
-                        self.table.setItem(row, 1, QTableWidgetItem(ticket))
-                        # Nominal
-                        nominal_item = QTableWidgetItem(f"{nominal_value:,.2f}")
-                        nominal_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        self.table.setItem(row, 2, nominal_item)
-                        # Emitter
-                        self.table.setItem(row, 3, QTableWidgetItem(emitter_name))
-                        # Emission Date
-                        date_item = QTableWidgetItem(emission_date.strftime("%Y-%m-%d"))
-                        date_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-                        self.table.setItem(row, 4, date_item)
+        # Запрос выполняется в фоновом потоке, таблица заполняется по готовности
+        query_executor().submit(
+            self,
+            lambda: self.db.execute_query(query, params=params, fetch_all=True),
+            self.fill_table,
+            self.on_load_error,
+        )
 
+    def fill_table(self, stocks):
+        try:
+            self.table.set_rows(stocks)
             # Обновляем комбо фильтра эмиссий после загрузки данных
             # Это нужно, если эмиссии могли быть добавлены/удалены
             self.load_emission_filter_combo()
-            self.on_selection_changed()
+        except Exception as e:
+            self.on_load_error(e)
 
-        except psycopg2.OperationalError as db_err:
+    def on_load_error(self, error):
+        if isinstance(error, psycopg2.OperationalError):
             QMessageBox.critical(
-                self, "Ошибка БД", f"Не удалось загрузить ЦБ:\n{db_err}"
+                self, "Ошибка БД", f"Не удалось загрузить ЦБ:\n{error}"
             )
-            self.table.setRowCount(0)
-        except Exception as e:
+            self.table.clear_rows()
+        else:
             QMessageBox.critical(
-                self, "Ошибка загрузки", f"Не удалось загрузить ЦБ:\n{str(e)}"
+                self, "Ошибка загрузки", f"Не удалось загрузить ЦБ:\n{str(error)}"
             )
-            self.table.setRowCount(0)
-        finally:
-            self.table.blockSignals(False)
+            self.table.clear_rows()
 
     def on_selection_changed(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -279,11 +248,8 @@ class StocksTab(QWidget):
             self.sales_btn.setEnabled(is_selected)  # Зависит только от выбора
 
     def get_selected_id(self):
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            id_item = self.table.item(selected_rows[0].row(), 0)
-            return id_item.data(Qt.UserRole) if id_item else None
-        return None
+        row = self.table.current_row()
+        return self.table.value(row, 0) if row >= 0 else None
 
     def add_stock(self):
         # Диалог сам загрузит эмиссии
@@ -363,11 +329,7 @@ class StocksTab(QWidget):
                 QMessageBox.warning(self, "Внимание", "Выберите ЦБ для удаления.")
             return
 
-        ticket = (
-            self.table.item(self.table.currentRow(), 1).text()
-            if self.table.item(self.table.currentRow(), 1)
-            else f"ID {stock_id}"
-        )
+        ticket = self.table.text(self.table.current_row(), 1) or f"ID {stock_id}"
 
         reply = QMessageBox.question(
             self,
@@ -0,0 +1,297 @@
+from bisect import bisect_right
+from collections import OrderedDict
+
+from PyQt5.QtCore import QModelIndex, Qt, pyqtSignal
+
+from database.pagination import KeysetBatches
+from .data_table import BaseDataTable, BaseTableModel
+from .formatting import format_values
+from .search_index import SEPARATOR
+from .live_updates import change_notifier
+from .query_executor import query_executor
+
+
+class StreamingTableModel(BaseTableModel):
+    """Модель списка, который читается пачками по мере прокрутки.
+
+    Представление запрашивает следующую пачку через canFetchMore/fetchMore,
+    когда прокрутка доходит до конца загруженных строк; пачки читает
+    KeysetBatches в фоне (query_executor от имени view), по одному запросу
+    за раз. В памяти держится не больше max_batches последних
+    использованных пачек, от остальных остается только число строк:
+    вытесненная пачка перечитывается по своим границам, когда ее строки
+    снова нужно показать. Пока пачки нет, ячейки пустые. Текст ячеек
+    форматируется по столбцу на всю пачку и живет, пока пачка в памяти;
+    при вытеснении пачки ее текст удаляется и из индекса поиска
+    (search_texts_dropped).
+
+    table — таблица строк списка: при уведомлении об их изменении
+    загруженные пачки перечитываются на месте.
+    """
+
+    # Оценка общего числа строк списка
+    total_changed = pyqtSignal(object)
+
+    def __init__(self, columns, view, on_error, batch_size=200, max_batches=25, table=None,
+                 inactive_column=None, inactive_value=False):
+        super().__init__(columns, view, inactive_column, inactive_value)
+        self.view = view
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.source = None
+        self.total = None
+        self._reset_batches()
+        if table:
+            change_notifier().subscribe(table, self, self.refresh)
+
+    def _reset_batches(self):
+        self._batches = OrderedDict()  # номер -> строки, в порядке использования
+        self._texts = {}               # (номер, столбец) -> тексты ячеек пачки
+        self._sizes = []               # число строк каждой прочитанной пачки
+        self._starts = []              # номер первой строки пачки в модели
+        self._count = 0
+        self._wanted = {}              # пачки к перечитыванию (последняя — первой)
+        self._tail_wanted = False
+        self._loading = None           # номер читаемой пачки, "tail" — следующая
+        self._failed = set()           # пачки, перечитать которые не удалось
+
+    def load(self, query, values=None):
+        """Открывает список заново (новые фильтры) с первой пачки"""
+        self.beginResetModel()
+        self.source = KeysetBatches(query, values, batch_size=self.batch_size)
+        self.total = None
+        self._reset_batches()
+        self.endResetModel()
+        # Запрос нового поколения отменяет результат запущенного
+        self._tail_wanted = True
+        self._pump()
+
+    def clear(self):
+        self.beginResetModel()
+        self.source = None
+        self.total = None
+        self._reset_batches()
+        self.endResetModel()
+        query_executor().invalidate(self.view)
+
+    def refresh(self, ids=None):
+        """Перечитывает загруженные пачки после изменения строк ids.
+
+        Если все ids найдены среди загруженных строк, перечитываются только
+        их пачки; иначе (новые строки, None) — все загруженные и хвостовая.
+        """
+        if self.source is None:
+            return
+        numbers = None
+        if ids is not None:
+            id_column = self.source.query.keyset[-1][1]
+            numbers, found = set(), set()
+            for number, rows in self._batches.items():
+                for row in rows:
+                    if row[id_column] in ids:
+                        numbers.add(number)
+                        found.add(row[id_column])
+            if found != ids:
+                numbers = None
+        if numbers is None:
+            numbers = list(self._batches)
+            if self.source.complete and self._sizes:
+                numbers.append(len(self._sizes) - 1)
+        self._failed.clear()
+        for number in numbers:
+            self._wanted.pop(number, None)
+            self._wanted[number] = None
+        self._pump()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.source is None:
+            return False
+        return not self.source.complete and not self._tail_wanted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._tail_wanted = True
+            self._pump()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid():
+            number = self._locate(index.row())
+            if number not in self._batches:
+                self._want(number)
+                return None
+        return super().data(index, role)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Порядок задает ключ keyset запроса
+        pass
+
+    def value(self, row, column):
+        rows = self._rows_of(row)
+        return None if rows is None else rows[row - self._starts[self._locate(row)]][column]
+
+    def row_values(self, row):
+        rows = self._rows_of(row)
+        return None if rows is None else tuple(rows[row - self._starts[self._locate(row)]])
+
+    def text(self, row, column):
+        number = self._locate(row)
+        if number not in self._batches:
+            return ""
+        return self._batch_texts(number, column)[row - self._starts[number]]
+
+    def search_texts(self, first, last):
+        # Строки невыгруженных пачек (None) подходят под любой запрос, пока
+        # не будут прочитаны
+        texts = []
+        row = first
+        while row <= last:
+            number = self._locate(row)
+            start = row - self._starts[number]
+            stop = min(self._sizes[number], last + 1 - self._starts[number])
+            if number in self._batches:
+                columns = [
+                    self._batch_texts(number, column)[start:stop]
+                    for column in range(len(self.columns))
+                ]
+                texts.extend(SEPARATOR.join(cells).casefold() for cells in zip(*columns))
+            else:
+                texts.extend([None] * (stop - start))
+            row += stop - start
+        return texts
+
+    def _batch_texts(self, number, column):
+        texts = self._texts.get((number, column))
+        if texts is None:
+            rows = self._batches[number]
+            texts = format_values(self.columns[column], [values[column] for values in rows])
+            self._texts[number, column] = texts
+        return texts
+
+    def _drop_texts(self, number):
+        for column in range(len(self.columns)):
+            self._texts.pop((number, column), None)
+
+    def _locate(self, row):
+        # Пустые пачки делят начало со следующей — берется последняя из них
+        return bisect_right(self._starts, row) - 1
+
+    def _rows_of(self, row):
+        number = self._locate(row)
+        rows = self._batches.get(number)
+        if rows is not None:
+            self._batches.move_to_end(number)
+        return rows
+
+    def _want(self, number):
+        # Пачка с ошибкой чтения не запрашивается при каждой перерисовке
+        if number not in self._wanted and number != self._loading \
+                and number not in self._failed:
+            self._wanted[number] = None
+            self._pump()
+
+    def _pump(self):
+        if self._loading is not None or self.source is None:
+            return
+        source = self.source
+        if self._wanted:
+            # Последней запрошена пачка, которую сейчас показывает представление
+            number, _ = self._wanted.popitem()
+            self._loading = number
+            query_executor().submit(
+                self.view, lambda: (number, source.batch(number), None),
+                self._on_batch, self._on_error,
+            )
+        elif self._tail_wanted:
+            first = source.count == 0
+            self._loading = "tail"
+
+            def fetch():
+                batch = source.next()
+                total = source.estimated_total() if first else None
+                return (None, [], total) if batch is None else (*batch, total)
+
+            query_executor().submit(self.view, fetch, self._on_batch, self._on_error)
+
+    def _on_batch(self, result):
+        number, rows, total = result
+        if self._loading == "tail":
+            self._tail_wanted = False
+        self._loading = None
+        if total is not None:
+            self.total = total
+            self.total_changed.emit(total)
+        if number is not None:
+            self._store(number, rows)
+        self._pump()
+
+    def _on_error(self, error):
+        if self._loading == "tail":
+            self._tail_wanted = False
+        elif self._loading is not None:
+            self._failed.add(self._loading)
+        self._loading = None
+        self.on_error(error)
+
+    def _store(self, number, rows):
+        if number == len(self._sizes):
+            start = self._count
+            self._sizes.append(0)
+            self._starts.append(start)
+        start, old, new = self._starts[number], self._sizes[number], len(rows)
+        if new > old:
+            self.beginInsertRows(QModelIndex(), start + old, start + new - 1)
+        elif new < old:
+            self.beginRemoveRows(QModelIndex(), start + new, start + old - 1)
+        self._batches[number] = rows
+        self._batches.move_to_end(number)
+        self._drop_texts(number)
+        self._sizes[number] = new
+        self._count += new - old
+        for later in range(number + 1, len(self._starts)):
+            self._starts[later] += new - old
+        if new > old:
+            self.endInsertRows()
+        elif new < old:
+            self.endRemoveRows()
+        if min(old, new):
+            self.dataChanged.emit(
+                self.index(start, 0), self.index(start + min(old, new) - 1, len(self.columns) - 1)
+            )
+        # Вытесняются давно не показанные пачки; только что прочитанная — последняя
+        while len(self._batches) > self.max_batches:
+            evicted = self._batches.popitem(last=False)[0]
+            self._drop_texts(evicted)
+            if self._sizes[evicted]:
+                first = self._starts[evicted]
+                self.search_texts_dropped.emit(first, first + self._sizes[evicted] - 1)
+
+
+class StreamingTable(BaseDataTable):
+    """Таблица над StreamingTableModel: строки читаются по мере прокрутки"""
+
+    def __init__(self, columns, on_error, parent=None, batch_size=200, max_batches=25,
+                 table=None, inactive_column=None, inactive_value=False):
+        self._options = (on_error, batch_size, max_batches, table)
+        super().__init__(
+            columns, parent, inactive_column=inactive_column, inactive_value=inactive_value
+        )
+        self.total_changed = self.table_model.total_changed
+
+    def create_model(self, columns, inactive_column, inactive_value):
+        on_error, batch_size, max_batches, table = self._options
+        return StreamingTableModel(
+            columns, self, on_error, batch_size, max_batches, table,
+            inactive_column, inactive_value,
+        )
+
+    def load(self, query, values=None):
+        self.table_model.load(query, values)
+        self.selection_changed.emit()
+
+    def clear_rows(self):
+        self.table_model.clear()
+        self.selection_changed.emit()
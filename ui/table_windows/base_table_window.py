@@ -4,18 +4,23 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QLineEdit,
     QLabel,
     QMessageBox,
     QMenu,
-    QHeaderView,
     QGroupBox,
-    QFrame
+    QFrame,
+    QFileDialog
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QIcon, QColor, QPalette
+from psycopg2.extensions import QueryCanceledError
+
+from ui.data_table import DataTable
+from ui.filter_controller import FilterController
+from ui.pagination import PageNavigator, total_text
+from ui.query_executor import query_executor
+from ui.streaming_table import StreamingTable
 
 class BaseTableWindow(QMainWindow):
     """Базовый класс для окон с таблицами"""
@@ -23,6 +28,23 @@ class BaseTableWindow(QMainWindow):
     # Сигнал для обновления связанных окон
     data_changed = pyqtSignal()
     
+    # Сущность для массового импорта из CSV (ключ IMPORT_SPECS), None — импорт недоступен
+    import_entity = None
+    
+    # Запрос списка (FilteredQuery с keyset): окно загружает его постранично,
+    # значения фильтров дает filter_values(). None — build_query() целиком
+    list_query = None
+    page_size = 200
+    # Таблица строк списка: их изменения другими пользователями (LISTEN/NOTIFY)
+    # обновляют открытую страницу
+    list_table = None
+    # Список без страниц: строки list_query (обязателен) читаются пачками
+    # по page_size по мере прокрутки таблицы (StreamingTable)
+    streaming = False
+    
+    # Столбцы таблицы (ui.data_table.Column)
+    columns = []
+    
     def __init__(self, parent=None, title="Table Window", user_role="user"):
         super().__init__(parent)
         self.parent = parent
@@ -58,6 +80,12 @@ class BaseTableWindow(QMainWindow):
         # Создаем таблицу
         self.create_table()
         
+        # Поля фильтров подключаются к filters.changed (ввод текста) или
+        # filters.apply_now (выпадающие списки)
+        self.filters = FilterController(
+            self.table if self.streaming else self, self.refresh_table, self.filter_state
+        )
+        
         # Нижняя панель с кнопками действий
         self.create_bottom_panel()
         
@@ -147,27 +175,39 @@ class BaseTableWindow(QMainWindow):
         search_layout.addWidget(self.search_input)
         
         top_panel.addLayout(search_layout)
+        
+        # Индикатор фоновой загрузки
+        self.busy_label = QLabel("Загрузка...")
+        self.busy_label.setStyleSheet("color: #21A038; font-weight: bold;")
+        self.busy_label.hide()
+        top_panel.addWidget(self.busy_label)
+        query_executor().busy_changed.connect(self.on_busy_changed)
         self.main_layout.addLayout(top_panel)
         
     def create_table(self):
-        """Создает таблицу"""
-        self.table = QTableWidget()
+        """Создает таблицу со столбцами columns"""
+        if self.streaming:
+            self.table = StreamingTable(
+                self.columns, self.on_load_error, batch_size=self.page_size,
+                table=self.list_table
+            )
+        else:
+            self.table = DataTable(self.columns)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selection_changed.connect(self.on_selection_changed)
         
         # Стилизация таблицы
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #E7F5E9;
                 color: black;
             }
@@ -232,8 +272,36 @@ class BaseTableWindow(QMainWindow):
             self.delete_button.setEnabled(False)
             self.delete_button.setStyleSheet(button_style)
             bottom_panel.addWidget(self.delete_button)
+            
+            if self.import_entity:
+                self.import_button = QPushButton("Импорт из CSV")
+                self.import_button.clicked.connect(self.import_records)
+                self.import_button.setStyleSheet(button_style)
+                bottom_panel.addWidget(self.import_button)
+        
+        # Экспорт доступен всем пользователям
+        self.export_button = QPushButton("Экспорт в CSV")
+        self.export_button.clicked.connect(self.export_records)
+        self.export_button.setStyleSheet(button_style)
+        bottom_panel.addWidget(self.export_button)
         
         bottom_panel.addStretch()
+        
+        if self.streaming:
+            # Страниц нет: число строк списка
+            self.total_label = QLabel()
+            self.table.total_changed.connect(
+                lambda total: self.total_label.setText(total_text(total))
+            )
+            bottom_panel.addWidget(self.total_label)
+        else:
+            # Листание страниц списка
+            self.pages = PageNavigator(
+                self, self.fill_table, self.on_load_error, self.page_size,
+                table=self.list_table
+            )
+            self.pages.setVisible(self.list_query is not None)
+            bottom_panel.addWidget(self.pages)
         self.main_layout.addLayout(bottom_panel)
         
     def create_navigation_panel(self):
@@ -310,7 +378,7 @@ class BaseTableWindow(QMainWindow):
         
     def on_selection_changed(self):
         """Обработчик изменения выделения в таблице"""
-        has_selection = len(self.table.selectedItems()) > 0
+        has_selection = self.table.current_row() >= 0
         
         if self.user_role == "admin":
             self.edit_button.setEnabled(has_selection)
@@ -323,7 +391,7 @@ class BaseTableWindow(QMainWindow):
                 widget.setEnabled(has_selection)
                 
         if has_selection:
-            self.show_related_records(self.table.currentRow())
+            self.show_related_records(self.table.current_row())
         
     def show_context_menu(self, position):
         """Показывает контекстное меню для строки таблицы"""
@@ -346,24 +414,70 @@ class BaseTableWindow(QMainWindow):
                 self.delete_record()
                 
     def search_in_table(self):
-        """Поиск по таблице"""
-        search_text = self.search_input.text().lower()
-        for row in range(self.table.rowCount()):
-            row_hidden = True
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item and search_text in item.text().lower():
-                    row_hidden = False
-                    break
-            self.table.setRowHidden(row, row_hidden)
+        """Поиск по таблице: остаются строки, содержащие текст поиска.
+        Фильтр сохраняется при перезагрузке и догрузке строк"""
+        self.table.set_filter(self.search_input.text())
+            
+    def import_records(self):
+        """Массовый импорт записей из CSV-файла"""
+        from database.bulk_import import BulkImporter, IMPORT_SPECS
+        
+        spec = IMPORT_SPECS[self.import_entity]
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            f"Импорт: {spec['title']}",
+            "",
+            "CSV Files (*.csv);;All Files (*)"
+        )
+        if not path:
+            return
+        rejects_path = path.rsplit(".", 1)[0] + "_rejected.csv"
+        
+        try:
+            result = BulkImporter().import_file(self.import_entity, path, rejects_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить импорт:\n{str(e)}")
+            return
             
+        message = (
+            f"Строк в файле: {result['total']}\n"
+            f"Загружено: {result['imported']}\n"
+            f"Отклонено: {result['rejected']}"
+        )
+        if result["rejects_path"]:
+            message += f"\n\nОтчет об отклоненных строках:\n{result['rejects_path']}"
+        QMessageBox.information(self, "Импорт завершен", message)
+        self.refresh_table()
+        
+    def export_records(self):
+        """Экспорт записей с текущими фильтрами в CSV (или .csv.gz)"""
+        from database.export import CsvExporter
+        
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Экспорт в CSV",
+            "",
+            "CSV Files (*.csv);;CSV gzip (*.csv.gz);;All Files (*)"
+        )
+        if not path:
+            return
+            
+        headers = self.table.column_titles()
+        try:
+            query, params = self.build_query()
+            rows = CsvExporter().export_query(query, params, path, headers=headers)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить экспорт:\n{str(e)}")
+            return
+        QMessageBox.information(self, "Экспорт завершен", f"Выгружено строк: {rows}\n{path}")
+        
     def add_record(self):
         """Добавление новой записи"""
         raise NotImplementedError("Метод add_record должен быть переопределен")
         
     def edit_record(self):
         """Редактирование записи"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите запись для редактирования")
             return
@@ -371,7 +485,7 @@ class BaseTableWindow(QMainWindow):
         
     def delete_record(self):
         """Удаление записи"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите запись для удаления")
             return
@@ -383,6 +497,80 @@ class BaseTableWindow(QMainWindow):
             return
         raise NotImplementedError("Метод show_related_records должен быть переопределен")
         
+    def filter_values(self):
+        """Значения фильтров list_query для текущего состояния поиска"""
+        return {}
+        
+    def filter_state(self):
+        """Состояние фильтров: при том же состоянии список не загружается заново"""
+        if self.list_query is not None:
+            return self.filter_values()
+        return self.build_query()
+        
+    def build_query(self):
+        """Запрос и параметры для текущего состояния фильтров (все строки)"""
+        if self.list_query is not None:
+            return self.list_query.build(self.filter_values())
+        raise NotImplementedError("Метод build_query должен быть переопределен")
+        
     def refresh_table(self):
-        """Обновление данных в таблице"""
-        raise NotImplementedError("Метод refresh_table должен быть переопределен") 
\ No newline at end of file
+        """Обновление данных в таблице (запрос выполняется в фоновом потоке)"""
+        if self.list_query is not None:
+            try:
+                values = self.filter_values()
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+                return
+            if self.streaming:
+                # Первая пачка и оценка числа строк; остальные — по мере прокрутки
+                self.table.load(self.list_query, values)
+            else:
+                # Первая страница и оценка числа строк; остальные — кнопками навигации
+                self.pages.load(self.list_query, values)
+            return
+        try:
+            query, params = self.build_query()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+            return
+        # Строки показываются пачками по мере чтения, а не после всего результата
+        query_executor().submit_batches(
+            self,
+            lambda: self.fetch_rows(query, params),
+            self.fill_batch,
+            self.on_load_error
+        )
+        
+    def fetch_rows(self, query, params):
+        """Пачки строк результата (серверный курсор); вызывается в фоновом
+        потоке, виджеты трогать нельзя"""
+        return self.db.stream_query(query, params=params)
+        
+    def fill_table(self, rows):
+        """Показывает строки результата; текст ячеек — по описаниям columns"""
+        self.table.set_rows(rows)
+        
+    def fill_batch(self, rows, first):
+        """Первая пачка заменяет строки таблицы, следующие дописываются"""
+        if first:
+            self.fill_table(rows)
+        else:
+            self.table.append_rows(rows)
+        
+    def on_load_error(self, error):
+        """Ошибка фоновой загрузки"""
+        if isinstance(error, QueryCanceledError):
+            # Отмененные запросы сюда не попадают — сработал statement_timeout
+            seconds = self.filters.statement_timeout / 1000
+            QMessageBox.warning(
+                self, "Долгий запрос",
+                f"Запрос выполнялся дольше {seconds:g} с и был прерван. "
+                "Уточните условия поиска."
+            )
+            return
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(error)}")
+        
+    def on_busy_changed(self, view, busy):
+        """Показывает индикатор, пока для окна выполняются запросы"""
+        if view is self or view is self.table:
+            self.busy_label.setVisible(busy)
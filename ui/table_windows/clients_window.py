@@ -5,14 +5,15 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QGroupBox,
     QHBoxLayout
 )
 from PyQt5.QtCore import Qt
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
+from database.query_builder import contains
 from .documents_window import DocumentsWindow
 from .deposits_window import DepositsWindow
 
@@ -71,12 +72,16 @@ class ClientDialog(QDialog):
         }
 
 class ClientsWindow(BaseTableWindow):
+    import_entity = "client"
+    columns = [
+        Column("ID"), Column("Имя"), Column("Фамилия"), Column("Телефон"),
+    ]
+    
     def __init__(self, parent=None, user_role="user", specific_client_id=None):
         super().__init__(parent, title="Клиенты", user_role=user_role)
         self.db = Database()
         self.specific_client_id = specific_client_id
         self.setup_search_panel()
-        self.setup_table()
         self.setup_navigation()
         self.refresh_table()
         
@@ -91,13 +96,13 @@ class ClientsWindow(BaseTableWindow):
         
         self.search_last_name = QLineEdit()
         self.search_last_name.setPlaceholderText("Введите фамилию...")
-        self.search_last_name.textChanged.connect(self.refresh_table)
+        self.search_last_name.textChanged.connect(self.filters.changed)
         
         self.search_phone = QLineEdit()
         self.search_phone.setInputMask("+7 (999) 999-99-99;_")
         self.search_phone.setPlaceholderText("+7 (___) ___-__-__")
         self.initial_phone_mask = self.search_phone.text()
-        self.search_phone.textChanged.connect(self.refresh_table)
+        self.search_phone.textChanged.connect(self.filters.changed)
         
         search_layout.addRow("Фамилия:", self.search_last_name)
         search_layout.addRow("Телефон:", self.search_phone)
@@ -105,11 +110,6 @@ class ClientsWindow(BaseTableWindow):
         search_group.setLayout(search_layout)
         self.main_layout.insertWidget(1, search_group)
         
-    def setup_table(self):
-        """Настраивает структуру таблицы"""
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["ID", "Имя", "Фамилия", "Телефон"])
-        
     def setup_navigation(self):
         """Настраивает кнопки навигации"""
         self.add_navigation_button("Вклады клиента", self.show_deposits)
@@ -117,69 +117,53 @@ class ClientsWindow(BaseTableWindow):
         
     def show_deposits(self):
         """Открывает окно вкладов для выбранного клиента"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
-            client_id = self.table.item(current_row, 0).text()
-            client_name = f"{self.table.item(current_row, 1).text()} {self.table.item(current_row, 2).text()}"
+            client_id = self.table.text(current_row, 0)
+            client_name = f"{self.table.text(current_row, 1)} {self.table.text(current_row, 2)}"
             deposits_window = DepositsWindow(self, client_id, client_name)
             deposits_window.show()
             
     def show_documents(self):
         """Открывает окно документов для выбранного клиента"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
-            client_id = self.table.item(current_row, 0).text()
-            client_name = f"{self.table.item(current_row, 1).text()} {self.table.item(current_row, 2).text()}"
+            client_id = self.table.text(current_row, 0)
+            client_name = f"{self.table.text(current_row, 1)} {self.table.text(current_row, 2)}"
             documents_window = DocumentsWindow(self, client_id, client_name)
             documents_window.show()
         
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            # Базовый запрос
-            query = """
-                SELECT id, first_name, last_name, phone
-                FROM Client
-                WHERE 1=1
-            """
-            params = []
+    def build_query(self):
+        """Запрос и параметры для текущего состояния фильтров"""
+        # Базовый запрос
+        query = """
+            SELECT id, first_name, last_name, phone
+            FROM Client
+            WHERE 1=1
+        """
+        params = []
 
-            # Если указан конкретный клиент, показываем только его
-            if self.specific_client_id:
-                query += " AND id = %s"
-                params.append(self.specific_client_id)
-            else:
-                # Иначе применяем фильтры поиска
-                if self.search_last_name.text():
-                    query += " AND LOWER(last_name) LIKE LOWER(%s)"
-                    params.append(f"%{self.search_last_name.text()}%")
+        # Если указан конкретный клиент, показываем только его
+        if self.specific_client_id:
+            query += " AND id = %s"
+            params.append(self.specific_client_id)
+        else:
+            # Иначе применяем фильтры поиска
+            if self.search_last_name.text():
+                query += " AND LOWER(last_name) LIKE LOWER(%s)"
+                params.append(contains(self.search_last_name.text()))
 
-                if self.search_phone.text() != self.initial_phone_mask:
-                    current_phone = ''.join(c for c in self.search_phone.text() if c.isdigit())
-                    if current_phone:
-                        query += " AND phone ~ %s"
-                        search_pattern = '%'
-                        for digit in current_phone:
-                            search_pattern += f'[^0-9]*{digit}'
-                        search_pattern += '%'
-                        params.append(search_pattern)
+            if self.search_phone.text() != self.initial_phone_mask:
+                current_phone = ''.join(c for c in self.search_phone.text() if c.isdigit())
+                if current_phone:
+                    # Поиск по цифрам номера (триграммный индекс по тому же выражению)
+                    query += " AND regexp_replace(phone, '\\D', '', 'g') LIKE %s"
+                    params.append(contains(current_phone))
 
-            query += " ORDER BY last_name, first_name"
-            
-            results = self.db.execute_query(query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(0)
-            for row_num, row_data in enumerate(results):
-                self.table.insertRow(row_num)
-                for col_num, cell_data in enumerate(row_data):
-                    item = QTableWidgetItem(str(cell_data) if cell_data is not None else "")
-                    if col_num == 0:  # ID column
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row_num, col_num, item)
-                    
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
-            
+        query += " ORDER BY last_name, first_name"
+        
+        return query, params
+        
     def add_record(self):
         """Добавление нового клиента"""
         dialog = ClientDialog(self)
@@ -203,16 +187,16 @@ class ClientsWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранного клиента"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите клиента для редактирования")
             return
             
         client_data = {
-            "id": self.table.item(current_row, 0).text(),
-            "first_name": self.table.item(current_row, 1).text(),
-            "last_name": self.table.item(current_row, 2).text(),
-            "phone": self.table.item(current_row, 3).text()
+            "id": self.table.text(current_row, 0),
+            "first_name": self.table.text(current_row, 1),
+            "last_name": self.table.text(current_row, 2),
+            "phone": self.table.text(current_row, 3)
         }
         
         dialog = ClientDialog(self, client_data)
@@ -243,13 +227,13 @@ class ClientsWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранного клиента"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите клиента для удаления")
             return
             
-        client_id = self.table.item(current_row, 0).text()
-        client_name = f"{self.table.item(current_row, 1).text()} {self.table.item(current_row, 2).text()}"
+        client_id = self.table.text(current_row, 0)
+        client_name = f"{self.table.text(current_row, 1)} {self.table.text(current_row, 2)}"
         
         reply = QMessageBox.question(
             self,
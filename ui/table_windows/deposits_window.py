@@ -5,7 +5,6 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QDateEdit,
     QComboBox,
     QDoubleSpinBox,
@@ -15,10 +14,12 @@ from PyQt5.QtWidgets import (
     QSpinBox
 )
 from PyQt5.QtCore import Qt, QDate
-from datetime import datetime
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
+from database.queries import Queries
+from database.query_builder import contains
 from .transactions_window import TransactionsWindow
 
 class DepositDialog(QDialog):
@@ -127,6 +128,29 @@ class DepositDialog(QDialog):
         }
 
 class DepositsWindow(BaseTableWindow):
+    import_entity = "deposit"
+    list_query = Queries.GET_DEPOSITS_TABLE
+    list_table = "deposit"
+    columns = [
+        Column("ID"),
+        Column("Клиент"),
+        Column("Сумма", "money", suffix=" ₽"),
+        Column("Дата открытия", "date"),
+        Column("Дата закрытия", "date", empty="-"),
+        Column("Ставка", "percent"),
+        Column("Срок", align=Qt.AlignCenter),
+        Column("Тип"),
+        Column("Статус", "status", labels={
+            "open": "Открыт",
+            "closed": "Закрыт",
+            "closed early": "Закрыт досрочно"
+        }, colors={
+            "open": "#21A038",
+            "closed": "#666666",
+            "closed early": "#E65100"
+        }),
+    ]
+    
     def __init__(self, parent=None, client_id=None, client_name=None, deposit_id=None, user_role="user"):
         title = f"Вклады - {client_name}" if client_name else "Вклады"
         super().__init__(parent, title=title, user_role=user_role)
@@ -147,7 +171,7 @@ class DepositsWindow(BaseTableWindow):
 
     def show_client(self):
         """Открывает окно клиента для выбранного вклада"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
                 # Получаем ID клиента из базы данных
@@ -159,7 +183,7 @@ class DepositsWindow(BaseTableWindow):
                 """
                 result = self.db.execute_query(
                     query,
-                    params=(self.table.item(current_row, 0).text(),),
+                    params=(self.table.text(current_row, 0),),
                     fetch_one=True
                 )
                 
@@ -178,11 +202,11 @@ class DepositsWindow(BaseTableWindow):
 
     def show_transactions(self):
         """Открывает окно транзакций для выбранного вклада"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
-                deposit_id = self.table.item(current_row, 0).text()
-                deposit_info = f"{self.table.item(current_row, 1).text()} ({self.table.item(current_row, 2).text()})"
+                deposit_id = self.table.text(current_row, 0)
+                deposit_info = f"{self.table.text(current_row, 1)} ({self.table.text(current_row, 2)})"
                 
                 from .transactions_window import TransactionsWindow
                 transactions_window = TransactionsWindow(
@@ -204,7 +228,7 @@ class DepositsWindow(BaseTableWindow):
         # Поиск по клиенту
         self.search_client_input = QLineEdit()
         self.search_client_input.setPlaceholderText("Введите имя клиента...")
-        self.search_client_input.textChanged.connect(self.refresh_table)
+        self.search_client_input.textChanged.connect(self.filters.changed)
         
         # Фильтр по типу вклада
         self.filter_type_combo = QComboBox()
@@ -215,7 +239,7 @@ class DepositsWindow(BaseTableWindow):
             "До востребования",
             "Пенсионный"
         ])
-        self.filter_type_combo.currentIndexChanged.connect(self.refresh_table)
+        self.filter_type_combo.currentIndexChanged.connect(self.filters.apply_now)
         
         # Фильтр по статусу
         self.filter_status_combo = QComboBox()
@@ -225,7 +249,7 @@ class DepositsWindow(BaseTableWindow):
             "Закрытые",
             "Закрытые досрочно"
         ])
-        self.filter_status_combo.currentIndexChanged.connect(self.refresh_table)
+        self.filter_status_combo.currentIndexChanged.connect(self.filters.apply_now)
         
         # Добавляем элементы на форму
         search_layout.addRow("Клиент:", self.search_client_input)
@@ -237,12 +261,6 @@ class DepositsWindow(BaseTableWindow):
 
     def setup_table(self):
         """Настраивает таблицу"""
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Клиент", "Сумма", "Дата открытия", 
-            "Дата закрытия", "Ставка", "Срок", "Тип", "Статус"
-        ])
-        
         # Настройка размеров столбцов
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, header.ResizeToContents)  # ID
@@ -255,119 +273,20 @@ class DepositsWindow(BaseTableWindow):
         header.setSectionResizeMode(7, header.ResizeToContents)  # Тип
         header.setSectionResizeMode(8, header.ResizeToContents)  # Статус
 
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            base_query = """
-                SELECT 
-                    d.id,
-                    CONCAT(c.last_name, ' ', c.first_name) as client_name,
-                    d.amount,
-                    d.open_date,
-                    d.close_date,
-                    d.interest_rate,
-                    EXTRACT(EPOCH FROM d.term)/86400 as term_days,
-                    d.type,
-                    d.status
-                FROM Deposit d
-                JOIN Client c ON d.client_id = c.id
-                WHERE 1=1
-            """
-            
-            params = []
+    def filter_values(self):
+        """Значения фильтров GET_DEPOSITS_TABLE"""
+        # Конкретный вклад или вклады клиента — остальные фильтры не применяются
+        if self.deposit_id:
+            return {"deposit_id": self.deposit_id}
+        if self.client_id:
+            return {"client_id": self.client_id}
             
-            # Фильтр по конкретному вкладу
-            if self.deposit_id:
-                base_query += " AND d.id = %s"
-                params.append(self.deposit_id)
-            # Фильтр по конкретному клиенту
-            elif self.client_id:
-                base_query += " AND d.client_id = %s"
-                params.append(self.client_id)
-            else:
-                # Применяем остальные фильтры только если не ищем конкретный вклад или клиента
-                if "client_name" in self.get_filter_params():
-                    base_query += " AND (LOWER(c.first_name) LIKE LOWER(%(client_name)s) OR LOWER(c.last_name) LIKE LOWER(%(client_name)s))"
-                if "deposit_type" in self.get_filter_params():
-                    base_query += " AND d.type = %(deposit_type)s"
-                if "status" in self.get_filter_params():
-                    base_query += " AND d.status = %(status)s"
-                params = self.get_filter_params()
-                
-            base_query += " ORDER BY d.open_date DESC"
-            
-            deposits = self.db.execute_query(base_query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(len(deposits))
-            for row, dep in enumerate(deposits):
-                # ID
-                self.table.setItem(row, 0, QTableWidgetItem(str(dep[0])))
-                
-                # Клиент
-                self.table.setItem(row, 1, QTableWidgetItem(dep[1]))
-                
-                # Сумма
-                amount_item = QTableWidgetItem(f"{dep[2]:,.2f} ₽")
-                amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.table.setItem(row, 2, amount_item)
-                
-                # Дата открытия
-                open_date_item = QTableWidgetItem(dep[3].strftime("%d.%m.%Y"))
-                open_date_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, 3, open_date_item)
-                
-                # Дата закрытия
-                close_date = dep[4]
-                close_date_item = QTableWidgetItem(
-                    close_date.strftime("%d.%m.%Y") if close_date else "-"
-                )
-                close_date_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, 4, close_date_item)
-                
-                # Ставка
-                rate_item = QTableWidgetItem(f"{dep[5]:.2f}%")
-                rate_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, 5, rate_item)
-                
-                # Срок
-                term_item = QTableWidgetItem(str(dep[6]))
-                term_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, 6, term_item)
-                
-                # Тип
-                self.table.setItem(row, 7, QTableWidgetItem(dep[7]))
-                
-                # Статус
-                status_map = {
-                    "open": "Открыт",
-                    "closed": "Закрыт",
-                    "closed early": "Закрыт досрочно"
-                }
-                status_item = QTableWidgetItem(status_map.get(dep[8], dep[8]))
-                status_item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, 8, status_item)
-                
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Ошибка",
-                f"Не удалось загрузить данные:\n{str(e)}"
-            )
-            self.table.setRowCount(0)
-
-    def get_filter_params(self):
-        """Возвращает параметры фильтрации"""
-        params = {}
+        values = {"client_name": contains(self.search_client_input.text().strip())}
         
-        # Фильтр по клиенту
-        client_name = self.search_client_input.text().strip()
-        if client_name:
-            params["client_name"] = f"%{client_name}%"
-            
         # Фильтр по типу вклада
         deposit_type = self.filter_type_combo.currentText()
         if deposit_type != "Все типы":
-            params["deposit_type"] = deposit_type
+            values["type"] = deposit_type
             
         # Фильтр по статусу
         status = self.filter_status_combo.currentText()
@@ -377,9 +296,9 @@ class DepositsWindow(BaseTableWindow):
                 "Закрытые": "closed",
                 "Закрытые досрочно": "closed early"
             }
-            params["status"] = status_map.get(status)
+            values["status"] = status_map.get(status)
             
-        return params
+        return values
 
     def add_record(self):
         """Добавление нового вклада"""
@@ -417,7 +336,7 @@ class DepositsWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранного вклада"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите вклад для редактирования")
             return
@@ -434,7 +353,7 @@ class DepositsWindow(BaseTableWindow):
             """
             result = self.db.execute_query(
                 query,
-                params=(self.table.item(current_row, 0).text(),),
+                params=(self.table.text(current_row, 0),),
                 fetch_one=True
             )
             
@@ -492,14 +411,14 @@ class DepositsWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранного вклада"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите вклад для удаления")
             return
             
-        deposit_id = self.table.item(current_row, 0).text()
-        deposit_type = self.table.item(current_row, 1).text()
-        deposit_amount = self.table.item(current_row, 5).text()
+        deposit_id = self.table.text(current_row, 0)
+        deposit_type = self.table.text(current_row, 1)
+        deposit_amount = self.table.text(current_row, 5)
         
         reply = QMessageBox.question(
             self,
@@ -511,10 +430,14 @@ class DepositsWindow(BaseTableWindow):
         
         if reply == QMessageBox.Yes:
             try:
-                # Проверяем наличие связанных транзакций
-                query = "SELECT COUNT(*) FROM Transaction WHERE deposit_id = %s"
-                result = self.db.execute_query(query, params=(deposit_id,), fetch_one=True)
-                
+                # Проверка и удаление — в одной транзакции на одном соединении;
+                # блокировка вклада не дает добавить транзакцию между ними
+                with self.db.unit_of_work() as uow:
+                    uow.execute(Queries.LOCK_DEPOSIT, (deposit_id,))
+                    result = uow.fetch_one(Queries.COUNT_DEPOSIT_TRANSACTIONS, (deposit_id,))
+                    if result[0] == 0:
+                        uow.execute(Queries.DELETE_DEPOSIT, (deposit_id,))
+
                 if result[0] > 0:
                     QMessageBox.warning(
                         self,
@@ -522,9 +445,6 @@ class DepositsWindow(BaseTableWindow):
                         "Невозможно удалить вклад, так как с ним связаны транзакции"
                     )
                     return
-                    
-                query = "DELETE FROM Deposit WHERE id = %s"
-                self.db.execute_query(query, params=(deposit_id,), commit=True)
                 self.refresh_table()
                 QMessageBox.information(self, "Успех", "Вклад успешно удален")
             except Exception as e:
@@ -5,15 +5,14 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QDateEdit,
     QComboBox,
     QGroupBox
 )
 from PyQt5.QtCore import Qt, QDate
-from datetime import datetime
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
 
 class DocumentDialog(QDialog):
@@ -93,6 +92,21 @@ class DocumentDialog(QDialog):
         }
 
 class DocumentsWindow(BaseTableWindow):
+    import_entity = "document"
+    # Даты — в ISO: из текста ячеек заполняется диалог редактирования
+    columns = [
+        Column("ID"),
+        Column("Номер паспорта"),
+        Column("Дата рождения", "date", date_format="%Y-%m-%d"),
+        Column("Пол"),
+        Column("Клиент"),
+        Column("Дата договора", "date", date_format="%Y-%m-%d"),
+        Column("Кодовое слово"),
+        Column("Статус", "status", colors={
+            "active": "#21A038", "expired": "#999999", "suspended": "#E65100",
+        }),
+    ]
+    
     def __init__(self, parent=None, client_id=None, client_name=None, user_role="user"):
         title = f"Документы - {client_name}" if client_name else "Документы"
         super().__init__(parent, title=title, user_role=user_role)
@@ -100,7 +114,6 @@ class DocumentsWindow(BaseTableWindow):
         self.client_id = client_id
         self.client_name = client_name
         self.setup_search_panel()
-        self.setup_table()
         self.setup_navigation()
         self.refresh_table()
         
@@ -113,7 +126,7 @@ class DocumentsWindow(BaseTableWindow):
             
     def show_client(self):
         """Открывает окно клиента для выбранного документа"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
                 query = """
@@ -124,7 +137,7 @@ class DocumentsWindow(BaseTableWindow):
                 """
                 client = self.db.execute_query(
                     query,
-                    params=(self.table.item(current_row, 0).text(),),
+                    params=(self.table.text(current_row, 0),),
                     fetch_one=True
                 )
                 
@@ -152,7 +165,7 @@ class DocumentsWindow(BaseTableWindow):
         
         self.search_passport = QLineEdit()
         self.search_passport.setPlaceholderText("XXXX XXXXXX")
-        self.search_passport.textChanged.connect(self.refresh_table)
+        self.search_passport.textChanged.connect(self.filters.changed)
         
         self.search_status = QComboBox()
         self.search_status.addItems([
@@ -160,7 +173,7 @@ class DocumentsWindow(BaseTableWindow):
             "active",
             "inactive"
         ])
-        self.search_status.currentTextChanged.connect(self.refresh_table)
+        self.search_status.currentTextChanged.connect(self.filters.apply_now)
         
         search_layout.addRow("Номер паспорта:", self.search_passport)
         search_layout.addRow("Статус:", self.search_status)
@@ -168,55 +181,32 @@ class DocumentsWindow(BaseTableWindow):
         search_group.setLayout(search_layout)
         self.main_layout.insertWidget(0, search_group)
         
-    def setup_table(self):
-        """Настраивает структуру таблицы"""
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Номер паспорта", "Дата рождения", "Пол",
-            "Клиент", "Дата договора", "Кодовое слово", "Статус"
-        ])
+    def build_query(self):
+        """Запрос и параметры для текущего состояния фильтров"""
+        base_query = """
+            SELECT d.id, d.passport_number, d.birth_date, d.gender,
+                   c.last_name || ' ' || c.first_name as client_name,
+                   d.agreement_date, d.security_word, d.agreement_status
+            FROM Document d
+            JOIN Client c ON d.client_id = c.id
+            WHERE (d.passport_number LIKE %s OR %s = '')
+              AND (d.agreement_status = %s OR %s = 'Все статусы')
+        """
         
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            base_query = """
-                SELECT d.id, d.passport_number, d.birth_date, d.gender,
-                       c.last_name || ' ' || c.first_name as client_name,
-                       d.agreement_date, d.security_word, d.agreement_status
-                FROM Document d
-                JOIN Client c ON d.client_id = c.id
-                WHERE (d.passport_number LIKE %s OR %s = '')
-                  AND (d.agreement_status = %s OR %s = 'Все статусы')
-            """
-            
-            if self.client_id:
-                base_query += " AND d.client_id = %s"
-                
-            base_query += " ORDER BY d.agreement_date DESC"
-            
-            search_passport = f"%{self.search_passport.text()}%" if self.search_passport.text() else ""
-            status = self.search_status.currentText()
-            
-            params = [search_passport, search_passport, status, status]
-            if self.client_id:
-                params.append(self.client_id)
-                
-            results = self.db.execute_query(base_query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(0)
-            for row_num, row_data in enumerate(results):
-                self.table.insertRow(row_num)
-                for col_num, cell_data in enumerate(row_data):
-                    if isinstance(cell_data, datetime):
-                        cell_data = cell_data.strftime("%Y-%m-%d")
-                    item = QTableWidgetItem(str(cell_data))
-                    if col_num in [0]:  # ID column
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row_num, col_num, item)
-                    
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+        if self.client_id:
+            base_query += " AND d.client_id = %s"
             
+        base_query += " ORDER BY d.agreement_date DESC"
+        
+        search_passport = f"%{self.search_passport.text()}%" if self.search_passport.text() else ""
+        status = self.search_status.currentText()
+        
+        params = [search_passport, search_passport, status, status]
+        if self.client_id:
+            params.append(self.client_id)
+        
+        return base_query, params
+        
     def add_record(self):
         """Добавление нового документа"""
         dialog = DocumentDialog(self)
@@ -252,20 +242,20 @@ class DocumentsWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранного документа"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите документ для редактирования")
             return
             
         document_data = {
-            "id": self.table.item(current_row, 0).text(),
-            "passport_number": self.table.item(current_row, 1).text(),
-            "birth_date": self.table.item(current_row, 2).text(),
-            "gender": self.table.item(current_row, 3).text(),
-            "client_id": self.table.item(current_row, 4).text(),
-            "agreement_date": self.table.item(current_row, 5).text(),
-            "security_word": self.table.item(current_row, 6).text(),
-            "agreement_status": self.table.item(current_row, 7).text()
+            "id": self.table.text(current_row, 0),
+            "passport_number": self.table.text(current_row, 1),
+            "birth_date": self.table.text(current_row, 2),
+            "gender": self.table.text(current_row, 3),
+            "client_id": self.table.text(current_row, 4),
+            "agreement_date": self.table.text(current_row, 5),
+            "security_word": self.table.text(current_row, 6),
+            "agreement_status": self.table.text(current_row, 7)
         }
         
         dialog = DocumentDialog(self, document_data)
@@ -302,13 +292,13 @@ class DocumentsWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранного документа"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите документ для удаления")
             return
             
-        document_id = self.table.item(current_row, 0).text()
-        passport_number = self.table.item(current_row, 1).text()
+        document_id = self.table.text(current_row, 0)
+        passport_number = self.table.text(current_row, 1)
         
         reply = QMessageBox.question(
             self,
@@ -5,7 +5,6 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QDateEdit,
     QComboBox,
     QLabel,
@@ -13,11 +12,12 @@ from PyQt5.QtWidgets import (
     QGroupBox
 )
 from PyQt5.QtCore import Qt, QDate
-from datetime import datetime
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
 
 class EmployeeDialog(QDialog):
     """Диалог для добавления/редактирования сотрудника"""
@@ -74,12 +74,14 @@ class EmployeeDialog(QDialog):
         }
 
 class EmployeesWindow(BaseTableWindow):
+    columns = [
+        Column("ID"), Column("Имя"), Column("Фамилия"), Column("Телефон"),
+    ]
     def __init__(self, parent=None, user_role="user", specific_id=None):
         super().__init__(parent, title="Сотрудники", user_role=user_role)
         self.db = Database()
         self.specific_id = specific_id
         self.setup_search_panel()
-        self.setup_table()
         self.setup_navigation()
         self.refresh_table()
         
@@ -94,14 +96,14 @@ class EmployeesWindow(BaseTableWindow):
         
         self.search_last_name = QLineEdit()
         self.search_last_name.setPlaceholderText("Введите фамилию...")
-        self.search_last_name.textChanged.connect(self.refresh_table)
+        self.search_last_name.textChanged.connect(self.filters.changed)
         
         self.search_phone = QLineEdit()
         self.search_phone.setInputMask("+7 (999) 999-99-99;_")
         self.search_phone.setPlaceholderText("+7 (___) ___-__-__")
         # Сохраняем начальное значение маски
         self.initial_phone_mask = self.search_phone.text()
-        self.search_phone.textChanged.connect(self.refresh_table)
+        self.search_phone.textChanged.connect(self.filters.changed)
         
         search_layout.addRow("Фамилия:", self.search_last_name)
         search_layout.addRow("Телефон:", self.search_phone)
@@ -109,24 +111,17 @@ class EmployeesWindow(BaseTableWindow):
         search_group.setLayout(search_layout)
         self.main_layout.insertWidget(0, search_group)
         
-    def setup_table(self):
-        """Настраивает структуру таблицы"""
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Имя", "Фамилия", "Телефон"
-        ])
-        
     def setup_navigation(self):
         """Настраивает кнопки навигации"""
         self.add_navigation_button("Отчеты сотрудника", self.show_reports)
         
     def show_reports(self):
         """Открывает окно отчетов для выбранного сотрудника"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
-                employee_id = self.table.item(current_row, 0).text()
-                employee_name = f"{self.table.item(current_row, 1).text()} {self.table.item(current_row, 2).text()}"
+                employee_id = self.table.text(current_row, 0)
+                employee_name = f"{self.table.text(current_row, 1)} {self.table.text(current_row, 2)}"
                 
                 from .reports_window import ReportsWindow
                 reports_window = ReportsWindow(
@@ -140,58 +135,39 @@ class EmployeesWindow(BaseTableWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось открыть окно отчетов: {str(e)}")
         
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            query = """
-                SELECT e.id, e.first_name, e.last_name, e.phone
-                FROM Employee e
-                WHERE 1=1
-            """
-            
-            params = []
-            
-            # Фильтр по конкретному сотруднику
-            if self.specific_id:
-                query += " AND e.id = %s"
-                params.append(self.specific_id)
-            else:
-                # Применяем остальные фильтры только если не ищем конкретного сотрудника
-                if self.search_last_name.text():
-                    query += " AND LOWER(e.last_name) LIKE LOWER(%s)"
-                    params.append(f"%{self.search_last_name.text()}%")
+    def build_query(self):
+        """Запрос и параметры для текущего состояния фильтров"""
+        query = """
+            SELECT e.id, e.first_name, e.last_name, e.phone
+            FROM Employee e
+            WHERE 1=1
+        """
+        
+        params = []
+        
+        # Фильтр по конкретному сотруднику
+        if self.specific_id:
+            query += " AND e.id = %s"
+            params.append(self.specific_id)
+        else:
+            # Применяем остальные фильтры только если не ищем конкретного сотрудника
+            if self.search_last_name.text():
+                query += " AND LOWER(e.last_name) LIKE LOWER(%s)"
+                params.append(contains(self.search_last_name.text()))
 
-                # Применяем фильтр по телефону только если текст отличается от начальной маски
-                current_phone = self.search_phone.text()
-                if current_phone != self.initial_phone_mask:
-                    # Извлекаем только введенные цифры из текущего значения
-                    current_digits = ''.join(c for c in current_phone if c.isdigit())
-                    # Формируем шаблон для поиска
-                    search_pattern = '%'
-                    for digit in current_digits:
-                        search_pattern += f'[^0-9]*{digit}'
-                    search_pattern += '%'
-                    query += " AND e.phone ~ %s"
-                    params.append(search_pattern)
-            
-            query += " ORDER BY e.last_name, e.first_name"
-            
-            results = self.db.execute_query(query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(0)
-            for row_num, row_data in enumerate(results):
-                self.table.insertRow(row_num)
-                for col_num, cell_data in enumerate(row_data):
-                    if isinstance(cell_data, datetime):
-                        cell_data = cell_data.strftime("%Y-%m-%d")
-                    item = QTableWidgetItem(str(cell_data) if cell_data is not None else "")
-                    if col_num == 0:  # ID column
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row_num, col_num, item)
-                    
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
-            
+            # Применяем фильтр по телефону только если текст отличается от начальной маски
+            current_phone = self.search_phone.text()
+            if current_phone != self.initial_phone_mask:
+                # Извлекаем только введенные цифры из текущего значения
+                current_digits = ''.join(c for c in current_phone if c.isdigit())
+                # Поиск по цифрам номера (триграммный индекс по тому же выражению)
+                query += " AND regexp_replace(e.phone, '\\D', '', 'g') LIKE %s"
+                params.append(contains(current_digits))
+        
+        query += " ORDER BY e.last_name, e.first_name"
+        
+        return query, params
+        
     def add_record(self):
         """Добавление нового сотрудника"""
         dialog = EmployeeDialog(self)
@@ -221,16 +197,16 @@ class EmployeesWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранного сотрудника"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите сотрудника для редактирования")
             return
             
         employee_data = {
-            "id": self.table.item(current_row, 0).text(),
-            "first_name": self.table.item(current_row, 1).text(),
-            "last_name": self.table.item(current_row, 2).text(),
-            "phone": self.table.item(current_row, 3).text()
+            "id": self.table.text(current_row, 0),
+            "first_name": self.table.text(current_row, 1),
+            "last_name": self.table.text(current_row, 2),
+            "phone": self.table.text(current_row, 3)
         }
         
         dialog = EmployeeDialog(self, employee_data)
@@ -261,13 +237,13 @@ class EmployeesWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранного сотрудника"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите сотрудника для удаления")
             return
             
-        employee_id = self.table.item(current_row, 0).text()
-        employee_name = f"{self.table.item(current_row, 1).text()} {self.table.item(current_row, 2).text()}"
+        employee_id = self.table.text(current_row, 0)
+        employee_name = f"{self.table.text(current_row, 1)} {self.table.text(current_row, 2)}"
         
         reply = QMessageBox.question(
             self,
@@ -5,7 +5,6 @@ from PyQt5.QtWidgets import (
     QFormLayout,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QDateEdit,
     QComboBox,
     QLabel,
@@ -18,8 +17,10 @@ from PyQt5.QtCore import Qt, QDate
 from datetime import datetime, timedelta
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
 from database.queries import Queries
+from database.query_builder import contains
 
 class ReportFilterDialog(QDialog):
     """Диалог для настройки фильтров отчета"""
@@ -284,6 +285,19 @@ class ReportDialog(QDialog):
         }
 
 class ReportsWindow(BaseTableWindow):
+    list_query = Queries.GET_REPORTS_TABLE
+    list_table = "report"
+    streaming = True
+    columns = [
+        Column("ID"),
+        Column("Дата", "datetime"),
+        Column("Сотрудник"),
+        Column("Клиент"),
+        Column("Тип операции"),
+        Column("Сумма", "money"),
+        Column("Содержание"),
+    ]
+    
     def __init__(self, parent=None, employee_id=None, employee_name=None, user_role="user"):
         title = f"Отчеты - {employee_name}" if employee_name else "Отчеты"
         super().__init__(parent, title=title, user_role=user_role)
@@ -291,7 +305,6 @@ class ReportsWindow(BaseTableWindow):
         self.employee_id = employee_id
         self.employee_name = employee_name
         self.setup_search_panel()
-        self.setup_table()
         self.setup_navigation()
         self.refresh_table()
         
@@ -302,11 +315,11 @@ class ReportsWindow(BaseTableWindow):
         
         self.search_employee = QLineEdit()
         self.search_employee.setPlaceholderText("Введите фамилию сотрудника...")
-        self.search_employee.textChanged.connect(self.refresh_table)
+        self.search_employee.textChanged.connect(self.filters.changed)
         
         self.search_client = QLineEdit()
         self.search_client.setPlaceholderText("Введите фамилию клиента...")
-        self.search_client.textChanged.connect(self.refresh_table)
+        self.search_client.textChanged.connect(self.filters.changed)
         
         search_layout.addRow("Фамилия сотрудника:", self.search_employee)
         search_layout.addRow("Фамилия клиента:", self.search_client)
@@ -314,14 +327,6 @@ class ReportsWindow(BaseTableWindow):
         search_group.setLayout(search_layout)
         self.main_layout.insertWidget(0, search_group)
         
-    def setup_table(self):
-        """Настраивает структуру таблицы"""
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Дата", "Сотрудник", "Клиент", "Тип операции", 
-            "Сумма", "Содержание"
-        ])
-        
     def setup_navigation(self):
         """Настраивает кнопки навигации"""
         if not self.employee_id:  # Если окно открыто не из окна сотрудника
@@ -330,7 +335,7 @@ class ReportsWindow(BaseTableWindow):
         
     def show_employee(self):
         """Открывает окно сотрудника для выбранного отчета"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
                 # Получаем ID сотрудника из базы данных
@@ -342,7 +347,7 @@ class ReportsWindow(BaseTableWindow):
                 """
                 result = self.db.execute_query(
                     query,
-                    params=(self.table.item(current_row, 0).text(),),
+                    params=(self.table.text(current_row, 0),),
                     fetch_one=True
                 )
                 
@@ -361,7 +366,7 @@ class ReportsWindow(BaseTableWindow):
                 
     def show_client(self):
         """Открывает окно клиента для выбранного отчета"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
                 query = """
@@ -374,7 +379,7 @@ class ReportsWindow(BaseTableWindow):
                 """
                 result = self.db.execute_query(
                     query,
-                    params=(self.table.item(current_row, 0).text(),),
+                    params=(self.table.text(current_row, 0),),
                     fetch_one=True
                 )
                 
@@ -391,58 +396,16 @@ class ReportsWindow(BaseTableWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось открыть окно клиента: {str(e)}")
                 
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            base_query = """
-                SELECT r.id, r.creation_date, 
-                       e.last_name || ' ' || e.first_name as employee_name,
-                       c.last_name || ' ' || c.first_name as client_name,
-                       t.type as transaction_type, t.amount,
-                       r.content
-                FROM Report r
-                JOIN Employee e ON r.employee_id = e.id
-                JOIN Transaction t ON r.transaction_id = t.id
-                JOIN Deposit d ON t.deposit_id = d.id
-                JOIN Client c ON d.client_id = c.id
-                WHERE 1=1
-            """
-            
-            params = []
-            
-            # Фильтр по конкретному сотруднику
-            if self.employee_id:
-                base_query += " AND r.employee_id = %s"
-                params.append(self.employee_id)
-            elif self.search_employee.text():
-                base_query += " AND LOWER(e.last_name) LIKE LOWER(%s)"
-                params.append(f"%{self.search_employee.text()}%")
-                
-            # Фильтр по клиенту
-            if self.search_client.text():
-                base_query += " AND LOWER(c.last_name) LIKE LOWER(%s)"
-                params.append(f"%{self.search_client.text()}%")
-                
-            base_query += " ORDER BY r.creation_date DESC"
-            
-            results = self.db.execute_query(base_query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(0)
-            for row_num, row_data in enumerate(results):
-                self.table.insertRow(row_num)
-                for col_num, cell_data in enumerate(row_data):
-                    if isinstance(cell_data, datetime):
-                        cell_data = cell_data.strftime("%Y-%m-%d %H:%M:%S")
-                    elif isinstance(cell_data, (int, float)) and col_num == 5:  # Amount column
-                        cell_data = f"{cell_data:.2f}"
-                    item = QTableWidgetItem(str(cell_data))
-                    if col_num == 0:  # ID column
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row_num, col_num, item)
-                    
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
-            
+    def filter_values(self):
+        """Значения фильтров GET_REPORTS_TABLE"""
+        values = {"client_last_name": contains(self.search_client.text())}
+        # Отчеты конкретного сотрудника или поиск по фамилии
+        if self.employee_id:
+            values["employee_id"] = self.employee_id
+        else:
+            values["employee_last_name"] = contains(self.search_employee.text())
+        return values
+        
     def add_record(self):
         """Добавление нового отчета"""
         dialog = ReportDialog(self)
@@ -473,7 +436,7 @@ class ReportsWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранного отчета"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите отчет для редактирования")
             return
@@ -491,7 +454,7 @@ class ReportsWindow(BaseTableWindow):
             """
             result = self.db.execute_query(
                 query,
-                params=(self.table.item(current_row, 0).text(),),
+                params=(self.table.text(current_row, 0),),
                 fetch_one=True
             )
             
@@ -539,13 +502,13 @@ class ReportsWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранного отчета"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите отчет для удаления")
             return
             
-        report_id = self.table.item(current_row, 0).text()
-        report_title = self.table.item(current_row, 1).text()
+        report_id = self.table.text(current_row, 0)
+        report_title = self.table.text(current_row, 1)
         
         reply = QMessageBox.question(
             self,
@@ -569,7 +532,7 @@ class ReportsWindow(BaseTableWindow):
         if row < 0:
             return
             
-        report_id = self.table.item(row, 0).text()
+        report_id = self.table.text(row, 0)
         
         try:
             # Получаем детали транзакции
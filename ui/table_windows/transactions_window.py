@@ -4,7 +4,6 @@ from PyQt5.QtWidgets import (
     QFormLayout,
     QPushButton,
     QMessageBox,
-    QTableWidgetItem,
     QDateTimeEdit,
     QComboBox,
     QDoubleSpinBox,
@@ -14,10 +13,11 @@ from PyQt5.QtWidgets import (
     QLineEdit
 )
 from PyQt5.QtCore import Qt, QDateTime
-from datetime import datetime
 
 from .base_table_window import BaseTableWindow
+from ui.data_table import Column
 from database.db import Database
+from database.queries import Queries
 
 class TransactionDialog(QDialog):
     """Диалог для добавления/редактирования транзакции"""
@@ -85,6 +85,18 @@ class TransactionDialog(QDialog):
         }
 
 class TransactionsWindow(BaseTableWindow):
+    import_entity = "transaction"
+    list_query = Queries.GET_TRANSACTIONS_TABLE
+    list_table = "transaction"
+    streaming = True
+    columns = [
+        Column("ID"),
+        Column("Сумма", "money"),
+        Column("Дата", "datetime"),
+        Column("Тип операции"),
+        Column("Вклад"),
+    ]
+    
     def __init__(self, parent=None, deposit_id=None, deposit_info=None, user_role="user"):
         title = f"Транзакции - {deposit_info}" if deposit_info else "Транзакции"
         super().__init__(parent, title=title, user_role=user_role)
@@ -92,7 +104,6 @@ class TransactionsWindow(BaseTableWindow):
         self.deposit_id = deposit_id
         self.deposit_info = deposit_info
         self.setup_search_panel()
-        self.setup_table()
         self.setup_navigation()
         self.refresh_table()
         
@@ -103,7 +114,7 @@ class TransactionsWindow(BaseTableWindow):
             
     def show_deposit(self):
         """Открывает окно вклада для выбранной транзакции"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row >= 0:
             try:
                 # Получаем ID вклада из базы данных
@@ -118,7 +129,7 @@ class TransactionsWindow(BaseTableWindow):
                 """
                 result = self.db.execute_query(
                     query,
-                    params=(self.table.item(current_row, 0).text(),),
+                    params=(self.table.text(current_row, 0),),
                     fetch_one=True
                 )
                 
@@ -151,7 +162,7 @@ class TransactionsWindow(BaseTableWindow):
             "closing",
             "early closing"
         ])
-        self.search_type.currentTextChanged.connect(self.refresh_table)
+        self.search_type.currentTextChanged.connect(self.filters.apply_now)
         
         # Поиск по сумме
         amount_layout = QHBoxLayout()
@@ -160,14 +171,14 @@ class TransactionsWindow(BaseTableWindow):
         self.search_amount_from.setRange(-10000000, 10000000)
         self.search_amount_from.setSingleStep(1000)
         self.search_amount_from.setPrefix("от ₽ ")
-        self.search_amount_from.valueChanged.connect(self.refresh_table)
+        self.search_amount_from.valueChanged.connect(self.filters.changed)
         
         self.search_amount_to = QDoubleSpinBox()
         self.search_amount_to.setRange(-10000000, 10000000)
         self.search_amount_to.setSingleStep(1000)
         self.search_amount_to.setPrefix("до ₽ ")
         self.search_amount_to.setValue(10000000)
-        self.search_amount_to.valueChanged.connect(self.refresh_table)
+        self.search_amount_to.valueChanged.connect(self.filters.changed)
         
         amount_layout.addWidget(self.search_amount_from)
         amount_layout.addWidget(self.search_amount_to)
@@ -178,61 +189,16 @@ class TransactionsWindow(BaseTableWindow):
         search_group.setLayout(search_layout)
         self.main_layout.insertWidget(0, search_group)
         
-    def setup_table(self):
-        """Настраивает структуру таблицы"""
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Сумма", "Дата", "Тип операции", "Вклад"
-        ])
+    def filter_values(self):
+        """Значения фильтров GET_TRANSACTIONS_TABLE"""
+        transaction_type = self.search_type.currentText()
+        return {
+            "deposit_id": self.deposit_id or None,
+            "type": None if transaction_type == "Все операции" else transaction_type,
+            "amount_from": self.search_amount_from.value(),
+            "amount_to": self.search_amount_to.value(),
+        }
         
-    def refresh_table(self):
-        """Обновляет данные в таблице"""
-        try:
-            base_query = """
-                SELECT t.id, t.amount, t.date, t.type,
-                       d.type || ' (' || c.last_name || ' ' || c.first_name || ')' as deposit_info
-                FROM Transaction t
-                JOIN Deposit d ON t.deposit_id = d.id
-                JOIN Client c ON d.client_id = c.id
-                WHERE (t.type = %s OR %s = 'Все операции')
-                  AND t.amount BETWEEN %s AND %s
-            """
-            
-            if self.deposit_id:
-                base_query += " AND t.deposit_id = %s"
-                
-            base_query += " ORDER BY t.date DESC"
-            
-            transaction_type = self.search_type.currentText()
-            amount_from = self.search_amount_from.value()
-            amount_to = self.search_amount_to.value()
-            
-            params = [
-                transaction_type, transaction_type,
-                amount_from, amount_to
-            ]
-            
-            if self.deposit_id:
-                params.append(self.deposit_id)
-                
-            results = self.db.execute_query(base_query, params=params, fetch_all=True)
-            
-            self.table.setRowCount(0)
-            for row_num, row_data in enumerate(results):
-                self.table.insertRow(row_num)
-                for col_num, cell_data in enumerate(row_data):
-                    if isinstance(cell_data, datetime):
-                        cell_data = cell_data.strftime("%Y-%m-%d %H:%M:%S")
-                    elif isinstance(cell_data, (float, int)) and col_num == 1:  # amount
-                        cell_data = f"{float(cell_data):.2f}"
-                    item = QTableWidgetItem(str(cell_data) if cell_data is not None else "")
-                    if col_num == 0:  # ID column
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row_num, col_num, item)
-                    
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
-            
     def add_record(self):
         """Добавление новой транзакции"""
         dialog = TransactionDialog(self)
@@ -264,7 +230,7 @@ class TransactionsWindow(BaseTableWindow):
                 
     def edit_record(self):
         """Редактирование выбранной транзакции"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите транзакцию для редактирования")
             return
@@ -278,7 +244,7 @@ class TransactionsWindow(BaseTableWindow):
             """
             result = self.db.execute_query(
                 query,
-                params=(self.table.item(current_row, 0).text(),),
+                params=(self.table.text(current_row, 0),),
                 fetch_one=True
             )
             
@@ -324,14 +290,14 @@ class TransactionsWindow(BaseTableWindow):
                 
     def delete_record(self):
         """Удаление выбранной транзакции"""
-        current_row = self.table.currentRow()
+        current_row = self.table.current_row()
         if current_row < 0:
             QMessageBox.warning(self, "Предупреждение", "Выберите транзакцию для удаления")
             return
             
-        transaction_id = self.table.item(current_row, 0).text()
-        transaction_type = self.table.item(current_row, 3).text()
-        transaction_amount = self.table.item(current_row, 1).text()
+        transaction_id = self.table.text(current_row, 0)
+        transaction_type = self.table.text(current_row, 3)
+        transaction_amount = self.table.text(current_row, 1)
         
         reply = QMessageBox.question(
             self,